@@ -43,6 +43,20 @@ from torchrl.objectives.value.functional import (
 )
 
 
+compiled_params = pytest.mark.parametrize(
+    "compiled",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not hasattr(torch, "compile"), reason="requires torch>=2.0"
+            ),
+        ),
+    ],
+)
+
+
 class setup_value_fn:
     def __init__(self, has_lmbda, has_state_value):
         self.has_lmbda = has_lmbda
@@ -261,7 +275,10 @@ def test_sac_speed(benchmark, n_obs=8, n_act=4, ncells=128, batch=128, n_hidden=
     benchmark(loss, td)
 
 
-def test_redq_speed(benchmark, n_obs=8, n_act=4, ncells=128, batch=128, n_hidden=64):
+@pytest.mark.parametrize("num_qvalue_nets", [10, 20])
+def test_redq_speed(
+    benchmark, num_qvalue_nets, n_obs=8, n_act=4, ncells=128, batch=128, n_hidden=64
+):
     common = MLP(
         num_cells=ncells,
         in_features=n_obs,
@@ -313,7 +330,10 @@ def test_redq_speed(benchmark, n_obs=8, n_act=4, ncells=128, batch=128, n_hidden
     value(actor(td))
 
     loss = REDQLoss(
-        actor, value, action_spec=UnboundedContinuousTensorSpec(shape=(n_act,))
+        actor,
+        value,
+        action_spec=UnboundedContinuousTensorSpec(shape=(n_act,)),
+        num_qvalue_nets=num_qvalue_nets,
     )
 
     loss(td)
@@ -555,8 +575,9 @@ def test_a2c_speed(
     benchmark(loss, td)
 
 
+@compiled_params
 def test_ppo_speed(
-    benchmark, n_obs=8, n_act=4, n_hidden=64, ncells=128, batch=128, T=10
+    benchmark, compiled, n_obs=8, n_act=4, n_hidden=64, ncells=128, batch=128, T=10
 ):
     common_net = MLP(
         num_cells=ncells,
@@ -606,6 +627,8 @@ def test_ppo_speed(
     critic(td.clone())
 
     loss = ClipPPOLoss(actor=actor, critic=critic)
+    if compiled:
+        loss.compile_core()
     advantage = GAE(value_network=critic, gamma=0.99, lmbda=0.95, shifted=True)
     advantage(td)
     loss(td)
@@ -0,0 +1,65 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+import argparse
+
+import pytest
+import torch
+from tensordict import TensorDict
+
+from torchrl.data.postprocs import MultiStep
+
+
+class setup_multistep:
+    def __init__(self, envs, timesteps, done_prob):
+        self.envs = envs
+        self.timesteps = timesteps
+        self.done_prob = done_prob
+
+    def __call__(self):
+        torch.manual_seed(0)
+        device = "cuda:0" if torch.cuda.device_count() else "cpu"
+        size = (self.envs, self.timesteps)
+        # short episodes result in many trajectories per batch
+        done = torch.zeros(*size, 1, dtype=torch.bool, device=device).bernoulli_(
+            self.done_prob
+        )
+        td = TensorDict(
+            {
+                "observation": torch.randn(*size, 4, device=device),
+                "next": {
+                    "observation": torch.randn(*size, 4, device=device),
+                    "reward": torch.randn(*size, 1, device=device),
+                    "done": done,
+                },
+            },
+            batch_size=size,
+            device=device,
+        )
+        return ((td,), {})
+
+
+@pytest.mark.parametrize("n_steps", [3, 10])
+@pytest.mark.parametrize(
+    "envs,timesteps,done_prob",
+    [
+        [1, 1000, 0.01],
+        # CartPole-like batches: thousands of short episodes
+        [64, 1000, 0.05],
+        [64, 1000, 0.5],
+    ],
+)
+def test_multistep(benchmark, n_steps, envs, timesteps, done_prob):
+    multistep = MultiStep(gamma=0.99, n_steps=n_steps)
+    benchmark.pedantic(
+        multistep,
+        setup=setup_multistep(envs, timesteps, done_prob),
+        iterations=1,
+        rounds=50,
+    )
+
+
+if __name__ == "__main__":
+    args, unknown = argparse.ArgumentParser().parse_known_args()
+    pytest.main([__file__, "--capture", "no", "--exitfirst"] + unknown)
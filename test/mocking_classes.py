@@ -4,6 +4,7 @@
 # LICENSE file in the root directory of this source tree.
 from typing import Optional
 
+import numpy as np
 import torch
 import torch.nn as nn
 from tensordict.tensordict import TensorDict, TensorDictBase
@@ -20,6 +21,7 @@ from torchrl.data.tensor_specs import (
     UnboundedContinuousTensorSpec,
 )
 from torchrl.envs.common import EnvBase
+from torchrl.envs.gym_like import GymLikeEnv
 from torchrl.envs.model_based.common import ModelBasedEnvBase
 
 spec_dict = {
@@ -1290,3 +1292,51 @@ class CountingBatchedEnv(EnvBase):
             device=self.device,
         )
         return tensordict.select().set("next", tensordict)
+
+
+class _NumpyCountingEnv:
+    """A gym-like environment working with numpy arrays."""
+
+    def __init__(self, max_steps: int = 5):
+        self.max_steps = max_steps
+        self.count = 0
+
+    def reset(self):
+        self.count = 0
+        return {"observation": np.zeros(3, dtype=np.float32)}, {"count": self.count}
+
+    def step(self, action):
+        self.count += 1
+        obs = {
+            "observation": np.full(3, self.count, dtype=np.float32),
+            "pixels": np.full((2, 4, 4), 255 * (self.count % 2), dtype=np.uint8),
+        }
+        info = {"count": self.count}
+        return obs, 1.0, self.count >= self.max_steps, info
+
+
+class NumpyGymLikeEnv(GymLikeEnv):
+    """A GymLikeEnv wrapping a :class:`_NumpyCountingEnv`."""
+
+    def __init__(self, max_steps: int = 5, **kwargs):
+        super().__init__(env=_NumpyCountingEnv(max_steps), **kwargs)
+
+    def _check_kwargs(self, kwargs):
+        pass
+
+    def _build_env(self, env):
+        return env
+
+    def _init_env(self):
+        pass
+
+    def _set_seed(self, seed: Optional[int]):
+        pass
+
+    def _make_specs(self, env):
+        self.observation_spec = CompositeSpec(
+            observation=UnboundedContinuousTensorSpec((3,)),
+            pixels=BoundedTensorSpec(0, 255, (2, 4, 4), dtype=torch.uint8),
+        )
+        self.action_spec = BoundedTensorSpec(-1, 1, (1,))
+        self.reward_spec = UnboundedContinuousTensorSpec((1,))
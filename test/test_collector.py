@@ -4,6 +4,7 @@
 # LICENSE file in the root directory of this source tree.
 
 import argparse
+import json
 import sys
 
 import numpy as np
@@ -25,10 +26,12 @@ from mocking_classes import (
 from tensordict.nn import TensorDictModule
 from tensordict.tensordict import assert_allclose_td, TensorDict
 from torch import nn
-from torchrl._utils import prod, seed_generator
+from torchrl._utils import prod, seed_generator, telemetry
 from torchrl.collectors import aSyncDataCollector, SyncDataCollector
+from torchrl.collectors.autotune import autotune, make_collector
 from torchrl.collectors.collectors import (
     _Interruptor,
+    _SharedWeightStore,
     MultiaSyncDataCollector,
     MultiSyncDataCollector,
     RandomPolicy,
@@ -1570,6 +1573,314 @@ class TestUpdateParams:
             col.shutdown()
 
 
+@pytest.mark.parametrize("lookahead", [1, 2])
+def test_multisync_lookahead(lookahead):
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    policy.param.data += 1
+    col = MultiSyncDataCollector(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=20,
+        total_frames=200,
+        lookahead=lookahead,
+    )
+    try:
+        last_state = None
+        versions = []
+        for i, data in enumerate(col):
+            assert data.shape == torch.Size([20])
+            # one contiguous chunk of 10 frames per worker
+            data = data.view(2, 10)
+            traj_ids = data["collector", "traj_ids"]
+            assert not (set(traj_ids[0].tolist()) & set(traj_ids[1].tolist()))
+            version = data["collector", "policy_version"]
+            # workers may pick up new weights at different batches
+            assert (version == version[:, :1]).all()
+            versions.append(version[:, 0].min().item())
+            # batches from each worker are delivered in collection order
+            if last_state is not None:
+                torch.testing.assert_close(data["state"][:, 0], last_state)
+            last_state = data["next", "state"][:, -1]
+            if i == 2:
+                col.update_policy_weights_()
+        assert i == 9
+        # the policy lag is bounded by the number of batches in flight
+        assert versions[:3] == [0, 0, 0]
+        assert versions[3 + lookahead :] == [1] * (len(versions) - 3 - lookahead)
+    finally:
+        col.shutdown()
+    with pytest.raises(ValueError, match="lookahead"):
+        MultiSyncDataCollector([env_fn], policy, frames_per_batch=10, lookahead=-1)
+
+
+@pytest.mark.parametrize("return_same_td", [True, False])
+def test_multisync_shared_out_buffer(return_same_td):
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    policy.param.data += 1
+    col = MultiSyncDataCollector(
+        [env_fn, env_fn, env_fn],
+        policy,
+        frames_per_batch=30,
+        total_frames=150,
+        return_same_td=return_same_td,
+    )
+    try:
+        previous = None
+        all_traj_ids = []
+        for data in col:
+            assert data.shape == torch.Size([30])
+            if previous is not None:
+                assert (data is previous) is return_same_td
+                if not return_same_td:
+                    # the workers write in the output buffer: previous batches
+                    # must be left untouched
+                    torch.testing.assert_close(
+                        data.view(3, 10)["state"][:, 0],
+                        previous.view(3, 10)["next", "state"][:, -1],
+                    )
+            traj_ids = data.view(3, 10)["collector", "traj_ids"]
+            all_traj_ids.append(traj_ids[:, 0])
+            previous = data
+        # each worker runs a single trajectory with its own id
+        all_traj_ids = torch.stack(all_traj_ids, 0)
+        assert (all_traj_ids == all_traj_ids[0]).all()
+        assert all_traj_ids[0].unique().numel() == 3
+    finally:
+        col.shutdown()
+
+
+def test_multisync_reset_traj_ids():
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    col = MultiSyncDataCollector(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=20,
+        total_frames=20,
+    )
+    try:
+        # the trajectories of the dummy env never end: each worker keeps the
+        # id it drew at reset
+        for _ in range(2):
+            # the pool is reset by the main process once the workers have
+            # stopped collecting
+            col.set_seed(0)
+            for data in col:
+                traj_ids = data.view(2, 10)["collector", "traj_ids"]
+                assert (traj_ids == traj_ids[:, :1]).all()
+                assert set(traj_ids[:, 0].tolist()) == {0, 1}
+            col.reset()
+            for data in col:
+                traj_ids = data.view(2, 10)["collector", "traj_ids"]
+                assert set(traj_ids[:, 0].tolist()) == {0, 1}
+    finally:
+        col.shutdown()
+
+
+def test_multiasync_reset_while_running():
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    policy.param.data += 1
+    col = MultiaSyncDataCollector(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=10,
+        total_frames=100,
+    )
+    try:
+        for i, data in enumerate(col):
+            if i == 2:
+                # the pending requests are kept by the workers, which must
+                # not stall after the reset
+                col.reset()
+        assert i == 9
+        # the batches requested by the previous iteration are not lost
+        for i, data in enumerate(col):
+            pass
+        assert i == 9
+    finally:
+        col.shutdown()
+
+
+def test_policy_version():
+    policy = TestUpdateParams.Policy()
+    col = SyncDataCollector(
+        TestUpdateParams.DummyEnv("cpu"),
+        policy,
+        frames_per_batch=10,
+        total_frames=50,
+    )
+    try:
+        for i, data in enumerate(col):
+            assert (data["collector", "policy_version"] == i // 2).all()
+            if i % 2:
+                col.update_policy_weights_()
+        assert col.policy_version == 2
+        col.update_policy_weights_(policy_version=10)
+        assert col.policy_version == 10
+    finally:
+        col.shutdown()
+
+
+@pytest.mark.parametrize("drop_stale_batches", [True, False])
+def test_max_policy_lag(drop_stale_batches):
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    col = MultiaSyncDataCollector(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=10,
+        total_frames=200,
+        max_policy_lag=1,
+        drop_stale_batches=drop_stale_batches,
+    )
+    try:
+        n_batches = 0
+        for data in col:
+            n_batches += 1
+            lag = col.policy_version - data["collector", "policy_version"]
+            if drop_stale_batches:
+                assert (lag <= 1).all()
+                assert ("collector", "stale") not in data.keys(True)
+            else:
+                assert (data["collector", "stale"] == (lag > 1)).all()
+            # the weights are updated twice per batch: the batches collected
+            # by the other worker in the meantime lag behind
+            col.update_policy_weights_()
+            col.update_policy_weights_()
+        assert n_batches <= 20
+        if not drop_stale_batches:
+            assert n_batches == 20
+    finally:
+        col.shutdown()
+    with pytest.raises(ValueError, match="max_policy_lag"):
+        MultiaSyncDataCollector(
+            [env_fn], policy, frames_per_batch=10, max_policy_lag=-1
+        )
+
+
+@pytest.mark.parametrize(
+    "collector_class", [MultiSyncDataCollector, MultiaSyncDataCollector]
+)
+def test_gather_telemetry(collector_class):
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    telemetry.reset()
+    col = collector_class(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=20,
+        total_frames=100,
+    )
+    try:
+        telemetry.enable()
+        # the workers start recording once they have been told to
+        col.gather_telemetry()
+        for _ in col:
+            pass
+        col.gather_telemetry()
+        summary = telemetry.summary()
+        # the workers' timers are merged in the main process registry
+        assert summary["collector/env_step"]["count"] >= 100
+        assert summary["collector/policy"]["count"] >= 100
+        assert summary["collector/queue_wait"]["count"] >= 5
+        stats = summary["collector/env_step"]
+        assert stats["min"] <= stats["p50"] <= stats["p99"] <= stats["max"]
+    finally:
+        telemetry.disable()
+        telemetry.reset()
+        col.shutdown()
+
+
+def test_shared_weight_store():
+    weights = TensorDict({"param": torch.zeros(3), "sub": {"buf": torch.zeros(())}}, [])
+    store = _SharedWeightStore(weights)
+    local = weights.clone()
+    # nothing has been published yet
+    assert store.load(local) is None
+    for version in range(1, 4):
+        store.publish(weights.apply(lambda x, v=version: x + v), version)
+    # only the latest weights are loaded
+    assert store.load(local) == 3
+    assert (local["param"] == 3).all()
+    assert (local["sub", "buf"] == 3).all()
+    assert store.load(local) is None
+    # the publications do not modify the weights that have been loaded
+    store.publish(weights.apply(lambda x: x + 4), 4)
+    assert (local["param"] == 3).all()
+    assert store.load(local) == 4
+    assert (local["param"] == 4).all()
+
+
+def test_multiasync_publish_weights():
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    col = MultiaSyncDataCollector(
+        [env_fn, env_fn],
+        policy,
+        frames_per_batch=10,
+        total_frames=400,
+    )
+    try:
+        updated = False
+        for i, data in enumerate(col):
+            action = data["action"]
+            version = data["collector", "policy_version"]
+            # the frames are stamped with the version of the weights that
+            # produced them, also when the weights changed mid-batch
+            assert (action == version).all()
+            if i == 0:
+                # the workers are not paused: the new weights are picked
+                # up between two steps
+                policy.param.data += 1
+                col.update_policy_weights_()
+                assert col.policy_version == 1
+            elif (version == 1).all():
+                updated = True
+                break
+        assert updated
+    finally:
+        col.shutdown()
+
+
+def test_autotune(tmpdir):
+    env_fn = EnvCreator(lambda: TestUpdateParams.DummyEnv("cpu"))
+    policy = TestUpdateParams.Policy()
+    profile_path = str(tmpdir / "profiles.json")
+    kwargs = {
+        "cpu_budget": 2,
+        "collector_classes": (MultiSyncDataCollector,),
+        "envs_per_worker": (1, 2),
+        "batched_envs": ("serial",),
+        "frames_per_batch": (20, 40),
+        "storing_devices": ("cpu",),
+        "calibration_frames": 40,
+        "profile_path": profile_path,
+        "profile_key": "dummy",
+    }
+    config = autotune(env_fn, policy, **kwargs)
+    assert config["collector_class"] == "MultiSyncDataCollector"
+    assert config["num_workers"] in (1, 2)
+    assert config["envs_per_worker"] in (1, 2)
+    assert (
+        config["frames_per_batch"] % (config["num_workers"] * config["envs_per_worker"])
+        == 0
+    )
+    assert config["fps"] > 0
+    # the profile is reused without calibration
+    with open(profile_path) as f:
+        assert json.load(f)["dummy"] == config
+    assert autotune(env_fn, policy, **dict(kwargs, num_workers=(7,))) == config
+    collector = make_collector(config, env_fn, policy, total_frames=40)
+    try:
+        for data in collector:
+            assert data.numel() == config["frames_per_batch"]
+    finally:
+        collector.shutdown()
+
+
 if __name__ == "__main__":
     args, unknown = argparse.ArgumentParser().parse_known_args()
     pytest.main([__file__, "--capture", "no", "--exitfirst"] + unknown)
@@ -99,6 +99,7 @@ from torchrl.objectives import (
     PPOLoss,
     SACLoss,
     TD3Loss,
+    VmapLossEnsemble,
 )
 from torchrl.objectives.common import LossModule
 from torchrl.objectives.deprecated import DoubleREDQLoss_deprecated, REDQLoss_deprecated
@@ -115,6 +116,7 @@ from torchrl.objectives.value.advantages import (
     GAE,
     TD1Estimator,
     TDLambdaEstimator,
+    VTrace,
 )
 from torchrl.objectives.value.functional import (
     _transpose_time,
@@ -125,6 +127,8 @@ from torchrl.objectives.value.functional import (
     vec_generalized_advantage_estimate,
     vec_td1_advantage_estimate,
     vec_td_lambda_advantage_estimate,
+    vec_vtrace_advantage_estimate,
+    vtrace_advantage_estimate,
 )
 from torchrl.objectives.value.utils import (
     _custom_conv1d,
@@ -150,6 +154,15 @@ class _check_td_steady:
         ).all(), "Some keys have been modified in the tensordict!"
 
 
+_has_dynamo_explain = pack_version.parse(torch.__version__) >= pack_version.parse("2.1")
+
+
+def _assert_no_graph_break(fun, *args, **kwargs):
+    torch._dynamo.reset()
+    explanation = torch._dynamo.explain(fun)(*args, **kwargs)
+    assert explanation.graph_break_count == 0, explanation.break_reasons
+
+
 def get_devices():
     devices = [torch.device("cpu")]
     for i in range(torch.cuda.device_count()):
@@ -412,7 +425,7 @@ class TestDQN(LossModuleTestBase):
             action_spec_type=action_spec_type, device=device
         )
         loss_fn = DQNLoss(actor, loss_function="l2", delay_value=delay_value)
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -445,6 +458,19 @@ class TestDQN(LossModuleTestBase):
             p.data += torch.randn_like(p)
         assert all((p1 != p2).all() for p1, p2 in zip(parameters, actor.parameters()))
 
+    @pytest.mark.skipif(not _has_dynamo_explain, reason="requires torch>=2.1")
+    @pytest.mark.parametrize("action_spec_type", ("one_hot", "categorical"))
+    def test_dqn_no_graph_break(self, action_spec_type):
+        torch.manual_seed(self.seed)
+        actor = self._create_mock_actor(action_spec_type=action_spec_type)
+        td = self._create_mock_data_dqn(action_spec_type=action_spec_type)
+        loss_fn = DQNLoss(actor, loss_function="l2")
+
+        action = td.get("action")
+        pred_val = torch.randn(*td.shape, 4)
+        target_value = torch.randn(td.shape)
+        _assert_no_graph_break(loss_fn._loss, pred_val, action, target_value)
+
     @pytest.mark.parametrize("n", range(4))
     @pytest.mark.parametrize("delay_value", (False, True))
     @pytest.mark.parametrize("device", get_default_devices())
@@ -895,7 +921,7 @@ class TestDDPG(LossModuleTestBase):
             delay_actor=delay_actor,
             delay_value=delay_value,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -1464,7 +1490,7 @@ class TestTD3(LossModuleTestBase):
             delay_actor=delay_actor,
             delay_qvalue=delay_qvalue,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -2063,7 +2089,7 @@ class TestSAC(LossModuleTestBase):
             **kwargs,
         )
 
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -2264,6 +2290,35 @@ class TestSAC(LossModuleTestBase):
                     raise NotImplementedError(k)
                 loss_fn.zero_grad()
 
+    @pytest.mark.skipif(not _has_dynamo_explain, reason="requires torch>=2.1")
+    def test_sac_no_graph_break(self, version, num_qvalue=2):
+        torch.manual_seed(self.seed)
+        td = self._create_mock_data_sac()
+        if version == 1:
+            value = self._create_mock_value()
+        else:
+            value = None
+        loss_fn = SACLoss(
+            actor_network=self._create_mock_actor(),
+            qvalue_network=self._create_mock_qvalue(),
+            value_network=value,
+            num_qvalue_nets=num_qvalue,
+            loss_function="l2",
+        )
+
+        log_prob = torch.randn(td.shape)
+        _assert_no_graph_break(
+            loss_fn._actor_objective,
+            log_prob,
+            torch.randn(num_qvalue, *td.shape, 1),
+            loss_fn._alpha,
+        )
+        _assert_no_graph_break(
+            loss_fn._qvalue_objective,
+            torch.randn(num_qvalue, *td.shape),
+            torch.randn(td.shape),
+        )
+
     @pytest.mark.parametrize("n", list(range(4)))
     @pytest.mark.parametrize("delay_value", (True, False))
     @pytest.mark.parametrize("delay_actor", (True, False))
@@ -2684,6 +2739,43 @@ class TestDiscreteSAC(LossModuleTestBase):
         )
         return td
 
+    def test_discrete_sac_qvalue_vmap(self, num_qvalue=3):
+        # the Q-ensemble evaluated over the stacked parameters with shared inputs
+        # matches the evaluation over concatenated parameters and expanded inputs
+        torch.manual_seed(self.seed)
+        td = self._create_mock_data_sac()
+        loss_fn = DiscreteSACLoss(
+            actor_network=self._create_mock_actor(),
+            qvalue_network=self._create_mock_qvalue(),
+            num_actions=4,
+            num_qvalue_nets=num_qvalue,
+            delay_qvalue=True,
+        )
+        for p in loss_fn.target_qvalue_network_params.values(True, True):
+            p.data.add_(torch.randn_like(p))
+        tds = [
+            td.select("observation"),
+            td.get("next").select("observation"),
+            TensorDict({"observation": torch.randn(16, 3)}, [16]),
+        ]
+        params = [
+            loss_fn.qvalue_network_params.detach(),
+            loss_fn.target_qvalue_network_params,
+            loss_fn.qvalue_network_params,
+        ]
+
+        expected = ft.vmap(loss_fn.qvalue_network)(
+            torch.cat([_td.expand(num_qvalue, *_td.batch_size) for _td in tds], 0),
+            torch.cat(params, 0),
+        )
+        expected = (
+            expected.get(loss_fn.tensor_keys.value)
+            .squeeze(-1)
+            .split([num_qvalue] * 3, 0)
+        )
+        for _td, _params, _expected in zip(tds, params, expected):
+            torch.testing.assert_close(loss_fn._qvalue(_td, _params), _expected)
+
     @pytest.mark.parametrize("delay_qvalue", (True, False))
     @pytest.mark.parametrize("num_qvalue", [2])
     @pytest.mark.parametrize("device", get_default_devices())
@@ -2720,7 +2812,7 @@ class TestDiscreteSAC(LossModuleTestBase):
             loss_function="l2",
             **kwargs,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -3242,6 +3334,49 @@ class TestREDQ(LossModuleTestBase):
         )
         return td
 
+    def test_redq_qvalue_vmap(self, num_qvalue=4, sub_sample_len=2):
+        # the Q-ensemble evaluated over the stacked parameters with shared inputs
+        # matches the evaluation over concatenated parameters and expanded inputs
+        torch.manual_seed(self.seed)
+        td = self._create_mock_data_redq()
+        loss_fn = REDQLoss(
+            actor_network=self._create_mock_actor(),
+            qvalue_network=self._create_mock_qvalue(),
+            num_qvalue_nets=num_qvalue,
+            sub_sample_len=sub_sample_len,
+            delay_qvalue=True,
+        )
+        for p in loss_fn.target_qvalue_network_params.values(True, True):
+            p.data.add_(torch.randn_like(p))
+        in_keys = loss_fn.qvalue_network.in_keys
+        tds = [
+            td.select(*in_keys),
+            td.get("next").set("action", torch.rand(16, 4) * 2 - 1).select(*in_keys),
+            td.clone().set("action", torch.rand(16, 4) * 2 - 1).select(*in_keys),
+        ]
+        selected_models_idx = torch.tensor([1, 3])
+        params = [
+            loss_fn.qvalue_network_params.detach(),
+            loss_fn.target_qvalue_network_params[selected_models_idx],
+            loss_fn.qvalue_network_params,
+        ]
+        sizes = [num_qvalue, sub_sample_len, num_qvalue]
+
+        expected = ft.vmap(loss_fn.qvalue_network)(
+            torch.cat(
+                [_td.expand(size, *_td.batch_size) for _td, size in zip(tds, sizes)],
+                0,
+            ),
+            torch.cat(params, 0),
+        )
+        expected = (
+            expected.get(loss_fn.tensor_keys.state_action_value)
+            .squeeze(-1)
+            .split(sizes, 0)
+        )
+        for _td, _params, _expected in zip(tds, params, expected):
+            torch.testing.assert_close(loss_fn._qvalue(_td, _params), _expected)
+
     @pytest.mark.parametrize("delay_qvalue", (True, False))
     @pytest.mark.parametrize("num_qvalue", [1, 2, 4, 8])
     @pytest.mark.parametrize("device", get_default_devices())
@@ -3261,7 +3396,7 @@ class TestREDQ(LossModuleTestBase):
             loss_function="l2",
             delay_qvalue=delay_qvalue,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -3599,7 +3734,7 @@ class TestREDQ(LossModuleTestBase):
             loss_function="l2",
             delay_qvalue=delay_qvalue,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -3616,7 +3751,7 @@ class TestREDQ(LossModuleTestBase):
             loss_function="l2",
             delay_qvalue=delay_qvalue,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn_deprec.make_value_estimator(td_est)
             return
@@ -4013,7 +4148,7 @@ class TestCQL(LossModuleTestBase):
             **kwargs,
         )
 
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -4472,6 +4607,30 @@ class TestPPO(LossModuleTestBase):
         assert counter == 2
         actor.zero_grad()
 
+    @pytest.mark.skipif(not _has_dynamo_explain, reason="requires torch>=2.1")
+    def test_ppo_compile(self):
+        torch.manual_seed(self.seed)
+        td = self._create_seq_mock_data_ppo()
+        loss_fn = ClipPPOLoss(
+            self._create_mock_actor(),
+            self._create_mock_value(),
+            loss_critic_type="l2",
+        )
+        torch.manual_seed(self.seed)
+        loss = loss_fn(td.clone())
+
+        advantage = torch.randn(*td.shape, 1)
+        _assert_no_graph_break(
+            loss_fn._clip_objective, torch.randn(*td.shape, 1) / 10, advantage
+        )
+
+        torch._dynamo.reset()
+        assert loss_fn.compile_core() is loss_fn
+        torch.manual_seed(self.seed)
+        loss_compiled = loss_fn(td.clone())
+        for key, value in loss.items():
+            torch.testing.assert_close(loss_compiled[key], value)
+
     @pytest.mark.parametrize("loss_class", (PPOLoss, ClipPPOLoss, KLPENPPOLoss))
     @pytest.mark.parametrize("advantage", ("gae", "td", "td_lambda", None))
     @pytest.mark.parametrize("device", get_default_devices())
@@ -5458,6 +5617,10 @@ class TestReinforce(LossModuleTestBase):
             critic=value_net,
             delay_value=delay_value,
         )
+        if td_est is ValueEstimators.VTrace and advantage is None:
+            with pytest.raises(NotImplementedError):
+                loss_fn.make_value_estimator(td_est)
+            return
 
         td = TensorDict(
             {
@@ -6112,7 +6275,7 @@ class TestDreamer(LossModuleTestBase):
             imagination_horizon=imagination_horizon,
             discount_loss=discount_loss,
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_module.make_value_estimator(td_est)
             return
@@ -6471,7 +6634,7 @@ class TestIQL(LossModuleTestBase):
             expectile=expectile,
             loss_function="l2",
         )
-        if td_est is ValueEstimators.GAE:
+        if td_est in (ValueEstimators.GAE, ValueEstimators.VTrace):
             with pytest.raises(NotImplementedError):
                 loss_fn.make_value_estimator(td_est)
             return
@@ -7116,6 +7279,74 @@ def test_updater(mode, value_network_update_interval, device, dtype):
     assert d2 < 1e-6
 
 
+class TestVmapLossEnsemble:
+    def _create_losses(self, gammas):
+        action_spec = OneHotDiscreteTensorSpec(4)
+        losses = []
+        for gamma in gammas:
+            actor = QValueActor(
+                module=nn.Linear(3, 4), spec=action_spec, action_space="one_hot"
+            )
+            loss_fn = DQNLoss(actor, loss_function="l2")
+            loss_fn.make_value_estimator(ValueEstimators.TD0, gamma=gamma)
+            losses.append(loss_fn)
+        return losses
+
+    def _create_data(self, num_members, batch=10):
+        action_spec = OneHotDiscreteTensorSpec(4)
+        return TensorDict(
+            {
+                "observation": torch.randn(num_members, batch, 3),
+                "action": action_spec.rand((num_members, batch)),
+                "next": {
+                    "observation": torch.randn(num_members, batch, 3),
+                    "reward": torch.randn(num_members, batch, 1),
+                    "done": torch.zeros(num_members, batch, 1, dtype=torch.bool),
+                },
+            },
+            [num_members, batch],
+        )
+
+    def test_ensemble(self):
+        torch.manual_seed(0)
+        gammas = (0.5, 0.9, 0.99)
+        losses = self._create_losses(gammas)
+        ensemble = VmapLossEnsemble(losses)
+        assert ensemble.num_members == 3
+        td = self._create_data(3)
+        loss_vals = ensemble(td.clone())
+        assert loss_vals.batch_size == torch.Size([3])
+        loss_vals["loss"].sum().backward()
+
+        # each member computes its loss on its own batch with its own gamma
+        for i, loss_fn in enumerate(losses):
+            assert loss_fn.value_estimator.gamma == gammas[i]
+            for p in loss_fn.parameters():
+                p.grad = None
+            loss_member = loss_fn(td[i].clone())
+            torch.testing.assert_close(loss_member["loss"], loss_vals["loss"][i])
+            loss_member["loss"].backward()
+            for name, p in loss_fn.named_parameters():
+                grad = getattr(ensemble, name.replace(".", LossModule.SEP)).grad
+                torch.testing.assert_close(p.grad, grad[i])
+
+        # the members share their parameters with the ensemble
+        optim = torch.optim.SGD(ensemble.parameters(), lr=1.0)
+        optim.step()
+        for i, loss_fn in enumerate(losses):
+            for name, p in loss_fn.named_parameters():
+                stacked = getattr(ensemble, name.replace(".", LossModule.SEP))
+                assert (p == stacked[i]).all()
+
+    def test_ensemble_errors(self):
+        losses = self._create_losses((0.9, 0.99))
+        ensemble = VmapLossEnsemble(losses)
+        with pytest.raises(ValueError, match="leading dimension of size 2"):
+            ensemble(self._create_data(3))
+        with pytest.raises(ValueError, match="At least one loss module"):
+            VmapLossEnsemble([])
+
+
 class TestValues:
     @pytest.mark.parametrize("device", get_default_devices())
     @pytest.mark.parametrize("gamma", [0.1, 0.5, 0.99])
@@ -8183,6 +8414,128 @@ class TestValues:
         torch.testing.assert_close(v1, v2, rtol=1e-4, atol=1e-4)
         torch.testing.assert_close(v2, torch.cat([v2a, v2b], -2), rtol=1e-4, atol=1e-4)
 
+    @pytest.mark.parametrize("device", get_default_devices())
+    @pytest.mark.parametrize("gamma", [0.99, 0.5])
+    @pytest.mark.parametrize("N", [(3,), (7, 3)])
+    @pytest.mark.parametrize("T", [3, 50])
+    @pytest.mark.parametrize("F", [1, 4])
+    @pytest.mark.parametrize("has_done", [True, False])
+    @pytest.mark.parametrize("has_truncated", [True, False])
+    def test_vtrace(self, device, gamma, N, T, F, has_done, has_truncated):
+        """Tests vtrace_advantage_estimate against vec_vtrace_advantage_estimate
+        and against a step-by-step reference with done and truncated states
+
+        """
+        torch.manual_seed(0)
+        rho_thresh, c_thresh = 1.5, 0.8
+
+        done = torch.zeros(*N, T, F, device=device, dtype=torch.bool)
+        truncated = torch.zeros(*N, T, F, device=device, dtype=torch.bool)
+        if has_done:
+            done = done.bernoulli_(0.1)
+        if has_truncated:
+            truncated = truncated.bernoulli_(0.1) & ~done
+        reward = torch.randn(*N, T, F, device=device)
+        state_value = torch.randn(*N, T, F, device=device)
+        next_state_value = torch.randn(*N, T, F, device=device)
+        log_pi = torch.randn(*N, T, F, device=device)
+        log_mu = torch.randn(*N, T, F, device=device)
+
+        r1 = vtrace_advantage_estimate(
+            gamma,
+            log_pi,
+            log_mu,
+            state_value,
+            next_state_value,
+            reward,
+            done,
+            truncated,
+            rho_thresh=rho_thresh,
+            c_thresh=c_thresh,
+        )
+        r2 = vec_vtrace_advantage_estimate(
+            gamma,
+            log_pi,
+            log_mu,
+            state_value,
+            next_state_value,
+            reward,
+            done,
+            truncated,
+            rho_thresh=rho_thresh,
+            c_thresh=c_thresh,
+        )
+        torch.testing.assert_close(r1, r2, rtol=1e-4, atol=1e-4)
+
+        rho = (log_pi - log_mu).exp().clamp_max(rho_thresh)
+        c = (log_pi - log_mu).exp().clamp_max(c_thresh)
+        not_done = (~done).float()
+        value_target = torch.zeros_like(state_value)
+        advantage = torch.zeros_like(state_value)
+        for t in reversed(range(T)):
+            # the trace is cut at the end of each trajectory and of the batch
+            if t < T - 1:
+                cont = (~done[..., t, :] & ~truncated[..., t, :]).float()
+                correction = value_target[..., t + 1, :] - state_value[..., t + 1, :]
+                next_target = torch.where(
+                    cont.bool(),
+                    value_target[..., t + 1, :],
+                    next_state_value[..., t, :],
+                )
+            else:
+                cont = correction = 0.0
+                next_target = next_state_value[..., t, :]
+            delta = rho[..., t, :] * (
+                reward[..., t, :]
+                + gamma * not_done[..., t, :] * next_state_value[..., t, :]
+                - state_value[..., t, :]
+            )
+            value_target[..., t, :] = (
+                state_value[..., t, :]
+                + delta
+                + gamma * c[..., t, :] * cont * correction
+            )
+            advantage[..., t, :] = rho[..., t, :] * (
+                reward[..., t, :]
+                + gamma * not_done[..., t, :] * next_target
+                - state_value[..., t, :]
+            )
+        torch.testing.assert_close(r1[0], advantage, rtol=1e-4, atol=1e-4)
+        torch.testing.assert_close(r1[1], value_target, rtol=1e-4, atol=1e-4)
+
+    @pytest.mark.parametrize("device", get_default_devices())
+    @pytest.mark.parametrize("N", [(3,), (7, 3)])
+    @pytest.mark.parametrize("T", [3, 50])
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_vtrace_on_policy(self, device, N, T, vectorized):
+        """Without off-policy correction, the v-trace target is the TD(1) target."""
+        torch.manual_seed(0)
+        gamma = 0.95
+
+        done = torch.zeros(*N, T, 1, device=device, dtype=torch.bool).bernoulli_(0.1)
+        reward = torch.randn(*N, T, 1, device=device)
+        state_value = torch.randn(*N, T, 1, device=device)
+        next_state_value = torch.randn(*N, T, 1, device=device)
+        log_prob = torch.randn(*N, T, 1, device=device)
+
+        if vectorized:
+            fun = vec_vtrace_advantage_estimate
+        else:
+            fun = vtrace_advantage_estimate
+        _, value_target = fun(
+            gamma,
+            log_prob,
+            log_prob,
+            state_value,
+            next_state_value,
+            reward,
+            done,
+        )
+        _, gae_value_target = generalized_advantage_estimate(
+            gamma, 1.0, state_value, next_state_value, reward, done
+        )
+        torch.testing.assert_close(value_target, gae_value_target, rtol=1e-4, atol=1e-4)
+
 
 @pytest.mark.skipif(
     not _has_functorch,
@@ -8301,6 +8654,60 @@ def test_shared_params(dest, expected_dtype, expected_device):
 
 
 class TestAdv:
+    @pytest.mark.parametrize("has_actor", [True, False])
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_vtrace_module(self, has_actor, vectorized):
+        torch.manual_seed(0)
+        value_net = TensorDictModule(
+            nn.Linear(3, 1), in_keys=["obs"], out_keys=["state_value"]
+        )
+        if has_actor:
+            actor_net = ProbabilisticActor(
+                TensorDictModule(
+                    NormalParamWrapper(nn.Linear(3, 4)),
+                    in_keys=["obs"],
+                    out_keys=["loc", "scale"],
+                ),
+                in_keys=["loc", "scale"],
+                distribution_class=TanhNormal,
+            )
+        else:
+            actor_net = None
+        module = VTrace(
+            gamma=0.98,
+            value_network=value_net,
+            actor_network=actor_net,
+            vectorized=vectorized,
+        )
+        done = torch.zeros(2, 10, 1, dtype=torch.bool)
+        done[:, 4] = True
+        truncated = torch.zeros(2, 10, 1, dtype=torch.bool)
+        truncated[:, 7] = True
+        td = TensorDict(
+            {
+                "obs": torch.randn(2, 10, 3),
+                "action": torch.rand(2, 10, 2) * 1.8 - 0.9,
+                "sample_log_prob": torch.randn(2, 10),
+                "log_prob": torch.randn(2, 10),
+                "next": {
+                    "obs": torch.randn(2, 10, 3),
+                    "reward": torch.randn(2, 10, 1),
+                    "done": done,
+                    "truncated": truncated,
+                },
+            },
+            [2, 10],
+            names=[None, "time"],
+        )
+        td = module(td.clone(False))
+        assert td["advantage"].shape == torch.Size([2, 10, 1])
+        assert td["value_target"].shape == torch.Size([2, 10, 1])
+        # the value targets of a trajectory do not depend on the next ones
+        td_split = module(td[:, :5].clone())
+        torch.testing.assert_close(td_split["value_target"], td["value_target"][:, :5])
+        td_split = module(td[:, 5:8].clone())
+        torch.testing.assert_close(td_split["value_target"], td["value_target"][:, 5:8])
+
     @pytest.mark.parametrize(
         "adv,kwargs",
         [
@@ -8409,6 +8816,54 @@ class TestAdv:
         td = module(td.clone(False))
         assert td["advantage"].is_leaf
 
+    @pytest.mark.parametrize(
+        "adv,kwargs",
+        [
+            [GAE, {"lmbda": 0.95}],
+            [TD1Estimator, {}],
+            [TDLambdaEstimator, {"lmbda": 0.95}],
+        ],
+    )
+    @pytest.mark.parametrize("shifted", [True, False])
+    @pytest.mark.parametrize("max_batch", [1, 7, 100])
+    def test_max_batch(self, adv, shifted, max_batch, kwargs):
+        torch.manual_seed(0)
+        value_net = TensorDictModule(
+            nn.Linear(3, 1), in_keys=["obs"], out_keys=["state_value"]
+        )
+        module = adv(
+            gamma=0.98,
+            value_network=value_net,
+            shifted=shifted,
+            **kwargs,
+        )
+        module_chunked = adv(
+            gamma=0.98,
+            value_network=value_net,
+            shifted=shifted,
+            max_batch=max_batch,
+            **kwargs,
+        )
+        td = TensorDict(
+            {
+                "obs": torch.randn(2, 10, 3),
+                "next": {
+                    "obs": torch.randn(2, 10, 3),
+                    "reward": torch.randn(2, 10, 1),
+                    "done": torch.zeros(2, 10, 1, dtype=torch.bool),
+                },
+            },
+            [2, 10],
+            names=[None, "time"],
+        )
+        td_ref = module(td.clone(False))
+        td_chunked = module_chunked(td.clone(False))
+        torch.testing.assert_close(td_chunked["advantage"], td_ref["advantage"])
+        torch.testing.assert_close(td_chunked["value_target"], td_ref["value_target"])
+        torch.testing.assert_close(
+            td_chunked["next", "state_value"], td_ref["next", "state_value"]
+        )
+
     @pytest.mark.parametrize(
         "adv,kwargs",
         [
@@ -8754,6 +9209,36 @@ def test_updater_warning(updater, kwarg):
         dqn.target_value_network_params
 
 
+@pytest.mark.parametrize(
+    "updater,kwarg",
+    [
+        (HardUpdate, {"value_network_update_interval": 0}),
+        (SoftUpdate, {"eps": 0.75}),
+    ],
+)
+def test_updater_cast(updater, kwarg):
+    torch.manual_seed(0)
+    with warnings.catch_warnings():
+        dqn = DQNLoss(torch.nn.Linear(3, 4), delay_value=True, action_space="one_hot")
+    upd = updater(dqn, **kwarg)
+    # casting the loss module replaces the target buffers
+    dqn.to(torch.float64)
+    for p in dqn.parameters():
+        p.data.normal_()
+    source = dqn.value_network_params.detach().clone()
+    target = dqn.target_value_network_params.clone()
+    upd.step()
+    if updater is HardUpdate:
+        expected = source
+    else:
+        expected = source.apply(lambda s, t: 0.25 * s + 0.75 * t, target)
+    assert_allclose_td(dqn.target_value_network_params, expected)
+    assert all(
+        v.dtype is torch.float64
+        for v in dqn.target_value_network_params.values(True, True)
+    )
+
+
 class TestSingleCall:
     def _mock_value_net(self, has_target, value_key):
         model = nn.Linear(3, 1)
@@ -8806,6 +9291,38 @@ class TestSingleCall:
         )
         assert (value != value_).all()
 
+    @pytest.mark.parametrize("has_target", [True, False])
+    @pytest.mark.parametrize("single_call", [True, False])
+    @pytest.mark.parametrize("max_batch", [1, 3, 20])
+    def test_max_batch(self, has_target, single_call, max_batch, detach_next=True):
+        torch.manual_seed(0)
+        value_key = "value"
+        value_net, params, next_params = self._mock_value_net(has_target, value_key)
+        if single_call:
+            next_params = params
+        data = self._mock_data()
+        value, value_ = _call_value_nets(
+            value_net,
+            data.clone(),
+            params,
+            next_params,
+            single_call,
+            value_key,
+            detach_next,
+        )
+        value_chunked, value_chunked_ = _call_value_nets(
+            value_net,
+            data.clone(),
+            params,
+            next_params,
+            single_call,
+            value_key,
+            detach_next,
+            max_batch=max_batch,
+        )
+        torch.testing.assert_close(value_chunked, value)
+        torch.testing.assert_close(value_chunked_, value_)
+
 
 if __name__ == "__main__":
     args, unknown = argparse.ArgumentParser().parse_known_args()
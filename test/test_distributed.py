@@ -26,6 +26,7 @@ except ModuleNotFoundError as err:
 import torch
 
 from mocking_classes import ContinuousActionVecMockEnv, CountingEnv
+from tensordict import TensorDict
 from torch import multiprocessing as mp, nn
 
 from torchrl.collectors.collectors import (
@@ -41,6 +42,8 @@ from torchrl.collectors.distributed import (
     RPCDataCollector,
 )
 from torchrl.collectors.distributed.ray import DEFAULT_RAY_INIT_CONFIG
+from torchrl.collectors.distributed.weight_transfer import _WeightTransfer
+from torchrl.data import LazyMemmapStorage, ReplayBuffer, TensorDictReplayBuffer
 
 TIMEOUT = 200
 
@@ -318,6 +321,56 @@ class DistributedCollectorBase:
                 proc.terminate()
             queue.close()
 
+    @classmethod
+    def _test_distributed_collector_replay_buffer(cls, queue, sync, rb_class, tmpdir):
+        frames_per_batch = 20
+        total_frames = 200
+        env = CountingEnv()
+        policy = CountingPolicy()
+        replay_buffer = rb_class(
+            storage=LazyMemmapStorage(1000, scratch_dir=tmpdir), batch_size=10
+        )
+        collector = cls.distributed_class()(
+            [env] * 2,
+            policy,
+            collector_class=SyncDataCollector,
+            total_frames=total_frames,
+            frames_per_batch=frames_per_batch,
+            sync=sync,
+            replay_buffer=replay_buffer,
+            **cls.distributed_kwargs(),
+        )
+        total = 0
+        for data in collector:
+            # only the metadata reaches the trainer
+            assert "action" not in data.keys()
+            assert ("collector", "traj_ids") in data.keys(True)
+            total += data.numel()
+            sample = replay_buffer.sample()
+            assert (sample["action"] == 1).all()
+        collector.shutdown()
+        assert total == total_frames
+        assert len(replay_buffer) == total_frames
+        queue.put("passed")
+
+    @pytest.mark.parametrize("sync", [False, True])
+    @pytest.mark.parametrize("rb_class", [ReplayBuffer, TensorDictReplayBuffer])
+    def test_distributed_collector_replay_buffer(self, sync, rb_class, tmpdir):
+        queue = mp.Queue(1)
+        proc = mp.Process(
+            target=self._test_distributed_collector_replay_buffer,
+            args=(queue, sync, rb_class, str(tmpdir)),
+        )
+        proc.start()
+        try:
+            out = queue.get(timeout=TIMEOUT)
+            assert out == "passed"
+        finally:
+            proc.join(10)
+            if proc.is_alive():
+                proc.terminate()
+            queue.close()
+
 
 class TestDistributedCollector(DistributedCollectorBase):
     @classmethod
@@ -332,6 +385,88 @@ class TestDistributedCollector(DistributedCollectorBase):
     def _start_worker(cls):
         pass
 
+    @classmethod
+    def _test_distributed_collector_broadcast(
+        cls, queue, broadcast_method, weight_compression
+    ):
+        frames_per_batch = 30
+        total_frames = 300
+        env = CountingEnv()
+        policy = CountingPolicy()
+        collector = cls.distributed_class()(
+            [env] * 3,
+            policy,
+            collector_class=SyncDataCollector,
+            total_frames=total_frames,
+            frames_per_batch=frames_per_batch,
+            sync=True,
+            broadcast_method=broadcast_method,
+            weight_compression=weight_compression,
+            **cls.distributed_kwargs(),
+        )
+        actions = []
+        for i, data in enumerate(collector):
+            actions.append(data["action"].unique())
+            if i == 0:
+                policy.weight.data += 1
+                collector.update_policy_weights_()
+            elif i == 3:
+                # a single node is updated, the others stay behind
+                policy.weight.data += 1
+                collector.update_policy_weights_(worker_rank=1)
+            elif i == 6:
+                policy.weight.data += 1
+                collector.update_policy_weights_()
+                assert collector.policy_version == 3
+            elif i == 8:
+                # updating the nodes one at a time counts as a single round
+                for rank in range(1, 4):
+                    collector.update_policy_weights_(worker_rank=rank)
+                assert collector.policy_version == 4
+        collector.shutdown()
+        assert (actions[0] == 1).all()
+        # with a batch of frames per node, the first batches after an update
+        # may be the ones that were collected before it
+        assert (actions[-1] == 4).all(), actions
+        queue.put("passed")
+
+    @pytest.mark.parametrize("broadcast_method", ["p2p", "collective", "tree"])
+    @pytest.mark.parametrize("weight_compression", [None, "fp16", "topk"])
+    def test_distributed_collector_broadcast(
+        self, broadcast_method, weight_compression
+    ):
+        queue = mp.Queue(1)
+        proc = mp.Process(
+            target=self._test_distributed_collector_broadcast,
+            args=(queue, broadcast_method, weight_compression),
+        )
+        proc.start()
+        try:
+            out = queue.get(timeout=TIMEOUT)
+            assert out == "passed"
+        finally:
+            proc.join(10)
+            if proc.is_alive():
+                proc.terminate()
+            queue.close()
+
+    def test_topk_non_floating_weights(self):
+        weights = TensorDict(
+            {"weight": torch.zeros(10), "count": torch.zeros((), dtype=torch.int64)},
+            [],
+        )
+        transfer = _WeightTransfer(compression="topk", topk_ratio=0.1)
+        transfer.init_reference(weights)
+        weights["weight"] += torch.arange(10)
+        weights["count"] += 3
+        transfer.version += 1
+        payload = transfer.delta_payload(weights)
+        # the integer buffer is sent as is, the float one is compressed
+        assert payload["delta", "count", "value"] == 3
+        assert payload["delta", "weight", "indices"] == 9
+        empty = transfer._empty_payload(weights, delta=True)
+        assert set(empty.keys(True, True)) == set(payload.keys(True, True))
+
 
 class TestRPCCollector(DistributedCollectorBase):
     @classmethod
@@ -363,6 +498,9 @@ class TestSyncCollector(DistributedCollectorBase):
     def test_distributed_collector_sync(self, *args):
         raise pytest.skip("skipping as only sync is supported")
 
+    def test_distributed_collector_replay_buffer(self, *args):
+        raise pytest.skip("direct writes in a replay buffer are not supported")
+
     @classmethod
     def _test_distributed_collector_updatepolicy(
         cls, queue, collector_class, update_interval
@@ -427,6 +565,54 @@ class TestSyncCollector(DistributedCollectorBase):
                 proc.terminate()
             queue.close()
 
+    @classmethod
+    def _test_distributed_collector_quorum(cls, queue, straggler_policy):
+        frames_per_batch = 50
+        total_frames = 1000
+        env = CountingEnv()
+        policy = CountingPolicy()
+        collector = cls.distributed_class()(
+            [env] * 2,
+            policy,
+            total_frames=total_frames,
+            frames_per_batch=frames_per_batch,
+            quorum=0.5,
+            straggler_policy=straggler_policy,
+            **cls.distributed_kwargs(),
+        )
+        total = 0
+        for data in collector:
+            # each node contributes a chunk of 25 frames
+            assert data.shape[0] in (1, 2)
+            assert data.shape[-1] == 25
+            total += data.numel()
+        collector.shutdown()
+        if straggler_policy == "rollover":
+            assert collector.dropped_frames == 0
+        assert total + collector.dropped_frames == total_frames
+        histograms = collector.node_latency_histograms(bins=5)
+        assert set(histograms) == {1, 2}
+        for counts, _ in histograms.values():
+            assert counts.sum() > 0
+        queue.put("passed")
+
+    @pytest.mark.parametrize("straggler_policy", ["rollover", "drop"])
+    def test_distributed_collector_quorum(self, straggler_policy):
+        queue = mp.Queue(1)
+        proc = mp.Process(
+            target=self._test_distributed_collector_quorum,
+            args=(queue, straggler_policy),
+        )
+        proc.start()
+        try:
+            out = queue.get(timeout=TIMEOUT)
+            assert out == "passed"
+        finally:
+            proc.join(10)
+            if proc.is_alive():
+                proc.terminate()
+            queue.close()
+
 
 @pytest.mark.skipif(not _has_ray, reason=f"Ray not found (error: {RAY_ERR})")
 class TestRayCollector(DistributedCollectorBase):
@@ -458,6 +644,9 @@ class TestRayCollector(DistributedCollectorBase):
     def _start_worker(cls):
         pass
 
+    def test_distributed_collector_replay_buffer(self, *args):
+        raise pytest.skip("direct writes in a replay buffer are not supported")
+
     @pytest.mark.parametrize("sync", [False, True])
     def test_distributed_collector_sync(self, sync, frames_per_batch=200):
         frames_per_batch = 50
@@ -37,14 +37,17 @@ from mocking_classes import (
     MockBatchedUnLockedEnv,
     MockSerialEnv,
     NestedCountingEnv,
+    NumpyGymLikeEnv,
 )
 from packaging import version
 from tensordict.nn import TensorDictModuleBase
 from tensordict.tensordict import assert_allclose_td, TensorDict
 from torch import nn
+from torchrl._utils import telemetry
 
 from torchrl.collectors import MultiSyncDataCollector, SyncDataCollector
 from torchrl.data.tensor_specs import (
+    BoundedTensorSpec,
     CompositeSpec,
     OneHotDiscreteTensorSpec,
     UnboundedContinuousTensorSpec,
@@ -636,6 +639,31 @@ class TestParallel:
         assert not env.is_closed
         env.close()
 
+    def test_parallel_env_telemetry(self):
+        telemetry.reset()
+        telemetry.enable()
+        # the workers inherit the toggle when they start
+        env = ParallelEnv(2, lambda: DiscreteActionVecMockEnv())
+        try:
+            env.rollout(10)
+            env.gather_telemetry()
+            summary = telemetry.summary()
+            assert summary["parallel_env/step"]["count"] == 10
+            assert summary["parallel_env/ipc_wait"]["count"] == 11
+            # one record per worker
+            assert summary["parallel_env/worker_step"]["count"] == 20
+            assert summary["parallel_env/worker_reset"]["count"] == 2
+            td = telemetry.to_tensordict()
+            assert td["parallel_env", "worker_step", "count"] == 20
+            assert (
+                td["parallel_env", "worker_step", "p50"]
+                <= td["parallel_env", "worker_step", "max"]
+            )
+        finally:
+            telemetry.disable()
+            telemetry.reset()
+            env.close()
+
     @pytest.mark.parametrize("parallel", [True, False])
     def test_parallel_env_custom_method(self, parallel):
         # define env
@@ -1436,6 +1464,78 @@ def test_batch_unlocked_with_batch_size(device):
         env.step(td_expanded)
 
 
+class TestRunTypeChecks:
+    def test_type_checks(self):
+        env = CountingEnv(max_steps=100, run_type_checks=True)
+        env.rollout(3)
+        env.observation_spec = CompositeSpec(
+            observation=UnboundedContinuousTensorSpec((1,), dtype=torch.float32)
+        )
+        with pytest.raises(TypeError, match="expected observation.dtype"):
+            env.rollout(3)
+
+    def test_shape_checks(self):
+        env = CountingEnv(max_steps=100, run_type_checks=True)
+        env.observation_spec = CompositeSpec(
+            observation=UnboundedContinuousTensorSpec((2,), dtype=torch.int32)
+        )
+        with pytest.raises(RuntimeError, match="expected observation.shape"):
+            env.rollout(3)
+
+    def test_bound_checks(self):
+        env = CountingEnv(max_steps=100, run_type_checks=True)
+        env.observation_spec = CompositeSpec(
+            observation=BoundedTensorSpec(0, 2, (1,), dtype=torch.int32)
+        )
+        td = env.reset()
+        for _ in range(2):
+            td["action"] = torch.ones(1, dtype=torch.bool)
+            td = step_mdp(env.step(td))
+        td["action"] = torch.ones(1, dtype=torch.bool)
+        with pytest.raises(ValueError, match="out of bounds"):
+            env.step(td)
+
+    @pytest.mark.parametrize("cache_specs", [True, False])
+    def test_sampled_checks(self, cache_specs):
+        env = TransformedEnv(
+            CountingEnv(max_steps=100, run_type_checks=3),
+            StepCounter(),
+            cache_specs=cache_specs,
+        )
+        spec_checks = env._get_spec_checks()
+        assert "step_count" in [check[0] for check in spec_checks.checks]
+        # the checks are cached only if the specs are
+        assert (env._get_spec_checks() is spec_checks) is cache_specs
+        calls = []
+        get_spec_checks = env._get_spec_checks
+
+        def count_calls():
+            calls.append(None)
+            return get_spec_checks()
+
+        env.__dict__["_get_spec_checks"] = count_calls
+        env.rollout(10, break_when_any_done=False)
+        assert len(calls) == 4
+        del env.__dict__["_get_spec_checks"]
+        # modifying the transforms erases the checks with the specs
+        env.append_transform(StepCounter(step_count_key="other_count"))
+        spec_checks = env._get_spec_checks()
+        assert "other_count" in [check[0] for check in spec_checks.checks]
+
+    def test_checks_base_env_spec_update(self):
+        env = TransformedEnv(
+            CountingEnv(max_steps=100, run_type_checks=True),
+            StepCounter(),
+            cache_specs=False,
+        )
+        env.rollout(3)
+        env.base_env.observation_spec = CompositeSpec(
+            observation=UnboundedContinuousTensorSpec((1,), dtype=torch.float32)
+        )
+        with pytest.raises(TypeError, match="expected observation.dtype"):
+            env.rollout(3)
+
+
 @pytest.mark.skipif(not _has_gym, reason="no gym")
 @pytest.mark.skipif(
     gym_version is None or gym_version < version.parse("0.20.0"),
@@ -1474,6 +1574,68 @@ def test_info_dict_reader(device, seed=0):
     )
 
 
+def test_gym_like_read():
+    env = NumpyGymLikeEnv(max_steps=3)
+    tensordict = env.reset()
+    assert (tensordict["observation"] == 0).all()
+    assert not tensordict["done"].any()
+
+    np_obs = {}
+    step = env._env.step
+
+    def _step(action):
+        out = step(action)
+        np_obs.update(out[0])
+        return out
+
+    env._env.step = _step
+    tensordict = env.rand_step(tensordict)
+    next_tensordict = tensordict["next"]
+    # arrays matching the spec are read without copy
+    assert np.shares_memory(next_tensordict["pixels"].numpy(), np_obs["pixels"])
+    assert (next_tensordict["observation"] == 1).all()
+    assert next_tensordict["reward"].shape == torch.Size([1])
+    assert next_tensordict["done"].dtype == torch.bool
+    assert "count" not in next_tensordict.keys()
+
+    # modifying the observation spec in place is picked up
+    env.set_info_dict_reader(default_info_dict_reader(["count"]))
+    tensordict = env.reset()
+    assert tensordict["count"] == 0
+    rollout = env.rollout(10)
+    assert rollout.shape == torch.Size([3])
+    assert (rollout["next", "count"] == torch.arange(1, 4)).all()
+    assert rollout["next", "done"][-1].all()
+    assert (rollout["next", "observation"][:, 0] == torch.arange(1, 4)).all()
+
+
+@pytest.mark.parametrize("batched_class", [SerialEnv, ParallelEnv])
+@pytest.mark.parametrize("max_pool", [True, False])
+def test_batched_env_frame_skip(batched_class, max_pool):
+    env = batched_class(
+        2,
+        partial(NumpyGymLikeEnv, max_steps=5),
+        frame_skip=2,
+        max_pool_keys=["pixels"] if max_pool else None,
+    )
+    try:
+        rollout = env.rollout(10, break_when_any_done=True)
+        # 5 frames with a frame-skip of 2 lead to 3 steps, the last one being
+        # interrupted by the done state
+        assert rollout.shape == torch.Size([2, 3])
+        assert (rollout["next", "observation"][..., 0] == torch.tensor([2, 4, 5])).all()
+        assert (rollout["next", "reward"].squeeze(-1) == torch.tensor([2, 2, 1])).all()
+        assert rollout["next", "done"][:, -1].all()
+        assert not rollout["next", "done"][:, :-1].any()
+        # pixels alternate between 0 and 255, the last frame before the done
+        # state is not pooled
+        pixels = rollout["next", "pixels"].flatten(-3, -1)[..., 0]
+        expected = torch.tensor([255, 255, 255] if max_pool else [0, 0, 255])
+        assert (pixels == expected).all()
+    finally:
+        env.close()
+
+
 def test_make_spec_from_td():
     data = TensorDict(
         {
@@ -234,6 +234,41 @@ def test_unusual_done(unsq_reward):
         _ = ms(td)
 
 
+@pytest.mark.parametrize("n_steps", [0, 1, 3, 20])
+@pytest.mark.parametrize("done_prob", [0.05, 0.5])
+def test_multistep_reference(n_steps, done_prob, b=4, T=17, gamma=0.9):
+    torch.manual_seed(0)
+    done = torch.zeros(b, T, 1, dtype=torch.bool).bernoulli_(done_prob)
+    reward = torch.randn(b, T, 1)
+    td = TensorDict(
+        {
+            "obs": torch.arange(T).expand(b, T),
+            "next": {
+                "obs": torch.arange(T).expand(b, T) + 1,
+                "reward": reward,
+                "done": done,
+            },
+        },
+        [b, T],
+    )
+    out = MultiStep(gamma=gamma, n_steps=n_steps)(td)
+    # step by step reference
+    for i in range(b):
+        for t in range(T):
+            k = 0
+            summed = reward[i, t, 0].clone()
+            while k < n_steps and t + k + 1 < T and not done[i, t + k, 0]:
+                k += 1
+                summed += gamma**k * reward[i, t + k, 0]
+            assert out["steps_to_next_obs"][i, t] == k + 1
+            torch.testing.assert_close(
+                out["gamma"][i, t].item(), gamma ** (k + 1), rtol=1e-6, atol=0
+            )
+            assert out["nonterminal"][i, t] == (k != 0)
+            assert out["next", "obs"][i, t] == t + k + 1
+            torch.testing.assert_close(out["next", "reward"][i, t, 0], summed)
+
+
 class TestSplits:
     """Tests the splitting of collected tensordicts in trajectories."""
 
@@ -733,6 +733,127 @@ def test_keys_to_empty_composite_spec():
     assert set(composite.keys(True, True)) == set(keys)
 
 
+class TestCompositeLeafIndex:
+    """Tests the grouped rand / zero / is_in / project paths of CompositeSpec."""
+
+    @staticmethod
+    def _make_spec(device):
+        return CompositeSpec(
+            a=BoundedTensorSpec(-1, 1, (2, 3), device=device),
+            b=BoundedTensorSpec(
+                torch.zeros(2, 4), torch.arange(1, 9).view(2, 4), (2, 4), device=device
+            ),
+            c=BoundedTensorSpec(0, 10, (2,), dtype=torch.int64, device=device),
+            d=UnboundedContinuousTensorSpec((2, 1), device=device),
+            e=OneHotDiscreteTensorSpec(3, (2, 3), device=device),
+            nested=CompositeSpec(
+                f=BoundedTensorSpec(2, 3, (2, 5), device=device),
+                g=BoundedTensorSpec(2, 3, (2,), dtype=torch.float64, device=device),
+                shape=(2,),
+            ),
+            empty=None,
+            shape=(2,),
+        )
+
+    @pytest.mark.parametrize("device", get_default_devices())
+    @pytest.mark.parametrize("shape", [(), (5,), (3, 4)])
+    def test_rand_zero(self, device, shape):
+        spec = self._make_spec(device)
+        for td in (spec.rand(shape), spec.zero(shape)):
+            assert td.batch_size == torch.Size([*shape, 2])
+            assert td.device == spec.device
+            assert "empty" not in td.keys()
+            assert td["nested"].batch_size == torch.Size([*shape, 2])
+            for key, leaf in spec.items(True, True):
+                if leaf is None:
+                    continue
+                assert td[key].shape == torch.Size([*shape, *leaf.shape])
+                assert td[key].dtype == leaf.dtype
+        td = spec.rand(shape)
+        for key, leaf in spec.items(True, True):
+            if leaf is not None:
+                assert leaf.is_in(td[key])
+        assert spec.is_in(td)
+        assert (spec.zero(shape) == 0).all()
+
+    @pytest.mark.parametrize("shape", [(), (5,)])
+    def test_rand_scalar_leaves(self, shape):
+        spec = CompositeSpec(
+            a=BoundedTensorSpec(0, 1, ()),
+            b=BoundedTensorSpec(0, 1, ()),
+            c=UnboundedContinuousTensorSpec(()),
+        )
+        td = spec.rand(shape)
+        assert td["a"].shape == td["c"].shape == torch.Size(shape)
+        assert spec.is_in(td)
+
+    def test_is_in_project(self):
+        spec = self._make_spec("cpu")
+        td = spec.rand((5,))
+        assert spec.is_in(td)
+        for key, value in [
+            ("a", 2.0),
+            ("b", -1.0),
+            ("c", 11),
+            (("nested", "g"), 4.0),
+        ]:
+            _td = td.clone()
+            _td[key][0, 0] = value
+            assert not spec.is_in(_td)
+            _td = spec.project(_td)
+            assert spec.is_in(_td)
+            assert (_td[key][1:] == td[key][1:]).all()
+        # values that cannot be concatenated fall back on the leaf checks
+        _td = td.clone()
+        _td["a"] = _td["a"].to(torch.float64)
+        assert spec.is_in(_td)
+        _td["a"][0, 0] = 2.0
+        assert not spec.is_in(_td)
+
+    def test_invalidation(self):
+        spec = self._make_spec("cpu")
+        spec.rand()
+        leaf_index = spec._leaf_index
+        spec.rand()
+        assert spec._leaf_index is leaf_index
+        spec["nested", "h"] = BoundedTensorSpec(0, 1, (2, 2))
+        assert spec.rand()["nested", "h"].shape == torch.Size([2, 2])
+        assert spec._leaf_index is not leaf_index
+        del spec["nested", "h"]
+        assert ("nested", "h") not in spec.zero().keys(True)
+        spec["a"] = BoundedTensorSpec(5, 6, (2, 3))
+        assert (spec.rand()["a"] >= 5).all()
+
+    def test_leaf_inplace_invalidation(self):
+        spec = self._make_spec("cpu")
+        td = spec.rand()
+        assert spec.is_in(td)
+        leaf = spec["a"]
+        # bounds reassigned in-place
+        leaf.space.minimum = torch.full((2, 3), 5.0)
+        leaf.space.maximum = torch.full((2, 3), 6.0)
+        assert not spec.is_in(td)
+        assert (spec.rand()["a"] >= 5).all()
+        # bounds modified in-place
+        leaf.space._maximum.fill_(5.5)
+        assert (spec.rand()["a"] <= 5.5).all()
+        # dtype modified in-place
+        leaf.dtype = torch.float64
+        td = spec.rand()
+        assert td["a"].dtype is torch.float64
+        assert spec.is_in(td)
+        # shape modified in-place
+        nested = spec["nested", "f"]
+        nested.space.minimum = nested.space.minimum[..., :3]
+        nested.space.maximum = nested.space.maximum[..., :3]
+        nested.shape = torch.Size([2, 3])
+        td = spec.rand()
+        assert td["nested", "f"].shape == torch.Size([2, 3])
+        assert spec.is_in(td)
+        spec.shape = ()
+        assert spec.rand().batch_size == torch.Size([])
+
+
 class TestEquality:
     """Tests spec comparison."""
 
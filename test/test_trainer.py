@@ -5,8 +5,10 @@
 import argparse
 import os
 import tempfile
+import threading
 from argparse import Namespace
 from collections import OrderedDict
+from copy import deepcopy
 from os import path, walk
 from time import sleep
 
@@ -41,6 +43,7 @@ from torchrl.trainers.trainers import (
     CountFramesLog,
     LogReward,
     mask_batch,
+    MinibatchIterator,
     OptimizerHook,
     ReplayBufferTrainer,
     REWARD_KEY,
@@ -85,6 +88,16 @@ class MockingLossModule(nn.Module):
     pass
 
 
+class _LossWrapper(nn.Module):
+    def __init__(self, model, fn):
+        super().__init__()
+        self.model = model
+        self.fn = fn
+
+    def forward(self, td):
+        return self.fn(td)
+
+
 _mocking_optim = MockingOptim()
 
 
@@ -627,6 +640,99 @@ class TestOptimizer:
             for p_before, p_after in zip(model2_params_before, model2_params_after)
         )
 
+    @staticmethod
+    def _accumulation_setup():
+        torch.manual_seed(0)
+        model = nn.Linear(10, 1)
+        x = torch.randn(8, 10)
+        return model, x
+
+    def test_optimizer_hook_grad_accumulation(self):
+        model, x = self._accumulation_setup()
+        model_acc = deepcopy(model)
+
+        hook = OptimizerHook(torch.optim.SGD(model.parameters(), lr=1e-1))
+        hook(TensorDict({"loss": model(x).pow(2).mean()}, []), True, None, 0)
+
+        hook_acc = OptimizerHook(
+            torch.optim.SGD(model_acc.parameters(), lr=1e-1),
+            grad_accumulation_steps=2,
+        )
+        params_before = [p.clone() for p in model_acc.parameters()]
+        td_out = hook_acc(
+            TensorDict({"loss": model_acc(x[:4]).pow(2).mean()}, []), True, None, 0
+        )
+        # the optimizer is not stepped before the last micro-batch
+        assert "grad_norm_0" not in td_out.keys()
+        assert all(
+            torch.equal(p_before, p)
+            for p_before, p in zip(params_before, model_acc.parameters())
+        )
+        td_out = hook_acc(
+            TensorDict({"loss": model_acc(x[4:]).pow(2).mean()}, []), True, None, 0
+        )
+        assert "grad_norm_0" in td_out.keys()
+        for p, p_acc in zip(model.parameters(), model_acc.parameters()):
+            torch.testing.assert_close(p, p_acc)
+            assert p_acc.grad is None or (p_acc.grad == 0).all()
+
+    @pytest.mark.parametrize("clip_grad_norm", [True, False])
+    @pytest.mark.parametrize("clip_norm", [None, 1e-2])
+    def test_optimizer_hook_fused_clip(self, clip_grad_norm, clip_norm):
+        model, x = self._accumulation_setup()
+        model_fused = deepcopy(model)
+        tds = []
+        for _model, fused_clip in ((model, False), (model_fused, True)):
+            hook = OptimizerHook(
+                torch.optim.SGD(_model.parameters(), lr=1e-1), fused_clip=fused_clip
+            )
+            tds.append(
+                hook(
+                    TensorDict({"loss": _model(x).pow(2).mean()}, []),
+                    clip_grad_norm,
+                    clip_norm,
+                    0,
+                )
+            )
+        torch.testing.assert_close(
+            tds[0]["grad_norm_0"].float(), tds[1]["grad_norm_0"].float()
+        )
+        for p, p_fused in zip(model.parameters(), model_fused.parameters()):
+            torch.testing.assert_close(p, p_fused)
+
+    def test_trainer_grad_accumulation_autocast(self):
+        model, x = self._accumulation_setup()
+        dtypes = []
+
+        def loss_module(td):
+            out = model(td["x"])
+            dtypes.append(out.dtype)
+            return TensorDict({"loss": out.float().pow(2).mean()}, [])
+
+        loss_module = _LossWrapper(model, loss_module)
+        trainer = Trainer(
+            collector=MockingCollector(),
+            total_frames=None,
+            frame_skip=None,
+            optim_steps_per_batch=3,
+            loss_module=loss_module,
+            optimizer=torch.optim.SGD(model.parameters(), lr=1e-3),
+            progress_bar=False,
+            autocast_dtype=torch.bfloat16,
+            grad_accumulation_steps=2,
+        )
+        micro_batches = []
+
+        def sample(batch):
+            micro_batches.append(batch)
+            return batch
+
+        trainer.register_op("process_optim_batch", sample)
+        trainer.optim_steps(TensorDict({"x": x}, [8]))
+        assert len(micro_batches) == 6
+        assert dtypes == [torch.bfloat16] * 6
+        assert trainer._optim_count == 3
+
 
 class TestLogReward:
     @pytest.mark.parametrize("logname", ["a", "b"])
@@ -831,6 +937,133 @@ class TestSubSampler:
         td1 = trainer2._process_optim_batch_hook(td)
         assert (td0 == td1).all()
 
+    def test_subsampler_mask(self):
+        torch.manual_seed(0)
+        batch_size = 12
+        sub_traj_len = 3
+        mask = torch.ones(4, 10, dtype=torch.bool)
+        mask[0, 4:] = False
+        mask[2, 6:] = False
+        td = TensorDict(
+            {
+                "key1": torch.arange(40).view(4, 10),
+                ("collector", "mask"): mask,
+            },
+            [4, 10],
+        )
+        subsampler = BatchSubSampler(batch_size=batch_size, sub_traj_len=sub_traj_len)
+        for _ in range(10):
+            td_out = subsampler(td)
+            assert td_out.shape == torch.Size(
+                [batch_size // sub_traj_len, sub_traj_len]
+            )
+            assert td_out.get(("collector", "mask")).all()
+            # consecutive steps of a single trajectory
+            key1 = td_out.get("key1")
+            assert (key1.diff(dim=-1) == 1).all()
+            assert (key1[:, 0] // 10 == key1[:, -1] // 10).all()
+
+    def test_subsampler_mask_inplace(self):
+        torch.manual_seed(0)
+        mask = torch.ones(4, 10, dtype=torch.bool)
+        td = TensorDict(
+            {
+                "key1": torch.arange(40).view(4, 10),
+                ("collector", "mask"): mask,
+            },
+            [4, 10],
+        )
+        subsampler = BatchSubSampler(batch_size=12, sub_traj_len=3)
+        subsampler(td)
+        # the mask is updated in-place, e.g. by a collector re-using its buffers
+        mask[1:, 2:] = False
+        for _ in range(10):
+            td_out = subsampler(td)
+            # the sub-trajectories are shortened to the new minimum length
+            assert td_out.shape == torch.Size([6, 2])
+            assert td_out.get(("collector", "mask")).all()
+
+
+class TestMinibatchIterator:
+    @staticmethod
+    def _batch(masked):
+        td = TensorDict(
+            {
+                "key1": torch.arange(40).view(4, 10),
+                "next": {"key2": torch.arange(40).view(4, 10, 1)},
+            },
+            [4, 10],
+        )
+        if masked:
+            mask = torch.ones(4, 10, dtype=torch.bool)
+            mask[1, 7:] = False
+            td.set(("collector", "mask"), mask)
+        return td
+
+    @pytest.mark.parametrize("masked", [True, False])
+    @pytest.mark.parametrize("shuffle", [True, False])
+    def test_minibatch_iterator(self, masked, shuffle):
+        torch.manual_seed(0)
+        td = self._batch(masked)
+        minibatches = MinibatchIterator(batch_size=8, shuffle=shuffle)
+        for _ in range(2):
+            seen = []
+            for minibatch in minibatches.iterate(td):
+                assert minibatch.ndim == 1
+                assert minibatch.numel() <= 8
+                assert (
+                    minibatch["key1"] == minibatch["next", "key2"].squeeze(-1)
+                ).all()
+                seen.append(minibatch["key1"])
+            seen = torch.cat(seen)
+            expected = td["key1"][td["collector", "mask"]] if masked else td["key1"]
+            # each valid step is sampled exactly once per epoch
+            assert (seen.sort().values == expected.reshape(-1).sort().values).all()
+            if not shuffle:
+                assert (seen == expected.reshape(-1)).all()
+
+    @pytest.mark.parametrize("masked", [True, False])
+    def test_minibatch_iterator_sub_traj(self, masked):
+        torch.manual_seed(0)
+        td = self._batch(masked)
+        minibatches = MinibatchIterator(batch_size=9, sub_traj_len=3)
+        for _ in range(5):
+            seen = []
+            for minibatch in minibatches.iterate(td):
+                assert minibatch.shape[1:] == torch.Size([3])
+                assert minibatch.shape[0] <= 3
+                key1 = minibatch["key1"]
+                assert (key1.diff(dim=-1) == 1).all()
+                assert (key1[:, 0] // 10 == key1[:, -1] // 10).all()
+                if masked:
+                    assert minibatch["collector", "mask"].all()
+                seen.append(key1.reshape(-1))
+            seen = torch.cat(seen)
+            # non-overlapping sub-trajectories
+            assert seen.unique().numel() == seen.numel()
+            assert seen.numel() >= (8 if masked else 9) * 3
+
+    def test_minibatch_iterator_hook(self):
+        torch.manual_seed(0)
+        trainer = mocking_trainer()
+        minibatches = MinibatchIterator(batch_size=16, drop_last=True)
+        minibatches.register(trainer)
+        td = self._batch(False)
+        seen = [trainer._process_optim_batch_hook(td)["key1"] for _ in range(2)]
+        # the epoch is over, a new one starts
+        seen.append(trainer._process_optim_batch_hook(td)["key1"])
+        assert all(keys.shape == torch.Size([16]) for keys in seen)
+        assert torch.cat(seen[:2]).unique().numel() == 32
+        # a new batch restarts the iteration
+        td2 = self._batch(False)
+        td2["key1"] = td2["key1"] + 100
+        assert (trainer._process_optim_batch_hook(td2)["key1"] >= 100).all()
+
+    def test_minibatch_iterator_views(self):
+        td = self._batch(False)
+        minibatch = next(MinibatchIterator(batch_size=8, shuffle=False).iterate(td))
+        assert minibatch["key1"].data_ptr() == td["key1"].data_ptr()
+
 
 @pytest.mark.skipif(not _has_gym, reason="No gym library")
 @pytest.mark.skipif(not _has_tb, reason="No tensorboard library")
@@ -1065,6 +1298,124 @@ class TestCountFrames:
         CountFramesLog.load_state_dict = CountFramesLog_load_state_dict
 
 
+class TestPipeline:
+    class _Collector(MockingCollector):
+        init_random_frames = 0
+
+        def __init__(self, num_batches, batch_size):
+            self.num_batches = num_batches
+            self.batch_size = batch_size
+            self.shutdown_called = False
+
+        def __iter__(self):
+            for i in range(self.num_batches):
+                yield TensorDict(
+                    {"idx": torch.full((self.batch_size,), i)}, [self.batch_size]
+                )
+
+        def shutdown(self):
+            self.shutdown_called = True
+
+    @pytest.mark.parametrize("max_lag", [1, 3])
+    def test_pipeline(self, max_lag, num_batches=10, batch_size=4):
+        collector = self._Collector(num_batches, batch_size)
+        trainer = Trainer(
+            collector=collector,
+            total_frames=num_batches * batch_size,
+            frame_skip=1,
+            optim_steps_per_batch=1,
+            loss_module=lambda td: TensorDict({"loss": td["idx"].float().mean()}, []),
+            optimizer=None,
+            progress_bar=False,
+            pipeline=True,
+            max_lag=max_lag,
+        )
+        processed = []
+        threads = set()
+
+        def process(batch):
+            processed.append(batch["idx"][0].item())
+            threads.add(threading.current_thread())
+            return batch
+
+        optimized = []
+        lags = []
+
+        def optim_batch(batch):
+            # batches processed ahead of the one being optimized: max_lag in
+            # the queue and one held by the worker
+            lags.append(len(processed) - len(optimized) - 1)
+            optimized.append(batch["idx"][0].item())
+            sleep(0.01)
+            return batch
+
+        trainer.register_op("batch_process", process)
+        trainer.register_op("process_optim_batch", optim_batch)
+        trainer.train()
+        assert optimized == list(range(num_batches))
+        assert processed == optimized
+        assert max(lags) == max_lag + 1
+        assert threads and threading.main_thread() not in threads
+        assert trainer.collected_frames == num_batches * batch_size
+        assert collector.shutdown_called
+
+    def test_pipeline_early_stop(self, num_batches=10, batch_size=4):
+        collector = self._Collector(num_batches, batch_size)
+        trainer = Trainer(
+            collector=collector,
+            total_frames=2 * batch_size,
+            frame_skip=1,
+            optim_steps_per_batch=0,
+            loss_module=MockingLossModule(),
+            optimizer=None,
+            progress_bar=False,
+            pipeline=True,
+        )
+        threads = []
+        trainer.register_op(
+            "batch_process",
+            lambda batch: threads.append(threading.current_thread()),
+        )
+        trainer.train()
+        assert trainer.collected_frames == 2 * batch_size
+        assert collector.shutdown_called
+        # the worker is stopped before the collector is shut down
+        assert not any(thread.is_alive() for thread in threads)
+
+    def test_pipeline_error(self):
+        class FailingCollector(self._Collector):
+            def __iter__(self):
+                yield from super().__iter__()
+                raise ValueError("collection failed")
+
+        trainer = Trainer(
+            collector=FailingCollector(2, 4),
+            total_frames=100,
+            frame_skip=1,
+            optim_steps_per_batch=0,
+            loss_module=MockingLossModule(),
+            optimizer=None,
+            progress_bar=False,
+            pipeline=True,
+        )
+        with pytest.raises(ValueError, match="collection failed"):
+            trainer.train()
+
+    def test_pipeline_max_lag(self):
+        with pytest.raises(ValueError, match="max_lag"):
+            Trainer(
+                collector=self._Collector(1, 1),
+                total_frames=1,
+                frame_skip=1,
+                optim_steps_per_batch=0,
+                loss_module=MockingLossModule(),
+                optimizer=None,
+                progress_bar=False,
+                pipeline=True,
+                max_lag=0,
+            )
+
+
 if __name__ == "__main__":
     args, unknown = argparse.ArgumentParser().parse_known_args()
     pytest.main([__file__, "--capture", "no", "--exitfirst"] + unknown)
@@ -51,6 +51,7 @@ from torchrl.envs import (
     Compose,
     DiscreteActionProjection,
     DoubleToFloat,
+    encode_storage,
     EnvBase,
     EnvCreator,
     ExcludeTransform,
@@ -90,6 +91,7 @@ from torchrl.envs.transforms import VecNorm
 from torchrl.envs.transforms.r3m import _R3MNet
 from torchrl.envs.transforms.rlhf import KLRewardTransform
 from torchrl.envs.transforms.transforms import _has_tv
+from torchrl.envs.transforms.utils import _EmbeddingCache
 from torchrl.envs.transforms.vc1 import _has_vc
 from torchrl.envs.transforms.vip import _VIPNet, VIPRewardTransform
 from torchrl.envs.utils import check_env_specs, step_mdp
@@ -1125,6 +1127,79 @@ class TestR3M(TransformBase):
         )
         assert set(expected_keys) == set(transformed_env.rollout(3).keys(True))
 
+    def test_r3m_cache(self, model, device):
+        r3m = R3MTransform(
+            model,
+            in_keys=["pixels"],
+            out_keys=["vec"],
+            cache_size=8,
+        )
+        pixels = torch.randint(255, (4, 244, 244, 3))
+        td = TensorDict({"pixels": pixels}, [4])
+        r3m(td)
+        assert len(r3m[-1]._embedding_cache) == 4
+        td_cached = TensorDict({"pixels": pixels.flip(0)}, [4])
+        r3m(td_cached)
+        assert len(r3m[-1]._embedding_cache) == 4
+        torch.testing.assert_close(td_cached["vec"], td["vec"].flip(0))
+
+
+class TestEmbeddingCache:
+    def test_cache_hits(self):
+        calls = []
+
+        def fn(obs):
+            calls.append(obs.shape[0])
+            return obs.flatten(1).sum(-1, keepdim=True)
+
+        cache = _EmbeddingCache(10)
+        obs = torch.randn(4, 3, 8, 8)
+        out = cache(fn, obs)
+        torch.testing.assert_close(out, fn(obs))
+        calls.clear()
+        # repeated frames are encoded only once
+        obs2 = torch.cat([obs[:2], obs[:2], torch.randn(1, 3, 8, 8)])
+        out2 = cache(fn, obs2)
+        assert calls == [1]
+        torch.testing.assert_close(out2[:4], out[:2].repeat(2, 1))
+        assert len(cache) == 5
+
+    def test_cache_lru(self):
+        cache = _EmbeddingCache(2)
+        obs = torch.randn(3, 3, 8, 8)
+        cache(lambda x: x.mean((1, 2, 3)), obs[:2])
+        # access the first frame to make it the most recently used
+        cache(lambda x: x.mean((1, 2, 3)), obs[:1])
+        cache(lambda x: x.mean((1, 2, 3)), obs[2:])
+        assert len(cache) == 2
+        keys = _EmbeddingCache._hash_frames(obs)
+        assert keys[0] in cache._cache
+        assert keys[1] not in cache._cache
+        assert keys[2] in cache._cache
+
+    def test_cache_distinct_dtypes(self):
+        cache = _EmbeddingCache(10)
+        obs = torch.zeros(1, 3, 8, 8)
+        cache(lambda x: x.flatten(1), obs)
+        cache(lambda x: x.flatten(1), obs.double())
+        assert len(cache) == 2
+
+    def test_encode_storage(self, tmpdir):
+        rb = TensorDictReplayBuffer(storage=LazyTensorStorage(20))
+        rb.extend(TensorDict({"pixels": torch.randn(15, 3, 8, 8)}, [15]))
+        transform = FlattenObservation(-3, -1, in_keys=["pixels"])
+        storage = encode_storage(
+            transform, rb._storage, batch_size=4, scratch_dir=tmpdir
+        )
+        assert len(storage) == 15
+        assert storage.max_size == 20
+        encoded_rb = TensorDictReplayBuffer(storage=storage)
+        assert encoded_rb.sample(4)["pixels"].shape == torch.Size([4, 192])
+        assert (
+            storage.get(list(range(15)))["pixels"]
+            == rb._storage.get(list(range(15)))["pixels"].flatten(-3, -1)
+        ).all()
+
 
 class TestStepCounter(TransformBase):
     def test_parallel_trans_env_check(self):
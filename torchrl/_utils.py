@@ -3,7 +3,9 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import bisect
 import collections
+import contextlib
 
 import functools
 import inspect
@@ -18,7 +20,7 @@ from copy import copy
 from distutils.util import strtobool
 from functools import wraps
 from importlib import import_module
-from typing import Any, Callable, cast, TypeVar, Union
+from typing import Any, Callable, cast, Dict, Sequence, TypeVar, Union
 
 import numpy as np
 import torch
@@ -78,6 +80,216 @@ class timeit:
             timeit._REG[k] = [0.0, 0.0, 0]
 
 
+# upper bounds of the telemetry histogram buckets: 20 log-spaced buckets per
+# decade from 1 microsecond to 100 seconds (i.e. ~12% relative resolution).
+_TELEMETRY_BUCKETS = [10 ** (i / 20) for i in range(-120, 41)]
+
+
+class _TelemetryHistogram:
+    """A histogram of durations with log-spaced buckets."""
+
+    __slots__ = ("counts", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = np.zeros(len(_TELEMETRY_BUCKETS) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, t: float) -> None:
+        self.counts[bisect.bisect_left(_TELEMETRY_BUCKETS, t)] += 1
+        self.total += t
+        if t < self.min:
+            self.min = t
+        if t > self.max:
+            self.max = t
+
+    def merge(self, state: dict) -> None:
+        self.counts += state["counts"]
+        self.total += state["total"]
+        self.min = min(self.min, state["min"])
+        self.max = max(self.max, state["max"])
+
+    def state_dict(self) -> dict:
+        return {
+            "counts": self.counts.copy(),
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    def percentile(self, q: float) -> float:
+        count = self.counts.sum()
+        if not count:
+            return math.nan
+        cumcounts = np.cumsum(self.counts)
+        bucket = int(np.searchsorted(cumcounts, q / 100 * count))
+        if bucket >= len(_TELEMETRY_BUCKETS):
+            return self.max
+        # the upper bound of the bucket, which cannot exceed the largest value
+        return max(min(_TELEMETRY_BUCKETS[bucket], self.max), self.min)
+
+    def summary(self, percentiles: Sequence[float]) -> dict:
+        count = int(self.counts.sum())
+        out = {
+            "count": count,
+            "mean": self.total / count if count else math.nan,
+            "min": self.min if count else math.nan,
+            "max": self.max if count else math.nan,
+        }
+        for q in percentiles:
+            out[f"p{q:g}"] = self.percentile(q)
+        return out
+
+
+class _TelemetryTimer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: _TelemetryHistogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.hist.record(time.perf_counter() - self.t0)
+
+
+class telemetry:
+    """Per-stage timers of the collection and training loops.
+
+    Unlike :class:`timeit`, the durations are recorded in histograms from
+    which percentiles can be read, and the recording can be switched on and
+    off at runtime. When it is off (the default), a timer costs a single
+    attribute lookup. Telemetry can also be enabled at import time with the
+    ``RL_TELEMETRY`` environment variable. The workers of
+    :class:`~torchrl.envs.ParallelEnv` start with the toggle of the process
+    that launches them.
+
+    Each process has its own registry. The multiprocessed collectors and
+    :class:`~torchrl.envs.ParallelEnv` merge the registries of their workers
+    in the one of the main process through their ``gather_telemetry()``
+    method.
+
+    Stages are named ``"<component>/<stage>"``, e.g. ``"collector/policy"``
+    or ``"parallel_env/ipc_wait"``. Durations are wall-clock times in seconds:
+    asynchronous CUDA operations are only accounted for when they are
+    synchronized.
+
+    Examples:
+        >>> from torchrl._utils import telemetry
+        >>> telemetry.enable()
+        >>> with telemetry.timer("my_component/my_stage"):
+        ...     time.sleep(0.01)
+        >>> telemetry.summary()["my_component/my_stage"]["count"]
+        1
+        >>> telemetry.to_tensordict()["my_component", "my_stage", "p50"]
+        tensor(0.0100, dtype=torch.float64)
+        >>> telemetry.log(logger, step=0)  # logs "telemetry/my_component/my_stage/p50" etc.
+
+    """
+
+    _ENABLED = strtobool(os.environ.get("RL_TELEMETRY", "0"))
+    _REG = {}
+    _NULL_TIMER = contextlib.nullcontext()
+    PERCENTILES = (50, 90, 99)
+
+    @classmethod
+    def set_enabled(cls, enabled: bool) -> None:
+        """Turns the recording on or off in this process."""
+        cls._ENABLED = bool(enabled)
+
+    @classmethod
+    def enable(cls) -> None:
+        cls.set_enabled(True)
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.set_enabled(False)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return cls._ENABLED
+
+    @classmethod
+    def _get(cls, name: str) -> _TelemetryHistogram:
+        hist = cls._REG.get(name)
+        if hist is None:
+            hist = cls._REG[name] = _TelemetryHistogram()
+        return hist
+
+    @classmethod
+    def timer(cls, name: str):
+        """Returns a context manager that records the time spent in its block under ``name``."""
+        if not cls._ENABLED:
+            return cls._NULL_TIMER
+        return _TelemetryTimer(cls._get(name))
+
+    @classmethod
+    def record(cls, name: str, duration: float) -> None:
+        """Records a duration (in seconds) measured by other means under ``name``."""
+        if cls._ENABLED:
+            cls._get(name).record(duration)
+
+    @classmethod
+    def reset(cls) -> None:
+        """Erases all the recorded durations."""
+        cls._REG.clear()
+
+    @classmethod
+    def state_dict(cls) -> Dict[str, dict]:
+        """Returns the content of the registry, to be merged in another process' registry."""
+        return {name: hist.state_dict() for name, hist in cls._REG.items()}
+
+    @classmethod
+    def merge(cls, state_dict: Dict[str, dict]) -> None:
+        """Adds the durations of a registry obtained with :meth:`state_dict` to this one."""
+        for name, state in state_dict.items():
+            cls._get(name).merge(state)
+
+    @classmethod
+    def summary(cls, percentiles: Sequence[float] = None) -> Dict[str, dict]:
+        """Returns the count, mean, min, max and percentiles of each stage, in seconds.
+
+        Args:
+            percentiles (sequence of float, optional): the percentiles to
+                compute. Defaults to ``telemetry.PERCENTILES``.
+        """
+        if percentiles is None:
+            percentiles = cls.PERCENTILES
+        return {name: cls._REG[name].summary(percentiles) for name in sorted(cls._REG)}
+
+    @classmethod
+    def to_tensordict(
+        cls, percentiles: Sequence[float] = None
+    ) -> "TensorDict":  # noqa: F821
+        """Returns the :meth:`summary` as a tensordict whose nested keys follow the stage names."""
+        from tensordict import TensorDict
+
+        out = TensorDict({}, [])
+        for name, stats in cls.summary(percentiles).items():
+            prefix = tuple(name.split("/"))
+            for stat, value in stats.items():
+                dtype = torch.int64 if stat == "count" else torch.float64
+                out.set(prefix + (stat,), torch.tensor(value, dtype=dtype))
+        return out
+
+    @classmethod
+    def log(
+        cls,
+        logger: "Logger",  # noqa: F821
+        step: int = None,
+        percentiles: Sequence[float] = None,
+    ) -> None:
+        """Writes the :meth:`summary` with the ``log_scalar`` method of a :class:`~torchrl.record.loggers.Logger`.
+
+        The values are logged as ``"telemetry/<stage name>/<statistic>"``.
+        """
+        for name, stats in cls.summary(percentiles).items():
+            for stat, value in stats.items():
+                logger.log_scalar(f"telemetry/{name}/{stat}", value, step=step)
+
+
 def _check_for_faulty_process(processes):
     terminate = False
     for p in processes:
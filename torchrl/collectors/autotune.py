@@ -0,0 +1,290 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import functools
+import json
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Type
+
+import torch
+from tensordict.tensordict import TensorDictBase
+
+from torchrl.collectors.collectors import (
+    _MultiDataCollector,
+    MultiaSyncDataCollector,
+    MultiSyncDataCollector,
+)
+from torchrl.envs.common import EnvBase
+from torchrl.envs.vec_env import ParallelEnv, SerialEnv
+
+_COLLECTOR_CLASSES = {
+    cls.__name__: cls for cls in (MultiSyncDataCollector, MultiaSyncDataCollector)
+}
+_BATCHED_ENV_CLASSES = {"serial": SerialEnv, "parallel": ParallelEnv}
+
+
+def _powers_of_two(maximum: int) -> Sequence[int]:
+    out = [1]
+    while out[-1] * 2 <= maximum:
+        out.append(out[-1] * 2)
+    return out
+
+
+def _worker_env_fn(
+    create_env_fn: Callable[[], EnvBase], envs_per_worker: int, batched_env: str
+) -> Callable[[], EnvBase]:
+    if envs_per_worker == 1:
+        return create_env_fn
+    return functools.partial(
+        _BATCHED_ENV_CLASSES[batched_env], envs_per_worker, create_env_fn
+    )
+
+
+def make_collector(
+    config: Dict[str, Any],
+    create_env_fn: Callable[[], EnvBase],
+    policy: Callable[[TensorDictBase], TensorDictBase],
+    **kwargs,
+) -> _MultiDataCollector:
+    """Builds the collector described by a configuration returned by :func:`autotune`.
+
+    Args:
+        config (dict): the configuration returned by :func:`autotune`.
+        create_env_fn (Callable): the env constructor given to :func:`autotune`.
+        policy (Callable): the policy.
+
+    Keyword Args:
+        Other keyword arguments (e.g., ``total_frames``) are passed to the
+        collector. ``total_frames`` defaults to ``-1``.
+
+    """
+    collector_class = _COLLECTOR_CLASSES[config["collector_class"]]
+    env_fn = _worker_env_fn(
+        create_env_fn, config["envs_per_worker"], config["batched_env"]
+    )
+    kwargs.setdefault("total_frames", -1)
+    return collector_class(
+        [env_fn] * config["num_workers"],
+        policy,
+        frames_per_batch=config["frames_per_batch"],
+        storing_device=config["storing_device"],
+        **kwargs,
+    )
+
+
+def _measure_fps(
+    config: Dict[str, Any],
+    create_env_fn: Callable[[], EnvBase],
+    policy: Callable[[TensorDictBase], TensorDictBase],
+    calibration_frames: int,
+) -> float:
+    collector = make_collector(config, create_env_fn, policy)
+    try:
+        frames = 0
+        t0 = None
+        for data in collector:
+            if t0 is None:
+                # the first batch includes the start-up of the workers
+                t0 = time.perf_counter()
+                continue
+            frames += data.numel()
+            if frames >= calibration_frames:
+                break
+        return frames / (time.perf_counter() - t0)
+    finally:
+        collector.shutdown()
+
+
+def _load_profile(profile_path: str, profile_key: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(profile_path):
+        return None
+    with open(profile_path) as f:
+        return json.load(f).get(profile_key, None)
+
+
+def _save_profile(profile_path: str, profile_key: str, config: Dict[str, Any]) -> None:
+    profiles = {}
+    if os.path.exists(profile_path):
+        with open(profile_path) as f:
+            profiles = json.load(f)
+    profiles[profile_key] = config
+    with open(profile_path, "w") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True)
+
+
+def autotune(
+    create_env_fn: Callable[[], EnvBase],
+    policy: Callable[[TensorDictBase], TensorDictBase],
+    *,
+    cpu_budget: Optional[int] = None,
+    collector_classes: Sequence[Type[_MultiDataCollector]] = (
+        MultiSyncDataCollector,
+        MultiaSyncDataCollector,
+    ),
+    num_workers: Optional[Sequence[int]] = None,
+    envs_per_worker: Optional[Sequence[int]] = None,
+    batched_envs: Sequence[str] = ("serial", "parallel"),
+    frames_per_batch: Sequence[int] = (256, 1024, 4096),
+    storing_devices: Optional[Sequence[str]] = None,
+    calibration_frames: int = 2048,
+    profile_path: Optional[str] = None,
+    profile_key: Optional[str] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """Finds the multiprocessed collector configuration with the highest throughput.
+
+    Short calibration rollouts are collected with candidate configurations
+    and the one that collects the most frames per second is returned. The
+    search is done in two phases: the collector class, the number of workers,
+    the number of envs per worker and the type of batched env are first
+    searched exhaustively with the median ``frames_per_batch`` candidate.
+    The ``frames_per_batch`` and storing device are then tuned for the best
+    configuration.
+
+    Only configurations that do not start more processes than ``cpu_budget``
+    are considered: a worker counts for one process, and a
+    :class:`~torchrl.envs.ParallelEnv` worker for one more process per env.
+
+    Args:
+        create_env_fn (Callable): a picklable callable that returns an env.
+        policy (Callable): the policy used for the calibration rollouts.
+
+    Keyword Args:
+        cpu_budget (int, optional): the maximum number of processes to start.
+            Defaults to ``os.cpu_count()``.
+        collector_classes (sequence of types, optional): the collector classes
+            to try. Defaults to ``(MultiSyncDataCollector, MultiaSyncDataCollector)``.
+        num_workers (sequence of int, optional): the numbers of workers to try.
+            Defaults to the powers of two up to ``cpu_budget``.
+        envs_per_worker (sequence of int, optional): the numbers of envs per
+            worker to try. Defaults to ``(1, 2, 4, 8)``.
+        batched_envs (sequence of str, optional): how the envs of a worker are
+            batched when there are more than one, ``"serial"``
+            (:class:`~torchrl.envs.SerialEnv`) and/or ``"parallel"``
+            (:class:`~torchrl.envs.ParallelEnv`). Defaults to both.
+        frames_per_batch (sequence of int, optional): the batch sizes to try.
+            They are rounded up to a multiple of the total number of envs.
+            Defaults to ``(256, 1024, 4096)``.
+        storing_devices (sequence of str, optional): the storing devices to
+            try. Defaults to ``("cpu", "cuda")`` if cuda is available and
+            ``("cpu",)`` otherwise.
+        calibration_frames (int, optional): the number of frames collected to
+            measure the throughput of a configuration, after a first warm-up
+            batch. Defaults to 2048.
+        profile_path (str, optional): a json file where the best
+            configurations are stored. If the file contains a configuration
+            for ``profile_key``, it is returned without calibration.
+            Otherwise, the configuration found is added to the file.
+        profile_key (str, optional): the key of the configuration in the
+            profile file. Defaults to the ``repr`` of an env built with
+            ``create_env_fn`` and the cpu budget.
+        verbose (bool, optional): if ``True``, the throughput of each
+            configuration is printed. Defaults to ``False``.
+
+    Returns:
+        a json-serializable dictionary with the ``"collector_class"`` name,
+        ``"num_workers"``, ``"envs_per_worker"``, ``"batched_env"``,
+        ``"frames_per_batch"``, ``"storing_device"`` and the measured ``"fps"``.
+        The collector can be built with :func:`make_collector`.
+
+    Examples:
+        >>> from torchrl.collectors.autotune import autotune, make_collector
+        >>> from torchrl.envs import EnvCreator
+        >>> from torchrl.envs.libs.gym import GymEnv
+        >>> env_fn = EnvCreator(lambda: GymEnv("Pendulum-v1"))
+        >>> config = autotune(env_fn, policy, cpu_budget=8, profile_path="profiles.json")
+        >>> collector = make_collector(config, env_fn, policy, total_frames=100_000)
+
+    """
+    if cpu_budget is None:
+        cpu_budget = os.cpu_count()
+    if profile_path is not None:
+        if profile_key is None:
+            env = create_env_fn()
+            profile_key = f"{env!r}, cpu_budget={cpu_budget}"
+            env.close()
+            del env
+        config = _load_profile(profile_path, profile_key)
+        if config is not None:
+            return config
+
+    if num_workers is None:
+        num_workers = _powers_of_two(cpu_budget)
+    if envs_per_worker is None:
+        envs_per_worker = (1, 2, 4, 8)
+    if storing_devices is None:
+        storing_devices = ("cpu", "cuda") if torch.cuda.is_available() else ("cpu",)
+    for batched_env in batched_envs:
+        if batched_env not in _BATCHED_ENV_CLASSES:
+            raise ValueError(
+                f"batched_envs must be in {list(_BATCHED_ENV_CLASSES)}, got {batched_env}."
+            )
+    frames_per_batch = sorted(frames_per_batch)
+
+    layouts = []
+    for _num_workers in num_workers:
+        for _envs_per_worker in envs_per_worker:
+            for batched_env in batched_envs if _envs_per_worker > 1 else ("serial",):
+                num_procs = _num_workers
+                if batched_env == "parallel":
+                    num_procs *= 1 + _envs_per_worker
+                if num_procs > cpu_budget:
+                    continue
+                layouts.append((_num_workers, _envs_per_worker, batched_env))
+    if not layouts:
+        raise ValueError(
+            f"No candidate configuration fits in a cpu budget of {cpu_budget}."
+        )
+
+    results = {}
+
+    def evaluate(config):
+        num_envs = config["num_workers"] * config["envs_per_worker"]
+        # each env contributes the same number of frames to a batch
+        config["frames_per_batch"] = (
+            math.ceil(config["frames_per_batch"] / num_envs) * num_envs
+        )
+        key = json.dumps(config, sort_keys=True)
+        if key not in results:
+            results[key] = _measure_fps(
+                config, create_env_fn, policy, calibration_frames
+            )
+            if verbose:
+                print(f"autotune: {results[key]:.1f} fps with {config}")
+        return results[key]
+
+    # phase 1: collector class and worker layout
+    best_config, best_fps = None, -1.0
+    for collector_class in collector_classes:
+        for _num_workers, _envs_per_worker, batched_env in layouts:
+            config = {
+                "collector_class": collector_class.__name__,
+                "num_workers": _num_workers,
+                "envs_per_worker": _envs_per_worker,
+                "batched_env": batched_env,
+                "frames_per_batch": frames_per_batch[len(frames_per_batch) // 2],
+                "storing_device": storing_devices[0],
+            }
+            fps = evaluate(config)
+            if fps > best_fps:
+                best_config, best_fps = config, fps
+    # phase 2: batch size and storing device
+    for _frames_per_batch in frames_per_batch:
+        for storing_device in storing_devices:
+            config = dict(
+                best_config,
+                frames_per_batch=_frames_per_batch,
+                storing_device=storing_device,
+            )
+            fps = evaluate(config)
+            if fps > best_fps:
+                best_config, best_fps = config, fps
+
+    best_config = dict(best_config, fps=best_fps)
+    if profile_path is not None:
+        _save_profile(profile_path, profile_key, best_config)
+    return best_config
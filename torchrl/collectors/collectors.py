@@ -4,13 +4,12 @@
 # LICENSE file in the root directory of this source tree.
 import _pickle
 import abc
+import contextlib
 import inspect
 import os
 import queue
-import sys
-import time
 import warnings
-from collections import OrderedDict
+from collections import deque, OrderedDict
 from copy import deepcopy
 
 from multiprocessing import connection, queues
@@ -33,6 +32,7 @@ from torchrl._utils import (
     accept_remote_rref_udf_invocation,
     prod,
     RL_WARNINGS,
+    telemetry,
     VERBOSE,
 )
 from torchrl.collectors.utils import split_trajectories
@@ -49,13 +49,10 @@ from torchrl.envs.utils import (
 from torchrl.envs.vec_env import _BatchedEnv
 
 _TIMEOUT = 1.0
-_MIN_TIMEOUT = 1e-3  # should be several orders of magnitude inferior wrt time spent collecting a trajectory
 _MAX_IDLE_COUNT = int(os.environ.get("MAX_IDLE_COUNT", 1000))
 
 DEFAULT_EXPLORATION_TYPE: ExplorationType = ExplorationType.RANDOM
 
-_is_osx = sys.platform.startswith("darwin")
-
 
 class RandomPolicy:
     """A random policy for data collectors.
@@ -121,6 +118,110 @@ class _InterruptorManager(SyncManager):
 _InterruptorManager.register("_Interruptor", _Interruptor)
 
 
+class _TrajectoryPool:
+    """Hands out unique trajectory ids.
+
+    When ``shared=True``, the counter lives in shared memory and is protected
+    by a lock, such that the collectors of several processes can draw ids
+    from the same pool without collision. A shared pool is only reset by its
+    owner (e.g. the main process of a multiprocessed collector), before it
+    asks the collectors that use it to reset.
+    """
+
+    def __init__(self, shared: bool = False):
+        self._traj_id = torch.zeros((), dtype=torch.int64)
+        self.shared = shared
+        if shared:
+            self._traj_id.share_memory_()
+            self._lock = mp.Lock()
+        else:
+            self._lock = contextlib.nullcontext()
+
+    def get_traj_and_increment(self, n: int = 1, device=None) -> torch.Tensor:
+        with self._lock:
+            start = self._traj_id.item()
+            self._traj_id.fill_(start + n)
+        return torch.arange(start, start + n, device=device)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._traj_id.zero_()
+
+
+class _SharedWeightStore:
+    """A double-buffered store of policy weights shared with worker processes.
+
+    The main process publishes new weights in the buffer that does not hold
+    the latest ones and then bumps a publication counter, such that it never
+    waits for the workers. The workers load the latest weights in their own
+    copy of the policy whenever it suits them (e.g., between two steps).
+    As in a seqlock, a worker that was loading a buffer while it was being
+    overwritten (which requires two publications during the copy) notices it
+    and loads the newest buffer again.
+
+    Args:
+        weights (TensorDictBase): the initial weights. They are copied in the
+            buffers of the store.
+    """
+
+    def __init__(self, weights: TensorDictBase):
+        weights = weights.apply(lambda x: x.data)
+        self._buffers = [weights.clone(), weights.clone()]
+        self._versions = torch.zeros(2, dtype=torch.int64)
+        # number of publications started / completed
+        self._writing = torch.zeros((), dtype=torch.int64)
+        self._published = torch.zeros((), dtype=torch.int64)
+        for buffer in self._buffers:
+            if buffer.device is None or buffer.device.type == "cpu":
+                buffer.share_memory_()
+        self._versions.share_memory_()
+        self._writing.share_memory_()
+        self._published.share_memory_()
+        self._cuda = any(
+            tensor.is_cuda for tensor in self._buffers[0].values(True, True)
+        )
+        # the last publication loaded by this process
+        self._loaded = 0
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # the policy of a new process holds the weights it has been sent with
+        self._loaded = int(self._published)
+
+    def publish(self, weights: TensorDictBase, version: int) -> None:
+        """Makes ``weights`` (with policy version ``version``) the latest weights of the store."""
+        publication = int(self._published) + 1
+        slot = publication % 2
+        self._writing.fill_(publication)
+        self._buffers[slot].update_(weights)
+        self._versions[slot] = version
+        if self._cuda:
+            torch.cuda.synchronize()
+        self._published.fill_(publication)
+
+    def load(self, weights: TensorDictBase) -> Optional[int]:
+        """Copies the latest weights in ``weights`` if they have not been loaded yet.
+
+        Returns the policy version of the loaded weights, or ``None`` if
+        ``weights`` was already up-to-date.
+        """
+        publication = int(self._published)
+        if publication == self._loaded:
+            return None
+        while True:
+            slot = publication % 2
+            weights.update_(self._buffers[slot])
+            version = int(self._versions[slot])
+            if self._cuda:
+                torch.cuda.synchronize()
+            # this slot is overwritten from the publication after the next one
+            if int(self._writing) < publication + 2:
+                break
+            publication = int(self._published)
+        self._loaded = publication
+        return version
+
+
 def recursive_map_to_cpu(dictionary: OrderedDict) -> OrderedDict:
     """Maps the tensors to CPU through a nested dictionary."""
     return OrderedDict(
@@ -177,6 +278,8 @@ class DataCollectorBase(IterableDataset, metaclass=abc.ABCMeta):
     """Base class for data collectors."""
 
     _iterator = None
+    max_policy_lag = None
+    drop_stale_batches = True
 
     def _get_policy_and_device(
         self,
@@ -293,19 +396,67 @@ behaviour and more control you can consider writing your own TensorDictModule.
         return policy_cast, device, get_weights_fn
 
     def update_policy_weights_(
-        self, policy_weights: Optional[TensorDictBase] = None
+        self,
+        policy_weights: Optional[TensorDictBase] = None,
+        policy_version: Optional[int] = None,
     ) -> None:
         """Updates the policy weights if the policy of the data collector and the trained policy live on different devices.
 
         Args:
             policy_weights (TensorDictBase, optional): if provided, a TensorDict containing
                 the weights of the policy to be used for the udpdate.
+            policy_version (int, optional): the version of the new weights, for
+                collectors that are updated by a remote trainer. Defaults to
+                the current version incremented by one.
 
         """
         if policy_weights is not None:
             self.policy_weights.apply(lambda x: x.data).update_(policy_weights)
         elif self.get_weights_fn is not None:
             self.policy_weights.apply(lambda x: x.data).update_(self.get_weights_fn())
+        self._set_policy_version(policy_version)
+
+    @property
+    def policy_version(self) -> int:
+        """The version of the policy weights, i.e. the number of weight updates.
+
+        Each collected frame is stamped with the version of the weights that
+        were used at the beginning of its batch in the
+        ``("collector", "policy_version")`` entry.
+        """
+        return int(self._policy_version)
+
+    def _set_policy_version(self, policy_version: Optional[int] = None) -> None:
+        if policy_version is None:
+            self._policy_version += 1
+        else:
+            self._policy_version.fill_(policy_version)
+
+    def _filter_stale(self, data: TensorDictBase) -> Optional[TensorDictBase]:
+        """Handles the frames collected more than ``max_policy_lag`` updates ago.
+
+        Returns ``None`` if the batch must be dropped. Otherwise, the stale
+        frames are flagged in the ``("collector", "stale")`` entry when
+        ``drop_stale_batches`` is ``False``.
+        """
+        if self.max_policy_lag is None:
+            return data
+        versions = data.get(("collector", "policy_version"), None)
+        if versions is None:
+            return data
+        stale = (self.policy_version - versions) > self.max_policy_lag
+        if self.drop_stale_batches:
+            mask = data.get(("collector", "mask"), None)
+            if mask is not None:
+                # padded frames of split trajectories are ignored
+                stale = stale & mask
+            return None if stale.any() else data
+        if data.is_locked:
+            with data.unlock_():
+                data.set(("collector", "stale"), stale)
+        else:
+            data.set(("collector", "stale"), stale)
+        return data
 
     def __iter__(self) -> Iterator[TensorDictBase]:
         return self.iterator()
@@ -341,6 +492,19 @@ behaviour and more control you can consider writing your own TensorDictModule.
     def load_state_dict(self, state_dict: OrderedDict) -> None:
         raise NotImplementedError
 
+    def gather_telemetry(self, reset: bool = True) -> None:
+        """Merges the telemetry recorded by the worker processes in the one of this process.
+
+        The workers also follow the current :class:`~torchrl._utils.telemetry`
+        toggle of this process from then on. Collectors that do not start
+        any process have nothing to gather.
+
+        Args:
+            reset (bool, optional): if ``True``, the telemetry of the workers
+                is erased once gathered. Defaults to ``True``.
+        """
+        return
+
     def __repr__(self) -> str:
         string = f"{self.__class__.__name__}()"
         return string
@@ -419,6 +583,14 @@ class SyncDataCollector(DataCollectorBase):
             The _Interruptor class has methods ´start_collection´ and ´stop_collection´, which allow to implement
             strategies such as preeptively stopping rollout collection.
             Default is ``False``.
+        traj_pool (_TrajectoryPool, optional): the pool from which the trajectory
+            ids are drawn. Multiprocessed collectors share a single pool across
+            their workers to get unique ids without post-processing.
+        policy_version (torch.Tensor, optional): a scalar integer tensor holding
+            the version of the policy weights, which is stamped on the collected
+            frames under ``("collector", "policy_version")`` and incremented by
+            :meth:`~.update_policy_weights_`. Multiprocessed collectors share
+            their counter with their workers.
         reset_when_done (bool, optional): if ``True`` (default), an environment
             that return a ``True`` value in its ``"done"`` or ``"truncated"``
             entry will be reset at the corresponding indices.
@@ -477,6 +649,9 @@ class SyncDataCollector(DataCollectorBase):
 
     """
 
+    # set by the workers of MultiaSyncDataCollector
+    _weight_store = None
+
     def __init__(
         self,
         create_env_fn: Union[
@@ -504,6 +679,8 @@ class SyncDataCollector(DataCollectorBase):
         return_same_td: bool = False,
         reset_when_done: bool = True,
         interruptor=None,
+        traj_pool: Optional[_TrajectoryPool] = None,
+        policy_version: Optional[torch.Tensor] = None,
     ):
         self.closed = True
 
@@ -603,12 +780,26 @@ class SyncDataCollector(DataCollectorBase):
         )
         self.return_same_td = return_same_td
 
+        # a pool that is not ours is reset by its owner
+        self._owns_traj_pool = traj_pool is None
+        self._traj_pool = traj_pool if traj_pool is not None else _TrajectoryPool()
+        self._policy_version = (
+            policy_version
+            if policy_version is not None
+            else torch.zeros((), dtype=torch.int64)
+        )
         self._tensordict = env.reset()
-        traj_ids = torch.arange(self.n_env, device=env.device).view(self.env.batch_size)
+        traj_ids = self._traj_pool.get_traj_and_increment(
+            self.n_env, device=env.device
+        ).view(self.env.batch_size)
         self._tensordict.set(
             ("collector", "traj_ids"),
             traj_ids,
         )
+        self._tensordict.set(
+            ("collector", "policy_version"),
+            torch.zeros(self.env.batch_size, dtype=torch.int64, device=env.device),
+        )
 
         with torch.no_grad():
             self._tensordict_out = env.fake_tensordict()
@@ -671,14 +862,15 @@ class SyncDataCollector(DataCollectorBase):
         # in addition to outputs of the policy, we add traj_ids and step_count to
         # _tensordict_out which will be collected during rollout
         self._tensordict_out = self._tensordict_out.to(self.storing_device)
-        self._tensordict_out.set(
-            ("collector", "traj_ids"),
-            torch.zeros(
-                *self._tensordict_out.batch_size,
-                dtype=torch.int64,
-                device=self.storing_device,
-            ),
-        )
+        for key in ("traj_ids", "policy_version"):
+            self._tensordict_out.set(
+                ("collector", key),
+                torch.zeros(
+                    *self._tensordict_out.batch_size,
+                    dtype=torch.int64,
+                    device=self.storing_device,
+                ),
+            )
         self._tensordict_out.refine_names(..., "time")
 
         if split_trajs is None:
@@ -697,9 +889,11 @@ class SyncDataCollector(DataCollectorBase):
 
     # for RPC
     def update_policy_weights_(
-        self, policy_weights: Optional[TensorDictBase] = None
+        self,
+        policy_weights: Optional[TensorDictBase] = None,
+        policy_version: Optional[int] = None,
     ) -> None:
-        super().update_policy_weights_(policy_weights)
+        super().update_policy_weights_(policy_weights, policy_version)
 
     def set_seed(self, seed: int, static_seed: bool = False) -> int:
         """Sets the seeds of the environments stored in the DataCollector.
@@ -815,8 +1009,8 @@ class SyncDataCollector(DataCollectorBase):
                 raise RuntimeError(
                     f"Env {self.env} was done after reset on specified '_reset' dimensions. This is (currently) not allowed."
                 )
-            traj_ids[traj_done_or_terminated] = traj_ids.max() + torch.arange(
-                1, traj_done_or_terminated.sum() + 1, device=traj_ids.device
+            traj_ids[traj_done_or_terminated] = self._traj_pool.get_traj_and_increment(
+                traj_done_or_terminated.sum().item(), device=traj_ids.device
             )
             self._tensordict.set(("collector", "traj_ids"), traj_ids)
 
@@ -833,19 +1027,29 @@ class SyncDataCollector(DataCollectorBase):
 
         # self._tensordict.fill_(("collector", "step_count"), 0)
         self._tensordict_out.fill_(("collector", "traj_ids"), -1)
+        # the frames are stamped with the version of the weights at the
+        # beginning of the batch
+        self._tensordict.fill_(("collector", "policy_version"), self.policy_version)
         tensordicts = []
         with set_exploration_type(self.exploration_type):
             for t in range(self.frames_per_batch):
+                if self._weight_store is not None:
+                    self._load_published_weights()
                 if self._frames < self.init_random_frames:
-                    self.env.rand_step(self._tensordict)
+                    with telemetry.timer("collector/env_step"):
+                        self.env.rand_step(self._tensordict)
                 else:
-                    self.policy(self._tensordict)
-                    self.env.step(self._tensordict)
+                    with telemetry.timer("collector/policy"):
+                        self.policy(self._tensordict)
+                    with telemetry.timer("collector/env_step"):
+                        self.env.step(self._tensordict)
 
                 # we must clone all the values, since the step / traj_id updates are done in-place
-                tensordicts.append(self._tensordict.to(self.storing_device))
+                with telemetry.timer("collector/device_transfer"):
+                    tensordicts.append(self._tensordict.to(self.storing_device))
 
-                self._step_and_maybe_reset()
+                with telemetry.timer("collector/step_mdp"):
+                    self._step_and_maybe_reset()
                 if (
                     self.interruptor is not None
                     and self.interruptor.collection_stopped()
@@ -880,6 +1084,20 @@ class SyncDataCollector(DataCollectorBase):
                         )
         return self._tensordict_out
 
+    def _load_published_weights(self) -> None:
+        # swaps in the weights published by the main process of a
+        # multiprocessed collector, if any, between two steps
+        version = self._weight_store.load(self.policy_weights)
+        if version is not None:
+            self._set_policy_version(version)
+            # the steps already collected in this batch share their entry with
+            # self._tensordict: a new tensor is set rather than filled in-place
+            policy_version = self._tensordict.get(("collector", "policy_version"))
+            self._tensordict.set(
+                ("collector", "policy_version"),
+                torch.full_like(policy_version, version),
+            )
+
     def reset(self, index=None, **kwargs) -> None:
         """Resets the environments to a new initial state."""
         # metadata
@@ -901,9 +1119,24 @@ class SyncDataCollector(DataCollectorBase):
             self._tensordict.zero_()
 
         self._tensordict.update(self.env.reset(**kwargs))
-        md["traj_ids"] = md["traj_ids"] - md["traj_ids"].min()
+        # the trajectories that have been reset get new ids
+        traj_ids = md["traj_ids"]
+        if index is None:
+            index = ...
+            if self._owns_traj_pool:
+                self._traj_pool.reset()
+        traj_ids[index] = self._traj_pool.get_traj_and_increment(
+            traj_ids[index].numel(), device=traj_ids.device
+        ).view_as(traj_ids[index])
         self._tensordict["collector"] = md
 
+    def gather_telemetry(self, reset: bool = True) -> None:
+        env = self.env
+        while isinstance(env, TransformedEnv):
+            env = env.base_env
+        if isinstance(env, _BatchedEnv):
+            env.gather_telemetry(reset=reset)
+
     def shutdown(self) -> None:
         """Shuts down all workers and/or closes the local environment."""
         if not self.closed:
@@ -1060,8 +1293,23 @@ class _MultiDataCollector(DataCollectorBase):
             Defaults to ``False``.
         preemptive_threshold (float, optional): a value between 0.0 and 1.0 that specifies the ratio of workers
             that will be allowed to finished collecting their rollout before the rest are forced to end early.
+        max_policy_lag (int, optional): the maximum number of weight updates
+            between the beginning of the collection of a frame and the moment
+            its batch is delivered. The frames are stamped with the version
+            of the policy that collected them in the
+            ``("collector", "policy_version")`` entry. Defaults to ``None``
+            (no bound).
+        drop_stale_batches (bool, optional): if ``True`` (default), the batches
+            containing frames beyond ``max_policy_lag`` are dropped. Dropped
+            frames still count towards ``total_frames``. Otherwise, the
+            batches are delivered with a boolean ``("collector", "stale")``
+            entry that can be used to mask or down-weight the stale frames in
+            the loss.
     """
 
+    # whether the weight updates are published in a _SharedWeightStore
+    _publish_weights = False
+
     def __init__(
         self,
         create_env_fn: Sequence[Callable[[], EnvBase]],
@@ -1089,6 +1337,8 @@ class _MultiDataCollector(DataCollectorBase):
         update_at_each_batch: bool = False,
         devices=None,
         storing_devices=None,
+        max_policy_lag: Optional[int] = None,
+        drop_stale_batches: bool = True,
     ):
         exploration_type = _convert_exploration_type(
             exploration_mode=exploration_mode, exploration_type=exploration_type
@@ -1231,13 +1481,13 @@ class _MultiDataCollector(DataCollectorBase):
         self.split_trajs = split_trajs
         self.init_random_frames = init_random_frames
         self.update_at_each_batch = update_at_each_batch
+        if max_policy_lag is not None and max_policy_lag < 0:
+            raise ValueError("max_policy_lag must be a non-negative integer.")
+        self.max_policy_lag = max_policy_lag
+        self.drop_stale_batches = drop_stale_batches
         self.exploration_type = exploration_type
         self.frames_per_worker = np.inf
         if preemptive_threshold is not None:
-            if _is_osx:
-                raise NotImplementedError(
-                    "Cannot use preemption on OSX due to Queue.qsize() not being implemented on this platform."
-                )
             self.preemptive_threshold = np.clip(preemptive_threshold, 0.0, 1.0)
             manager = _InterruptorManager()
             manager.start()
@@ -1245,6 +1495,16 @@ class _MultiDataCollector(DataCollectorBase):
         else:
             self.preemptive_threshold = 1.0
             self.interruptor = None
+        self._policy_version = torch.zeros((), dtype=torch.int64).share_memory_()
+        if self._publish_weights:
+            self._weight_stores = {
+                _device: _SharedWeightStore(weights)
+                for _device, weights in self._policy_weights_dict.items()
+            }
+        else:
+            self._weight_stores = None
+        # trajectory ids are drawn from a common pool to be unique across workers
+        self._traj_pool = _TrajectoryPool(shared=True)
         self._run_processes()
         self._exclude_private_keys = True
 
@@ -1252,7 +1512,18 @@ class _MultiDataCollector(DataCollectorBase):
     def frames_per_batch_worker(self):
         raise NotImplementedError
 
-    def update_policy_weights_(self, policy_weights=None) -> None:
+    def update_policy_weights_(self, policy_weights=None, policy_version=None) -> None:
+        if self._weight_stores is not None:
+            self._set_policy_version(policy_version)
+            for _device, store in self._weight_stores.items():
+                if policy_weights is not None:
+                    weights = policy_weights
+                elif self._get_weights_fn_dict[_device] is not None:
+                    weights = self._get_weights_fn_dict[_device]()
+                else:
+                    weights = self._policy_weights_dict[_device]
+                store.publish(weights, self.policy_version)
+            return
         for _device in self._policy_dict:
             if policy_weights is not None:
                 self._policy_weights_dict[_device].apply(lambda x: x.data).update_(
@@ -1262,11 +1533,29 @@ class _MultiDataCollector(DataCollectorBase):
                 self._policy_weights_dict[_device].update_(
                     self._get_weights_fn_dict[_device]()
                 )
+        self._set_policy_version(policy_version)
 
     @property
     def _queue_len(self) -> int:
         raise NotImplementedError
 
+    @property
+    def _worker_lookahead(self) -> int:
+        return 0
+
+    def _queue_get(self) -> Tuple[Any, int]:
+        """Waits for the next item sent by a worker.
+
+        The wait is blocking but wakes up every ``_TIMEOUT`` seconds to check
+        that no worker has died in the meantime.
+        """
+        with telemetry.timer("collector/queue_wait"):
+            while True:
+                try:
+                    return self.queue_out.get(timeout=_TIMEOUT)
+                except queue.Empty:
+                    _check_for_faulty_process(self.procs)
+
     def _run_processes(self) -> None:
         queue_out = mp.Queue(self._queue_len)  # sends data from proc to main
         self.procs = []
@@ -1298,7 +1587,15 @@ class _MultiDataCollector(DataCollectorBase):
                 "reset_when_done": self.reset_when_done,
                 "idx": i,
                 "interruptor": self.interruptor,
+                "lookahead": self._worker_lookahead,
+                "traj_pool": self._traj_pool,
             }
+            if self._weight_stores is not None:
+                # the workers keep track of the version of the weights they
+                # have loaded themselves
+                kwargs["weight_store"] = self._weight_stores[_device]
+            else:
+                kwargs["policy_version"] = self._policy_version
             proc = mp.Process(target=_main_async_collector, kwargs=kwargs)
             # proc.daemon can't be set as daemonic processes may be launched by the process itself
             try:
@@ -1386,6 +1683,7 @@ also that the state dict is synchronised across processes if needed."""
         """
         _check_for_faulty_process(self.procs)
         for idx in range(self.num_workers):
+            # the workers stop collecting once seeded, until they are reset
             self.pipes[idx].send(((seed, static_seed), "seed"))
             new_seed, msg = self.pipes[idx].recv()
             if msg != "seeded":
@@ -1406,6 +1704,19 @@ also that the state dict is synchronised across processes if needed."""
 
         if reset_idx is None:
             reset_idx = [True for _ in range(self.num_workers)]
+        # the workers drop the batch they are collecting and stop drawing
+        # trajectory ids before the pool is reset
+        for idx in range(self.num_workers):
+            if reset_idx[idx]:
+                self.pipes[idx].send((None, "pause"))
+        for idx in range(self.num_workers):
+            if reset_idx[idx]:
+                j, msg = self.pipes[idx].recv()
+                if msg != "paused":
+                    raise RuntimeError(f"Expected msg='paused', got {msg}")
+        if all(reset_idx):
+            # the trajectory ids restart from 0 when all the workers are reset
+            self._traj_pool.reset()
         for idx in range(self.num_workers):
             if reset_idx[idx]:
                 self.pipes[idx].send((None, "reset"))
@@ -1447,6 +1758,16 @@ also that the state dict is synchronised across processes if needed."""
             if msg != "loaded":
                 raise RuntimeError(f"Expected msg='loaded', got {msg}")
 
+    def gather_telemetry(self, reset: bool = True) -> None:
+        _check_for_faulty_process(self.procs)
+        for idx in range(self.num_workers):
+            self.pipes[idx].send(((telemetry.is_enabled(), reset), "telemetry"))
+        for idx in range(self.num_workers):
+            state_dict, msg = self.pipes[idx].recv()
+            if msg != "telemetry":
+                raise RuntimeError(f"Expected msg='telemetry', got {msg}")
+            telemetry.merge(state_dict)
+
 
 @accept_remote_rref_udf_invocation
 class MultiSyncDataCollector(_MultiDataCollector):
@@ -1494,6 +1815,17 @@ class MultiSyncDataCollector(_MultiDataCollector):
     trajectory and the start of the next collection.
     This class can be safely used with online RL algorithms.
 
+    When ``lookahead=k`` is passed, each worker keeps on collecting up to ``k``
+    batches ahead of the main process, writing them in a rotating set of ``k``
+    shared buffers, such that the collection of the next batch overlaps with
+    the optimization performed on the current one. As with every collector,
+    the ``("collector", "policy_version")`` entry counts the calls
+    to :meth:`~.update_policy_weights_` that preceded the beginning of the
+    collection of a batch. Note that with a lookahead, a batch is (at least partially)
+    collected with the weights of the previous optimization round: with
+    ``k=1`` on-policy algorithms (e.g. PPO) will train on data that lags by
+    one batch.
+
     Examples:
         >>> from torchrl.envs.libs.gym import GymEnv
         >>> from torchrl.envs import StepCounter
@@ -1545,6 +1877,31 @@ class MultiSyncDataCollector(_MultiDataCollector):
     """
 
     __doc__ += _MultiDataCollector.__doc__
+    __doc__ += """        lookahead (int, optional): number of batches each worker is allowed
+            to collect ahead of the main process. Defaults to ``0`` (the
+            collection only starts when the next batch is queried).
+    """
+
+    def __init__(
+        self, *args, lookahead: int = 0, return_same_td: bool = False, **kwargs
+    ):
+        if lookahead < 0:
+            raise ValueError("lookahead must be a non-negative integer.")
+        if lookahead and kwargs.get("preemptive_threshold") is not None:
+            raise ValueError(
+                "lookahead and preemptive_threshold cannot be used together."
+            )
+        self.lookahead = lookahead
+        self.return_same_td = return_same_td
+        super().__init__(*args, **kwargs)
+        # per worker: shared buffers, ready batches and batches being collected
+        self._lookahead_buffers = [{} for _ in range(self.num_workers)]
+        self._lookahead_ready = [deque() for _ in range(self.num_workers)]
+        self._lookahead_pending = [0 for _ in range(self.num_workers)]
+        # the buffers sent by the workers with their first batch, kept across
+        # iterations since the workers only send them once
+        self._worker_buffers = {}
+        self._out_buffer = None
 
     # for RPC
     def next(self):
@@ -1568,9 +1925,15 @@ class MultiSyncDataCollector(_MultiDataCollector):
 
     # for RPC
     def update_policy_weights_(
-        self, policy_weights: Optional[TensorDictBase] = None
+        self,
+        policy_weights: Optional[TensorDictBase] = None,
+        policy_version: Optional[int] = None,
     ) -> None:
-        super().update_policy_weights_(policy_weights)
+        super().update_policy_weights_(policy_weights, policy_version)
+
+    @property
+    def _worker_lookahead(self) -> int:
+        return self.lookahead
 
     @property
     def frames_per_batch_worker(self):
@@ -1587,45 +1950,127 @@ class MultiSyncDataCollector(_MultiDataCollector):
 
     @property
     def _queue_len(self) -> int:
-        return self.num_workers
+        return self.num_workers * max(self.lookahead, 1)
+
+    @staticmethod
+    def _gather(
+        buffers: Sequence[TensorDictBase], out_buffer: Optional[TensorDictBase]
+    ) -> TensorDictBase:
+        """Concatenates the worker buffers, in ``out_buffer`` if provided."""
+        if all(buffer.device == buffers[0].device for buffer in buffers):
+            return torch.cat(buffers, 0, out=out_buffer)
+        return torch.cat([buffer.cpu() for buffer in buffers], 0, out=out_buffer)
+
+    def _share_out_buffer(self, buffers: Sequence[TensorDictBase]) -> TensorDictBase:
+        """Allocates the shared output buffer and hands each worker its slice.
+
+        From then on, the workers write their rollouts directly in the output
+        buffer and the batch needs not be gathered anymore.
+        """
+        out_buffer = self._gather(buffers, None).share_memory_()
+        start = 0
+        for idx, buffer in enumerate(buffers):
+            stop = start + buffer.shape[0]
+            self.pipes[idx].send((out_buffer[start:stop], "set_out_buffer"))
+            start = stop
+        return out_buffer
+
+    def _postproc_batch(
+        self, out_buffer: TensorDictBase, clone: bool = True
+    ) -> Tuple[TensorDictBase, int]:
+        if self.split_trajs:
+            out = split_trajectories(out_buffer, prefix="collector")
+            frames = out.get(("collector", "mask")).sum().item()
+        else:
+            out = out_buffer.clone() if clone else out_buffer
+            frames = prod(out.shape)
+        if self.postprocs:
+            self.postprocs = self.postprocs.to(out.device)
+            out = self.postprocs(out)
+        if self._exclude_private_keys:
+            excluded_keys = [key for key in out.keys() if key.startswith("_")]
+            if excluded_keys:
+                out = out.exclude(*excluded_keys)
+        return out, frames
+
+    def _continue_msg(self, frames: int) -> str:
+        if frames < self.init_random_frames:
+            return "continue_random"
+        return "continue"
+
+    def _iterator_lookahead(self) -> Iterator[TensorDictBase]:
+        frames = 0
+        out_buffer = None
+        buffers = self._lookahead_buffers
+        ready = self._lookahead_ready
+        pending = self._lookahead_pending
+        while frames < self.total_frames:
+            _check_for_faulty_process(self.procs)
+            if self.update_at_each_batch:
+                self.update_policy_weights_()
+            # make sure that each worker has as many batches in flight as it can
+            for idx in range(self.num_workers):
+                while pending[idx] + len(ready[idx]) < self.lookahead:
+                    self.pipes[idx].send((None, self._continue_msg(frames)))
+                    pending[idx] += 1
+            while not all(ready):
+                (data, idx, slot), _ = self._queue_get()
+                if data is not None:
+                    buffers[idx][slot] = data
+                pending[idx] -= 1
+                ready[idx].append(slot)
+            slots = [ready[idx].popleft() for idx in range(self.num_workers)]
+            # gathering the batch is the only copy we need to make
+            out_buffer = self._gather(
+                [buffers[idx][slot] for idx, slot in enumerate(slots)],
+                out_buffer if self.return_same_td else None,
+            )
+            out, batch_frames = self._postproc_batch(out_buffer, clone=False)
+            frames += batch_frames
+            # the buffers have been copied and can be released
+            for idx in range(self.num_workers):
+                self.pipes[idx].send((None, self._continue_msg(frames)))
+                pending[idx] += 1
+            out = self._filter_stale(out)
+            if out is None:
+                continue
+            yield out
+            del out
 
     def iterator(self) -> Iterator[TensorDictBase]:
+        if self.lookahead:
+            yield from self._iterator_lookahead()
+            return
         i = -1
         frames = 0
-        buffers = {}
+        buffers = self._worker_buffers
         dones = [False for _ in range(self.num_workers)]
         workers_frames = [0 for _ in range(self.num_workers)]
-        same_device = None
-        out_buffer = None
+        # the workers can write in a common buffer if they store data on the
+        # same device
+        zero_copy = len(set(self.storing_device)) == 1
 
         while not all(dones) and frames < self.total_frames:
             _check_for_faulty_process(self.procs)
             if self.update_at_each_batch:
                 self.update_policy_weights_()
 
+            preempt = self.interruptor is not None and self.preemptive_threshold < 1.0
+            if preempt:
+                self.interruptor.start_collection()
             for idx in range(self.num_workers):
-                if frames < self.init_random_frames:
-                    msg = "continue_random"
-                else:
-                    msg = "continue"
-                self.pipes[idx].send((None, msg))
+                self.pipes[idx].send((None, self._continue_msg(frames)))
 
             i += 1
-            max_traj_idx = None
 
-            if self.interruptor is not None and self.preemptive_threshold < 1.0:
-                self.interruptor.start_collection()
-                while self.queue_out.qsize() < int(
+            for n_ready in range(self.num_workers):
+                if preempt and n_ready == int(
                     self.num_workers * self.preemptive_threshold
                 ):
-                    continue
-                self.interruptor.stop_collection()
-                # Now wait for stragglers to return
-                while self.queue_out.qsize() < int(self.num_workers):
-                    continue
-
-            for _ in range(self.num_workers):
-                new_data, j = self.queue_out.get()
+                    # enough workers are done: the others are asked to stop
+                    # early and send what they have collected so far
+                    self.interruptor.stop_collection()
+                new_data, j = self._queue_get()
                 if j == 0:
                     data, idx = new_data
                     buffers[idx] = data
@@ -1635,49 +2080,26 @@ class MultiSyncDataCollector(_MultiDataCollector):
 
                 if workers_frames[idx] >= self.total_frames:
                     dones[idx] = True
-            # we have to correct the traj_ids to make sure that they don't overlap
-            for idx in range(self.num_workers):
-                traj_ids = buffers[idx].get(("collector", "traj_ids"))
-                if max_traj_idx is not None:
-                    traj_ids[traj_ids != -1] += max_traj_idx
-                    # out_tensordicts_shared[idx].set("traj_ids", traj_ids)
-                max_traj_idx = traj_ids.max().item() + 1
-                # out = out_tensordicts_shared[idx]
-            if same_device is None:
-                prev_device = None
-                same_device = True
-                for item in buffers.values():
-                    if prev_device is None:
-                        prev_device = item.device
-                    else:
-                        same_device = same_device and (item.device == prev_device)
-
-            if same_device:
-                out_buffer = torch.cat(list(buffers.values()), 0, out=out_buffer)
-            else:
-                out_buffer = torch.cat(
-                    [item.cpu() for item in buffers.values()],
-                    0,
-                    out=out_buffer,
+            if zero_copy and self._out_buffer is None:
+                self._out_buffer = self._share_out_buffer(
+                    [buffers[idx] for idx in range(self.num_workers)]
                 )
-
-            if self.split_trajs:
-                out = split_trajectories(out_buffer, prefix="collector")
-                frames += out.get(("collector", "mask")).sum().item()
-            else:
-                out = out_buffer.clone()
-                frames += prod(out.shape)
-            if self.postprocs:
-                self.postprocs = self.postprocs.to(out.device)
-                out = self.postprocs(out)
-            if self._exclude_private_keys:
-                excluded_keys = [key for key in out.keys() if key.startswith("_")]
-                if excluded_keys:
-                    out = out.exclude(*excluded_keys)
+            elif not zero_copy:
+                self._out_buffer = self._gather(
+                    [buffers[idx] for idx in range(self.num_workers)],
+                    self._out_buffer,
+                )
+            out_buffer = self._out_buffer
+            out, batch_frames = self._postproc_batch(
+                out_buffer, clone=not self.return_same_td
+            )
+            frames += batch_frames
+            out = self._filter_stale(out)
+            if out is None:
+                continue
             yield out
             del out
 
-        del buffers
         # We shall not call shutdown just yet as user may want to retrieve state_dict
         # self._shutdown_main()
 
@@ -1720,6 +2142,12 @@ class MultiaSyncDataCollector(_MultiDataCollector):
     the batch of rollouts is collected and the next call to the iterator.
     This class can be safely used with offline RL algorithms.
 
+    The workers hold their own copy of the policy weights. :meth:`~.update_policy_weights_`
+    publishes the new weights in a double-buffered shared memory store and
+    returns without waiting for the workers, which load the latest weights
+    between two environment steps. The frames collected after a worker has
+    loaded new weights are stamped with their version.
+
     Examples:
         >>> from torchrl.envs.libs.gym import GymEnv
         >>> from tensordict.nn import TensorDictModule
@@ -1771,10 +2199,14 @@ class MultiaSyncDataCollector(_MultiDataCollector):
 
     __doc__ += _MultiDataCollector.__doc__
 
+    _publish_weights = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.out_tensordicts = {}
         self.running = False
+        # whether a batch has been requested from each worker and not received
+        self._requested = [False for _ in range(self.num_workers)]
 
         if self.postprocs is not None:
             postproc = self.postprocs
@@ -1805,38 +2237,52 @@ class MultiaSyncDataCollector(_MultiDataCollector):
 
     # for RPC
     def update_policy_weights_(
-        self, policy_weights: Optional[TensorDictBase] = None
+        self,
+        policy_weights: Optional[TensorDictBase] = None,
+        policy_version: Optional[int] = None,
     ) -> None:
-        super().update_policy_weights_(policy_weights)
+        super().update_policy_weights_(policy_weights, policy_version)
 
     @property
     def frames_per_batch_worker(self):
         return self.requested_frames_per_batch
 
     def _get_from_queue(self, timeout=None) -> Tuple[int, int, TensorDictBase]:
-        new_data, j = self.queue_out.get(timeout=timeout)
+        if timeout is None:
+            new_data, j = self._queue_get()
+        else:
+            new_data, j = self.queue_out.get(timeout=timeout)
         if j == 0:
             data, idx = new_data
             self.out_tensordicts[idx] = data
         else:
             idx = new_data
+        self._requested[idx] = False
         # we clone the data to make sure that we'll be working with a fixed copy
         out = self.out_tensordicts[idx].clone()
         return idx, j, out
 
     @property
     def _queue_len(self) -> int:
-        return 1
+        # each worker has at most one batch requested at any time
+        return self.num_workers
+
+    def _request(self, idx: int, msg: str) -> None:
+        self.pipes[idx].send((idx, msg))
+        self._requested[idx] = True
 
     def iterator(self) -> Iterator[TensorDictBase]:
         if self.update_at_each_batch:
             self.update_policy_weights_()
 
         for i in range(self.num_workers):
+            # the batches requested by a previous iteration are still to come
+            if self._requested[i]:
+                continue
             if self.init_random_frames > 0:
-                self.pipes[i].send((None, "continue_random"))
+                self._request(i, "continue_random")
             else:
-                self.pipes[i].send((None, "continue"))
+                self._request(i, "continue")
         self.running = True
         i = -1
         self._frames = 0
@@ -1861,10 +2307,13 @@ class MultiaSyncDataCollector(_MultiDataCollector):
                 msg = "continue_random"
             else:
                 msg = "continue"
-            self.pipes[idx].send((idx, msg))
+            self._request(idx, msg)
             if self._exclude_private_keys:
                 excluded_keys = [key for key in out.keys() if key.startswith("_")]
                 out = out.exclude(*excluded_keys)
+            out = self._filter_stale(out)
+            if out is None:
+                continue
             yield out
 
         # We don't want to shutdown yet, the user may want to call state_dict before
@@ -1876,19 +2325,6 @@ class MultiaSyncDataCollector(_MultiDataCollector):
             del self.out_tensordicts
         return super()._shutdown_main()
 
-    def reset(self, reset_idx: Optional[Sequence[bool]] = None) -> None:
-        super().reset(reset_idx)
-        if self.queue_out.full():
-            time.sleep(_TIMEOUT)  # wait until queue is empty
-        if self.queue_out.full():
-            raise Exception("self.queue_out is full")
-        if self.running:
-            for idx in range(self.num_workers):
-                if self._frames < self.init_random_frames:
-                    self.pipes[idx].send((idx, "continue_random"))
-                else:
-                    self.pipes[idx].send((idx, "continue"))
-
 
 @accept_remote_rref_udf_invocation
 class aSyncDataCollector(MultiaSyncDataCollector):
@@ -2026,6 +2462,10 @@ def _main_async_collector(
     reset_when_done: bool = True,
     verbose: bool = VERBOSE,
     interruptor=None,
+    lookahead: int = 0,
+    policy_version: Optional[torch.Tensor] = None,
+    traj_pool: Optional[_TrajectoryPool] = None,
+    weight_store: Optional[_SharedWeightStore] = None,
 ) -> None:
     if storing_device.type == "cuda":
         event = torch.cuda.Event()
@@ -2034,7 +2474,13 @@ def _main_async_collector(
     pipe_parent.close()
     # init variables that will be cleared when closing
     tensordict = data = d = data_in = inner_collector = dc_iter = None
+    # rotating shared buffers used when collecting ahead of the main process
+    lookahead_buffers = []
 
+    if weight_store is not None and isinstance(policy, nn.Module):
+        # the weights received are shared with the main process, which
+        # publishes its updates in the store instead
+        policy = deepcopy(policy)
     # send the policy to device
     try:
         policy = policy.to(device)
@@ -2060,68 +2506,42 @@ def _main_async_collector(
         reset_when_done=reset_when_done,
         return_same_td=True,
         interruptor=interruptor,
+        traj_pool=traj_pool,
+        policy_version=policy_version,
     )
+    inner_collector._weight_store = weight_store
     if verbose:
         print("Sync data collector created")
     dc_iter = iter(inner_collector)
     j = 0
+    # number of batches requested by the main process that are yet to be sent
+    credits = 0
+    # commands received while collecting, to be executed after the batch
+    pending_msgs = deque()
+    # set between a "seed" or "pause" command and the "reset" that follows it,
+    # during which no step is taken and no trajectory id is drawn
+    paused = False
     pipe_child.send("instantiated")
 
-    has_timed_out = False
-    counter = 0
     while True:
-        _timeout = _TIMEOUT if not has_timed_out else 1e-3
-        if pipe_child.poll(_timeout):
-            counter = 0
-            data_in, msg = pipe_child.recv()
-            if verbose:
-                print(f"worker {idx} received {msg}")
-        else:
-            if verbose:
-                print(f"poll failed, j={j}, worker={idx}")
-            # default is "continue" (after first iteration)
-            # this is expected to happen if queue_out reached the timeout, but no new msg was waiting in the pipe
-            # in that case, the main process probably expects the worker to continue collect data
-            if has_timed_out:
-                counter = 0
-                # has_timed_out is True if the process failed to send data, which will
-                # typically occur if main has taken another batch (i.e. the queue is Full).
-                # In this case, msg is the previous msg sent by main, which will typically be "continue"
-                # If it's not the case, it is not expected that has_timed_out is True.
-                if msg not in ("continue", "continue_random"):
-                    raise RuntimeError(f"Unexpected message after time out: msg={msg}")
-            else:
-                # if has_timed_out is False, then the time out does not come from the fact that the queue is Full.
-                # this means that our process has been waiting for a command from main in vain, while main was not
-                # receiving data.
-                # This will occur if main is busy doing something else (e.g. computing loss etc).
-
-                counter += _timeout
-                if verbose:
-                    print(f"worker {idx} has counter {counter}")
-                if counter >= (_MAX_IDLE_COUNT * _TIMEOUT):
-                    raise RuntimeError(
-                        f"This process waited for {counter} seconds "
-                        f"without receiving a command from main. Consider increasing the maximum idle count "
-                        f"if this is expected via the environment variable MAX_IDLE_COUNT "
-                        f"(current value is {_MAX_IDLE_COUNT})."
-                        f"\nIf this occurs at the end of a function or program, it means that your collector has not been "
-                        f"collected, consider calling `collector.shutdown()` or `del collector` before ending the program."
-                    )
-                continue
-        if msg in ("continue", "continue_random"):
-            if msg == "continue_random":
-                inner_collector.init_random_frames = float("inf")
-            else:
-                inner_collector.init_random_frames = -1
-
+        if credits and not pending_msgs and not paused:
             d = next(dc_iter)
-            if pipe_child.poll(_MIN_TIMEOUT):
-                # in this case, main send a message to the worker while it was busy collecting trajectories.
-                # In that case, we skip the collected trajectory and get the message from main. This is faster than
-                # sending the trajectory in the queue until timeout when it's never going to be received.
+            while pipe_child.poll():
+                pending_msgs.append(pipe_child.recv())
+            if any(msg in ("seed", "pause", "reset") for _, msg in pending_msgs):
+                # the environments are about to be reset: the batch is
+                # dropped, and collected again once the worker has been reset
                 continue
-            if j == 0:
+            if lookahead:
+                slot = j % lookahead
+                if j < lookahead:
+                    buffer = d.clone().share_memory_()
+                    lookahead_buffers.append(buffer)
+                    data = (buffer, idx, slot)
+                else:
+                    lookahead_buffers[slot].update_(d)
+                    data = (None, idx, slot)
+            elif j == 0:
                 tensordict = d
                 if storing_device is not None and tensordict.device != storing_device:
                     raise RuntimeError(
@@ -2138,23 +2558,53 @@ def _main_async_collector(
             if event is not None:
                 event.record()
                 event.synchronize()
-            try:
-                queue_out.put((data, j), timeout=_TIMEOUT)
-                if verbose:
-                    print(f"worker {idx} successfully sent data")
-                j += 1
-                has_timed_out = False
-                continue
-            except queue.Full:
-                if verbose:
-                    print(f"worker {idx} has timed out")
-                has_timed_out = True
-                continue
+            # the main process never requests more batches than the queue can
+            # hold, hence this call does not block
+            queue_out.put((data, j))
+            if verbose:
+                print(f"worker {idx} successfully sent data")
+            credits -= 1
+            j += 1
+            continue
+
+        if pending_msgs:
+            data_in, msg = pending_msgs.popleft()
+        elif pipe_child.poll(_MAX_IDLE_COUNT * _TIMEOUT):
+            data_in, msg = pipe_child.recv()
+        else:
+            # main has not sent any command for a long time, while no batch
+            # was requested.
+            raise RuntimeError(
+                f"This process waited for {_MAX_IDLE_COUNT * _TIMEOUT} seconds "
+                f"without receiving a command from main. Consider increasing the maximum idle count "
+                f"if this is expected via the environment variable MAX_IDLE_COUNT "
+                f"(current value is {_MAX_IDLE_COUNT})."
+                f"\nIf this occurs at the end of a function or program, it means that your collector has not been "
+                f"collected, consider calling `collector.shutdown()` or `del collector` before ending the program."
+            )
+        if verbose:
+            print(f"worker {idx} received {msg}")
+
+        if msg in ("continue", "continue_random"):
+            if msg == "continue_random":
+                inner_collector.init_random_frames = float("inf")
+            else:
+                inner_collector.init_random_frames = -1
+            credits += 1
+            continue
+
+        elif msg == "set_out_buffer":
+            # data_in is this worker's slice of the main output buffer: the
+            # rollouts are now written there directly
+            tensordict = inner_collector._tensordict_out = data_in
+            continue
 
         elif msg == "update":
-            inner_collector.update_policy_weights_()
+            # the version counter is shared with main, which has updated it
+            inner_collector.update_policy_weights_(
+                policy_version=inner_collector.policy_version
+            )
             pipe_child.send((j, "updated"))
-            has_timed_out = False
             continue
 
         elif msg == "seed":
@@ -2162,12 +2612,18 @@ def _main_async_collector(
             new_seed = inner_collector.set_seed(data_in, static_seed=static_seed)
             torch.manual_seed(data_in)
             np.random.seed(data_in)
+            paused = True
             pipe_child.send((new_seed, "seeded"))
-            has_timed_out = False
+            continue
+
+        elif msg == "pause":
+            paused = True
+            pipe_child.send((j, "paused"))
             continue
 
         elif msg == "reset":
             inner_collector.reset()
+            paused = False
             pipe_child.send((j, "reset"))
             continue
 
@@ -2176,18 +2632,27 @@ def _main_async_collector(
             # send state_dict to cpu first
             state_dict = recursive_map_to_cpu(state_dict)
             pipe_child.send((state_dict, "state_dict"))
-            has_timed_out = False
             continue
 
         elif msg == "load_state_dict":
             state_dict = data_in
             inner_collector.load_state_dict(state_dict)
             pipe_child.send((j, "loaded"))
-            has_timed_out = False
+            continue
+
+        elif msg == "telemetry":
+            enabled, reset = data_in
+            telemetry.set_enabled(enabled)
+            # the envs of this worker report to this worker's registry
+            inner_collector.gather_telemetry(reset=reset)
+            state_dict = telemetry.state_dict()
+            if reset:
+                telemetry.reset()
+            pipe_child.send((state_dict, "telemetry"))
             continue
 
         elif msg == "close":
-            del tensordict, data, d, data_in
+            del tensordict, data, d, data_in, lookahead_buffers
             inner_collector.shutdown()
             del inner_collector, dc_iter
             pipe_child.send("closed")
@@ -0,0 +1,123 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Direct writes of the collected data in a replay buffer storage."""
+from copy import copy
+
+import numpy as np
+import torch
+from tensordict import TensorDict, TensorDictBase
+
+from torchrl.data.replay_buffers.replay_buffers import TensorDictReplayBuffer
+from torchrl.data.replay_buffers.storages import LazyMemmapStorage
+from torchrl.data.replay_buffers.writers import RoundRobinWriter
+
+
+class _DirectWriter:
+    """Lets the collection nodes write their data in the storage of a replay buffer.
+
+    The trainer reserves the indices a batch will be written at, the node that
+    collects the batch writes it in the storage and sends back its metadata
+    (the ``"collector"`` entries and the ``"index"`` of each frame) only. Once
+    the metadata is received, the trainer registers the indices in the
+    replay buffer, which can then sample them.
+
+    The storage must be a :class:`~torchrl.data.replay_buffers.LazyMemmapStorage`
+    whose ``scratch_dir`` is visible from all the nodes (e.g. a shared
+    filesystem).
+
+    Args:
+        replay_buffer (ReplayBuffer): the replay buffer to fill. Its writer
+            must be a :class:`~torchrl.data.replay_buffers.RoundRobinWriter`
+            and it cannot have transforms.
+    """
+
+    def __init__(self, replay_buffer):
+        if not isinstance(replay_buffer._storage, LazyMemmapStorage):
+            raise ValueError(
+                "Direct writes require a LazyMemmapStorage, got "
+                f"{type(replay_buffer._storage)}."
+            )
+        if not isinstance(replay_buffer._writer, RoundRobinWriter):
+            raise ValueError(
+                "Direct writes require a RoundRobinWriter, got "
+                f"{type(replay_buffer._writer)}."
+            )
+        if replay_buffer._transform is not None and len(replay_buffer._transform):
+            raise ValueError("Direct writes do not support replay buffer transforms.")
+        self.storage = replay_buffer._storage
+        self.wrap = isinstance(replay_buffer, TensorDictReplayBuffer)
+        self._replay_buffer = replay_buffer
+        self._written = None
+
+    def __getstate__(self):
+        # the nodes only need the storage, without the buffers attached to it
+        storage = copy(self.storage)
+        storage._attached_entities = set()
+        return {"storage": storage, "wrap": self.wrap}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._replay_buffer = None
+        self._written = None
+
+    def _as_stored(self, data: TensorDictBase, index: torch.Tensor) -> TensorDictBase:
+        if not self.wrap:
+            return data
+        # the layout of the data written by TensorDictReplayBuffer.extend
+        return TensorDict(
+            {"_data": data, "index": index.to(torch.int)}, batch_size=data.shape
+        )
+
+    # trainer side
+    def init_storage(self, data: TensorDictBase) -> None:
+        """Creates the storage from an example batch, if it does not exist yet."""
+        if self.storage.initialized:
+            return
+        data = data.reshape(-1)[:1]
+        index = torch.zeros(1, dtype=torch.int64)
+        self.storage._init(self._as_stored(data, index)[0])
+
+    @staticmethod
+    def metadata(data: TensorDictBase) -> TensorDictBase:
+        """The part of a batch that is sent back to the trainer."""
+        return data.select("collector").set(
+            "index", torch.zeros(data.shape, dtype=torch.int64)
+        )
+
+    def reserve(self, num_frames: int) -> int:
+        """Reserves the indices of the next ``num_frames`` frames and returns the first one."""
+        with self._replay_buffer._replay_lock:
+            index = self._replay_buffer._writer.reserve(num_frames)
+        return int(index[0])
+
+    def register(self, index: torch.Tensor) -> None:
+        """Makes the frames written at ``index`` available to the replay buffer."""
+        index = index.reshape(-1).numpy()
+        replay_buffer = self._replay_buffer
+        storage = self.storage
+        max_size = storage.max_size
+        if storage._len < max_size:
+            # batches can be written in any order: the storage only holds the
+            # frames up to the first index that has not been written yet
+            if self._written is None:
+                self._written = np.zeros(max_size, dtype=bool)
+            self._written[index] = True
+            unwritten = np.flatnonzero(~self._written)
+            storage._len = max(
+                storage._len, int(unwritten[0]) if unwritten.size else max_size
+            )
+        with replay_buffer._replay_lock:
+            for ent in storage._attached_entities:
+                ent.mark_update(index)
+            replay_buffer._sampler.extend(index)
+
+    # node side
+    def write(self, data: TensorDictBase, start: int) -> TensorDictBase:
+        """Writes a batch from index ``start`` onwards and returns its metadata."""
+        flat_data = data.reshape(-1)
+        index = torch.arange(start, start + flat_data.numel()) % self.storage.max_size
+        self.storage.set(index, self._as_stored(flat_data, index))
+        return data.select("collector").set("index", index.view(data.shape))
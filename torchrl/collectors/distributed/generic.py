@@ -29,6 +29,8 @@ from torchrl.collectors.distributed.default_configs import (
     MAX_TIME_TO_CONNECT,
     TCP_PORT,
 )
+from torchrl.collectors.distributed.direct_write import _DirectWriter
+from torchrl.collectors.distributed.weight_transfer import _WeightTransfer
 from torchrl.collectors.utils import split_trajectories
 from torchrl.data.utils import CloudpickleWrapper
 from torchrl.envs import EnvBase, EnvCreator
@@ -102,6 +104,8 @@ def _distributed_init_delayed(
     policy = output["policy"]
     frames_per_batch = output["frames_per_batch"]
     collector_kwargs = output["collector_kwargs"]
+    weight_transfer = output["weight_transfer"]
+    direct_writer = output["direct_writer"]
     _run_collector(
         _store,
         sync,
@@ -112,6 +116,8 @@ def _distributed_init_delayed(
         frames_per_batch,
         collector_kwargs,
         verbose=verbose,
+        weight_transfer=weight_transfer,
+        direct_writer=direct_writer,
     )
 
 
@@ -129,6 +135,8 @@ def _distributed_init_collection_node(
     frames_per_batch,
     collector_kwargs,
     verbose=True,
+    weight_transfer=None,
+    direct_writer=None,
 ):
     _store = _node_init_dist(rank, world_size, backend, rank0_ip, tcpport, verbose)
     _run_collector(
@@ -141,6 +149,8 @@ def _distributed_init_collection_node(
         frames_per_batch,
         collector_kwargs,
         verbose=verbose,
+        weight_transfer=weight_transfer,
+        direct_writer=direct_writer,
     )
 
 
@@ -154,8 +164,12 @@ def _run_collector(
     frames_per_batch,
     collector_kwargs,
     verbose=True,
+    weight_transfer=None,
+    direct_writer=None,
 ):
     rank = torch.distributed.get_rank()
+    if weight_transfer is None:
+        weight_transfer = _WeightTransfer()
     if verbose:
         print(f"node with rank {rank} -- creating collector of type {collector_class}")
     if not issubclass(collector_class, SyncDataCollector):
@@ -197,12 +211,17 @@ def _run_collector(
         if verbose:
             print(f"node with rank {rank} -- new instruction: {instruction}")
         _store.delete_key(f"NODE_{rank}_in")
-        if instruction == b"continue":
+        if instruction.startswith(b"continue"):
             _store.set(f"NODE_{rank}_status", b"busy")
             if verbose:
                 print(f"node with rank {rank} -- new data")
             data = collector.next()
             total_frames += data.numel()
+            if direct_writer is not None:
+                # the data is written in the replay buffer storage, the
+                # trainer only receives its metadata
+                start = int(instruction[len(b"continue_") :])
+                data = direct_writer.write(data, start)
             if verbose:
                 print(f"got data, total frames = {total_frames}")
                 print(f"node with rank {rank} -- sending {data}")
@@ -221,16 +240,26 @@ def _run_collector(
                 pass
             _store.set(f"NODE_{rank}_out", b"down")
             break
-        elif instruction == b"update_weights":
-            if sync:
-                policy_weights.recv(0)
+        elif instruction in (
+            b"update_weights",
+            b"broadcast_weights",
+            b"broadcast_weights_delta",
+        ):
+            updated = weight_transfer.receive(
+                policy_weights,
+                delta=instruction == b"broadcast_weights_delta",
+                broadcast=instruction != b"update_weights",
+                sync=sync,
+            )
+            if updated:
+                # the policy has been updated: we can simply update the weights
+                collector.update_policy_weights_(
+                    policy_weights, policy_version=weight_transfer.version
+                )
+                _store.set(f"NODE_{rank}_out", b"updated")
             else:
-                # without further arguments, irecv blocks until weights have
-                # been updated
-                policy_weights.irecv(0)
-            # the policy has been updated: we can simply update the weights
-            collector.update_policy_weights_(policy_weights)
-            _store.set(f"NODE_{rank}_out", b"updated")
+                # the delta does not apply to the weights of this node
+                _store.set(f"NODE_{rank}_out", b"stale")
         elif instruction.startswith(b"seeding"):
             seed = int(instruction.split(b"seeding_"))
             new_seed = collector.set_seed(seed)
@@ -354,6 +383,49 @@ class DistributedDataCollector(DataCollectorBase):
             to learn more.
             Defaults to ``"submitit"``.
         tcp_port (int, optional): the TCP port to be used. Defaults to 10003.
+        broadcast_method (str, optional): how the weights are sent when all the
+            nodes are updated at once. ``"p2p"`` sends the weights to each node
+            in turn. ``"collective"`` uses :func:`torch.distributed.broadcast`.
+            ``"tree"`` forwards the weights from node to node along a binomial
+            tree, such that the trainer only sends ``ceil(log2(num_workers + 1))``
+            copies of the weights. Note that with the last two methods, the
+            update completes once every node is done with its current batch.
+            Defaults to ``"p2p"``.
+        weight_compression (str, optional): ``"fp16"`` or ``"bf16"`` cast the
+            floating point weights for the transfer. ``"topk"`` sends, for each
+            parameter, the ``topk_ratio`` entries that changed the most since
+            the previous update, the rest being carried over to the following
+            updates. Nodes that miss a ``"topk"`` update (e.g. because they have
+            been updated individually) are sent the full weights instead.
+            Defaults to ``None`` (no compression).
+        topk_ratio (float, optional): the ratio of entries sent with
+            ``weight_compression="topk"``. Defaults to ``0.01``.
+        max_policy_lag (int, optional): the maximum number of rounds of
+            weight updates between the beginning of the collection of a frame
+            and the moment its batch is delivered. A round ends when a node is
+            updated twice, such that updating the nodes one at a time counts
+            once. The frames are stamped with the version of the weights of
+            the node that collected them in the
+            ``("collector", "policy_version")`` entry.
+            Defaults to ``None`` (no bound).
+        drop_stale_batches (bool, optional): if ``True`` (default), the batches
+            containing frames beyond ``max_policy_lag`` are dropped. Dropped
+            frames still count towards ``total_frames``. Otherwise, the
+            batches are delivered with a boolean ``("collector", "stale")``
+            entry.
+        replay_buffer (ReplayBuffer, optional): if provided, the nodes write
+            the frames they collect in the storage of this replay buffer and
+            the trainer only receives the ``"collector"`` entries of the
+            batches along with the ``"index"`` of each frame in the storage.
+            The frames are written individually (i.e., the batches are
+            flattened) and are registered in the replay buffer once their
+            batch has been received. The storage must be a
+            :class:`~torchrl.data.replay_buffers.LazyMemmapStorage` whose
+            ``scratch_dir`` can be accessed by every node (e.g. on a shared
+            filesystem), and the writer a
+            :class:`~torchrl.data.replay_buffers.RoundRobinWriter`.
+            Incompatible with ``postproc`` and ``split_trajs``.
+            Defaults to ``None`` (the data is sent to the trainer).
     """
 
     _VERBOSE = VERBOSE  # for debugging
@@ -384,6 +456,12 @@ class DistributedDataCollector(DataCollectorBase):
         max_weight_update_interval=-1,
         launcher="submitit",
         tcp_port=None,
+        broadcast_method="p2p",
+        weight_compression=None,
+        topk_ratio=0.01,
+        max_policy_lag=None,
+        drop_stale_batches=True,
+        replay_buffer=None,
     ):
         exploration_type = _convert_exploration_type(
             exploration_mode=exploration_mode, exploration_type=exploration_type
@@ -404,6 +482,11 @@ class DistributedDataCollector(DataCollectorBase):
         else:
             policy_weights = TensorDict({}, [])
         self.policy_weights = policy_weights
+        self._weight_transfer = _WeightTransfer(
+            broadcast_method, weight_compression, topk_ratio
+        )
+        self.max_policy_lag = max_policy_lag
+        self.drop_stale_batches = drop_stale_batches
         self.num_workers = len(create_env_fn)
         self.frames_per_batch = frames_per_batch
         self.storing_device = storing_device
@@ -418,6 +501,8 @@ class DistributedDataCollector(DataCollectorBase):
             )
         self.launcher = launcher
         self._batches_since_weight_update = [0 for _ in range(self.num_workers)]
+        # the version of the weights held by each node
+        self._node_versions = [0 for _ in range(self.num_workers)]
         if tcp_port is None:
             self.tcp_port = os.environ.get("TCP_PORT", TCP_PORT)
         else:
@@ -468,13 +553,24 @@ class DistributedDataCollector(DataCollectorBase):
         else:
             self.postproc = postproc
         self.split_trajs = split_trajs
+        if replay_buffer is not None:
+            if postproc is not None or split_trajs:
+                raise ValueError(
+                    "postproc and split_trajs cannot be used when the data is "
+                    "written directly in a replay buffer."
+                )
+            self._direct_writer = _DirectWriter(replay_buffer)
+        else:
+            self._direct_writer = None
 
         self.backend = backend
 
         # os.environ['TP_SOCKET_IFNAME'] = 'lo'
 
-        self._init_workers()
+        # with direct writes, the storage must exist before the nodes start
         self._make_container()
+        self._init_workers()
+        self._weight_transfer.init_reference(self.policy_weights)
 
     def _init_master_dist(
         self,
@@ -523,6 +619,10 @@ class DistributedDataCollector(DataCollectorBase):
         )
         for _data in pseudo_collector:
             break
+        if self._direct_writer is not None:
+            self._direct_writer.init_storage(_data)
+            _data = self._direct_writer.metadata(_data)
+        self._node_batch_numel = _data.numel()
         if self._VERBOSE:
             print("got data", _data)
             print("expanding...")
@@ -579,6 +679,8 @@ class DistributedDataCollector(DataCollectorBase):
             self._frames_per_batch_corrected,
             self.collector_kwargs[i],
             self._VERBOSE,
+            self._weight_transfer,
+            self._direct_writer,
         )
         return job
 
@@ -599,6 +701,8 @@ class DistributedDataCollector(DataCollectorBase):
                 "policy": self.policy,
                 "frames_per_batch": self._frames_per_batch_corrected,
                 "collector_kwargs": self.collector_kwargs[i],
+                "weight_transfer": self._weight_transfer,
+                "direct_writer": self._direct_writer,
             }
             for i in range(self.num_workers)
         ]
@@ -626,6 +730,8 @@ class DistributedDataCollector(DataCollectorBase):
                 self._frames_per_batch_corrected,
                 self.collector_kwargs[i],
                 self._VERBOSE,
+                self._weight_transfer,
+                self._direct_writer,
             ),
         )
         job.start()
@@ -684,7 +790,7 @@ class DistributedDataCollector(DataCollectorBase):
             for rank in range(1, self.num_workers + 1):
                 if self._VERBOSE:
                     print(f"sending 'continue' to {rank}")
-                self._store.set(f"NODE_{rank}_in", b"continue")
+                self._store.set(f"NODE_{rank}_in", self._continue_instruction(rank))
             trackers = []
             for i in range(self.num_workers):
                 rank = i + 1
@@ -702,7 +808,9 @@ class DistributedDataCollector(DataCollectorBase):
                 data = split_trajectories(data)
             if self.postproc is not None:
                 data = self.postproc(data)
-            yield data
+            data = self._filter_stale(data)
+            if data is not None:
+                yield data
 
             if self.max_weight_update_interval > -1:
                 for j in range(self.num_workers):
@@ -717,6 +825,13 @@ class DistributedDataCollector(DataCollectorBase):
             rank = i + 1
             self._store.set(f"NODE_{rank}_in", b"shutdown")
 
+    def _continue_instruction(self, rank: int) -> bytes:
+        if self._direct_writer is None:
+            return b"continue"
+        # the node writes its next batch from this index onwards
+        start = self._direct_writer.reserve(self._node_batch_numel)
+        return f"continue_{start}".encode("utf-8")
+
     def _next_sync(self, total_frames):
         # in the 'sync' case we should update before collecting the data
         if self.update_after_each_batch:
@@ -729,7 +844,7 @@ class DistributedDataCollector(DataCollectorBase):
             for rank in range(1, self.num_workers + 1):
                 if self._VERBOSE:
                     print(f"sending 'continue' to {rank}")
-                self._store.set(f"NODE_{rank}_in", b"continue")
+                self._store.set(f"NODE_{rank}_in", self._continue_instruction(rank))
         trackers = []
         for i in range(self.num_workers):
             rank = i + 1
@@ -740,6 +855,8 @@ class DistributedDataCollector(DataCollectorBase):
             for _tracker in tracker:
                 _tracker.wait()
         data = self._tensordict_out.clone()
+        if self._direct_writer is not None:
+            self._direct_writer.register(data.get("index"))
         traj_ids = data.get(("collector", "traj_ids"), None)
         if traj_ids is not None:
             for i in range(1, self.num_workers):
@@ -757,13 +874,17 @@ class DistributedDataCollector(DataCollectorBase):
                     for _tracker in trackers[i]:
                         _tracker.wait()
                     data = self._tensordict_out[i].clone()
+                    if self._direct_writer is not None:
+                        self._direct_writer.register(data.get("index"))
                     if self.update_after_each_batch:
                         self.update_policy_weights_(rank)
                     total_frames += data.numel()
                     if total_frames < self.total_frames:
                         if self._VERBOSE:
                             print(f"sending 'continue' to {rank}")
-                        self._store.set(f"NODE_{rank}_in", b"continue")
+                        self._store.set(
+                            f"NODE_{rank}_in", self._continue_instruction(rank)
+                        )
                     trackers[i] = self._tensordict_out[i].irecv(
                         src=i + 1, return_premature=True
                     )
@@ -772,6 +893,10 @@ class DistributedDataCollector(DataCollectorBase):
                     break
         return data, total_frames
 
+    @property
+    def policy_version(self) -> int:
+        return self._weight_transfer.version
+
     def update_policy_weights_(self, worker_rank=None) -> None:
         """Updates the weights of the worker nodes.
 
@@ -782,20 +907,46 @@ class DistributedDataCollector(DataCollectorBase):
         if worker_rank is not None and worker_rank < 1:
             raise RuntimeError("worker_rank must be greater than 1")
         workers = range(self.num_workers) if worker_rank is None else [worker_rank - 1]
-        for i in workers:
-            rank = i + 1
+        ranks = [i + 1 for i in workers]
+        transfer = self._weight_transfer
+        # the version is bumped once per round of updates, such that updating
+        # the nodes one at a time does not inflate it num_workers times
+        if any(self._node_versions[i] == transfer.version for i in workers):
+            transfer.version += 1
+        if worker_rank is not None:
+            instruction = b"update_weights"
+            payload = transfer.full_payload(self.policy_weights)
+        elif transfer.compression == "topk":
+            instruction = b"broadcast_weights_delta"
+            payload = transfer.delta_payload(self.policy_weights)
+        else:
+            instruction = b"broadcast_weights"
+            payload = transfer.full_payload(self.policy_weights)
+        for rank in ranks:
             if self._VERBOSE:
                 print(f"updating weights of {rank}")
-            self._store.set(f"NODE_{rank}_in", b"update_weights")
-            if self._sync:
-                self.policy_weights.send(rank)
-            else:
-                self.policy_weights.isend(rank)
-            self._batches_since_weight_update[i] = 0
+            self._store.set(f"NODE_{rank}_in", instruction)
+        transfer.send(payload, ranks, self._sync)
+        stale = []
+        for rank in ranks:
+            self._batches_since_weight_update[rank - 1] = 0
+            self._node_versions[rank - 1] = transfer.version
             status = self._store.get(f"NODE_{rank}_out")
-            if status != b"updated":
-                raise RuntimeError(f"Expected 'updated' but got status {status}.")
             self._store.delete_key(f"NODE_{rank}_out")
+            if status == b"stale":
+                stale.append(rank)
+            elif status != b"updated":
+                raise RuntimeError(f"Expected 'updated' but got status {status}.")
+        if stale:
+            # these nodes get the weights held by the nodes that are up to date
+            payload = transfer.reference_payload()
+            for rank in stale:
+                self._store.set(f"NODE_{rank}_in", b"update_weights")
+                transfer.send(payload, [rank], self._sync)
+                status = self._store.get(f"NODE_{rank}_out")
+                self._store.delete_key(f"NODE_{rank}_out")
+                if status != b"updated":
+                    raise RuntimeError(f"Expected 'updated' but got status {status}.")
 
     def set_seed(self, seed: int, static_seed: bool = False) -> int:
         for i in range(self.num_workers):
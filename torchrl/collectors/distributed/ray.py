@@ -199,6 +199,17 @@ class RayCollector(DataCollectorBase):
             parameters being updated for a certain time even if ``update_after_each_batch``
             is turned on.
             Defaults to -1 (no forced update).
+        max_policy_lag (int, optional): the maximum number of calls to
+            :meth:`~.update_policy_weights_` between the beginning of the
+            collection of a frame and the moment its batch is delivered. The
+            frames are stamped with the version of the weights of the collector
+            that collected them in the ``("collector", "policy_version")`` entry.
+            Defaults to ``None`` (no bound).
+        drop_stale_batches (bool, optional): if ``True`` (default), the batches
+            containing frames beyond ``max_policy_lag`` are dropped. Dropped
+            frames still count towards ``total_frames``. Otherwise, the
+            batches are delivered with a boolean ``("collector", "stale")``
+            entry.
 
     Examples:
         >>> from torch import nn
@@ -253,6 +264,8 @@ class RayCollector(DataCollectorBase):
         storing_device: torch.device = "cpu",
         update_after_each_batch=False,
         max_weight_update_interval=-1,
+        max_policy_lag=None,
+        drop_stale_batches=True,
     ):
         if remote_configs is None:
             remote_configs = DEFAULT_REMOTE_CLASS_CONFIG
@@ -347,6 +360,9 @@ class RayCollector(DataCollectorBase):
         else:
             policy_weights = TensorDict({}, [])
         self.policy_weights = policy_weights
+        self._policy_version = torch.zeros((), dtype=torch.int64)
+        self.max_policy_lag = max_policy_lag
+        self.drop_stale_batches = drop_stale_batches
         self.collector_class = collector_class
         self.collected_frames = 0
         self.split_trajs = split_trajs
@@ -511,7 +527,9 @@ class RayCollector(DataCollectorBase):
 
             self.collected_frames += out_td.numel()
 
-            yield out_td.to(self.storing_device)
+            out_td = self._filter_stale(out_td.to(self.storing_device))
+            if out_td is not None:
+                yield out_td
 
             if self.max_weight_update_interval > -1:
                 for j in range(self.num_collectors):
@@ -548,7 +566,9 @@ class RayCollector(DataCollectorBase):
             )  # should not be necessary, deleted automatically when ref count is down to 0
             self.collected_frames += out_td.numel()
 
-            yield out_td.to(self.storing_device)
+            out_td = self._filter_stale(out_td.to(self.storing_device))
+            if out_td is not None:
+                yield out_td
 
             for j in range(self.num_collectors):
                 self._batches_since_weight_update[j] += 1
@@ -589,14 +609,17 @@ class RayCollector(DataCollectorBase):
         """
         # Update agent weights
         policy_weights_local_collector_ref = ray.put(self.policy_weights.detach())
+        self._set_policy_version()
 
         if worker_rank is None:
             for index, e in enumerate(self.remote_collectors()):
-                e.update_policy_weights_.remote(policy_weights_local_collector_ref)
+                e.update_policy_weights_.remote(
+                    policy_weights_local_collector_ref, self.policy_version
+                )
                 self._batches_since_weight_update[index] = 0
         else:
             self.remote_collectors()[worker_rank - 1].update_policy_weights_.remote(
-                policy_weights_local_collector_ref
+                policy_weights_local_collector_ref, self.policy_version
             )
             self._batches_since_weight_update[worker_rank - 1] = 0
 
@@ -18,6 +18,7 @@ from torchrl.collectors.distributed.default_configs import (
     IDLE_TIMEOUT,
     TCP_PORT,
 )
+from torchrl.collectors.distributed.direct_write import _DirectWriter
 from torchrl.collectors.utils import split_trajectories
 from torchrl.data.utils import CloudpickleWrapper
 from torchrl.envs.utils import _convert_exploration_type
@@ -86,6 +87,18 @@ def _rpc_init_collection_node(
     rpc.shutdown()
 
 
+def _rpc_direct_writer(direct_writer):
+    # keeps a copy of the direct writer on the node that runs this function
+    return direct_writer
+
+
+def _rpc_collect_and_write(collector_rref, writer_rref, start):
+    data = collector_rref.local_value().next()
+    # the data is written in the replay buffer storage, the trainer only
+    # receives its metadata
+    return writer_rref.local_value().write(data, start)
+
+
 class RPCDataCollector(DataCollectorBase):
     """An RPC-based distributed data collector.
 
@@ -205,6 +218,30 @@ class RPCDataCollector(DataCollectorBase):
             device used to pass data to main.
         tensorpipe_options (dict, optional): a dictionary of keyword argument
             to pass to :class:`torch.distributed.rpc.TensorPipeRpcBackendOption`.
+        max_policy_lag (int, optional): the maximum number of calls to
+            :meth:`~.update_policy_weights_` between the beginning of the
+            collection of a frame and the moment its batch is delivered. The
+            frames are stamped with the version of the weights of the node that
+            collected them in the ``("collector", "policy_version")`` entry.
+            Defaults to ``None`` (no bound).
+        drop_stale_batches (bool, optional): if ``True`` (default), the batches
+            containing frames beyond ``max_policy_lag`` are dropped. Dropped
+            frames still count towards ``total_frames``. Otherwise, the
+            batches are delivered with a boolean ``("collector", "stale")``
+            entry.
+        replay_buffer (ReplayBuffer, optional): if provided, the nodes write
+            the frames they collect in the storage of this replay buffer and
+            the trainer only receives the ``"collector"`` entries of the
+            batches along with the ``"index"`` of each frame in the storage.
+            The frames are written individually (i.e., the batches are
+            flattened) and are registered in the replay buffer once their
+            batch has been received. The storage must be a
+            :class:`~torchrl.data.replay_buffers.LazyMemmapStorage` whose
+            ``scratch_dir`` can be accessed by every node (e.g. on a shared
+            filesystem), and the writer a
+            :class:`~torchrl.data.replay_buffers.RoundRobinWriter`.
+            Incompatible with ``postproc`` and ``split_trajs``.
+            Defaults to ``None`` (the data is sent to the trainer).
 
     """
 
@@ -237,6 +274,9 @@ class RPCDataCollector(DataCollectorBase):
         tcp_port=None,
         visible_devices=None,
         tensorpipe_options=None,
+        max_policy_lag=None,
+        drop_stale_batches=True,
+        replay_buffer=None,
     ):
         exploration_type = _convert_exploration_type(
             exploration_mode=exploration_mode, exploration_type=exploration_type
@@ -255,6 +295,9 @@ class RPCDataCollector(DataCollectorBase):
         else:
             policy_weights = TensorDict({}, [])
         self.policy_weights = policy_weights
+        self._policy_version = torch.zeros((), dtype=torch.int64)
+        self.max_policy_lag = max_policy_lag
+        self.drop_stale_batches = drop_stale_batches
         self.num_workers = len(create_env_fn)
         self.frames_per_batch = frames_per_batch
         self.storing_device = storing_device
@@ -320,6 +363,15 @@ class RPCDataCollector(DataCollectorBase):
         else:
             self.postproc = postproc
         self.split_trajs = split_trajs
+        if replay_buffer is not None:
+            if postproc is not None or split_trajs:
+                raise ValueError(
+                    "postproc and split_trajs cannot be used when the data is "
+                    "written directly in a replay buffer."
+                )
+            self._direct_writer = _DirectWriter(replay_buffer)
+        else:
+            self._direct_writer = None
 
         if tensorpipe_options is None:
             self.tensorpipe_options = copy(DEFAULT_TENSORPIPE_OPTIONS)
@@ -407,6 +459,17 @@ class RPCDataCollector(DataCollectorBase):
                 },
             )
             collector_rrefs.append(collector_rref)
+        self.collector_rrefs = collector_rrefs
+        self.collector_infos = collector_infos
+        if self._direct_writer is not None:
+            self._writer_rrefs = [
+                rpc.remote(
+                    collector_infos[i],
+                    _rpc_direct_writer,
+                    args=(self._direct_writer,),
+                )
+                for i in range(num_workers)
+            ]
 
         futures = collections.deque(maxlen=self.num_workers)
 
@@ -414,15 +477,38 @@ class RPCDataCollector(DataCollectorBase):
             for i in range(num_workers):
                 if self._VERBOSE:
                     print("Asking for the first batch")
-                future = rpc.rpc_async(
-                    collector_infos[i],
-                    collector_class.next,
-                    args=(collector_rrefs[i],),
-                )
-                futures.append((future, i))
+                futures.append((self._request_batch(i), i))
         self.futures = futures
-        self.collector_rrefs = collector_rrefs
-        self.collector_infos = collector_infos
+
+    def _init_direct_writes(self):
+        env_constructor = self.env_constructors[0]
+        pseudo_collector = SyncDataCollector(
+            env_constructor,
+            self.policy,
+            frames_per_batch=self._frames_per_batch_corrected,
+            total_frames=-1,
+            split_trajs=False,
+        )
+        for _data in pseudo_collector:
+            break
+        pseudo_collector.shutdown()
+        self._direct_writer.init_storage(_data)
+        self._node_batch_numel = _data.numel()
+
+    def _request_batch(self, i):
+        if self._direct_writer is None:
+            return rpc.rpc_async(
+                self.collector_infos[i],
+                self.collector_class.next,
+                args=(self.collector_rrefs[i],),
+            )
+        # the node writes its next batch from this index onwards
+        start = self._direct_writer.reserve(self._node_batch_numel)
+        return rpc.rpc_async(
+            self.collector_infos[i],
+            _rpc_collect_and_write,
+            args=(self.collector_rrefs[i], self._writer_rrefs[i], start),
+        )
 
     def _init_worker_rpc(self, executor, i):
         """Init RPC node if necessary."""
@@ -497,6 +583,9 @@ class RPCDataCollector(DataCollectorBase):
         self._init_master_rpc(
             self.num_workers + 1,
         )
+        if self._direct_writer is not None:
+            # the storage must exist before the nodes write in it
+            self._init_direct_writes()
         self._start_workers(
             world_size=self.num_workers + 1,
             env_constructors=self.env_constructors,
@@ -520,7 +609,9 @@ class RPCDataCollector(DataCollectorBase):
                 data = split_trajectories(data)
             if self.postproc is not None:
                 data = self.postproc(data)
-            yield data
+            data = self._filter_stale(data)
+            if data is not None:
+                yield data
 
             if self.max_weight_update_interval > -1 and not self._sync:
                 for j in range(self.num_workers):
@@ -541,6 +632,7 @@ class RPCDataCollector(DataCollectorBase):
     def update_policy_weights_(self, workers=None, wait=True) -> None:
         if workers is None:
             workers = list(range(self.num_workers))
+        self._set_policy_version()
         futures = []
         for i in workers:
             if self._VERBOSE:
@@ -549,7 +641,11 @@ class RPCDataCollector(DataCollectorBase):
                 rpc.rpc_async(
                     self.collector_infos[i],
                     self.collector_class.update_policy_weights_,
-                    args=(self.collector_rrefs[i], self.policy_weights.detach()),
+                    args=(
+                        self.collector_rrefs[i],
+                        self.policy_weights.detach(),
+                        self.policy_version,
+                    ),
                 )
             )
         if wait:
@@ -575,14 +671,11 @@ class RPCDataCollector(DataCollectorBase):
                 if self._VERBOSE:
                     print(f"future {i} is done")
                 data = future.value()
+                if self._direct_writer is not None:
+                    self._direct_writer.register(data.get("index"))
                 self._collected_frames += data.numel()
                 if self._collected_frames < self.total_frames:
-                    future = rpc.rpc_async(
-                        self.collector_infos[i],
-                        self.collector_class.next,
-                        args=(self.collector_rrefs[i],),
-                    )
-                    self.futures.append((future, i))
+                    self.futures.append((self._request_batch(i), i))
                 return data.to(self.storing_device)
             self.futures.append((future, i))
 
@@ -592,12 +685,7 @@ class RPCDataCollector(DataCollectorBase):
         if self.update_after_each_batch:
             self.update_policy_weights_()
         for i in range(self.num_workers):
-            future = rpc.rpc_async(
-                self.collector_infos[i],
-                self.collector_class.next,
-                args=(self.collector_rrefs[i],),
-            )
-            self.futures.append((future, i))
+            self.futures.append((self._request_batch(i), i))
         data = []
         while len(self.futures):
             future, i = self.futures.popleft()
@@ -611,6 +699,8 @@ class RPCDataCollector(DataCollectorBase):
             else:
                 self.futures.append((future, i))
         data = torch.cat(data).to(self.storing_device)
+        if self._direct_writer is not None:
+            self._direct_writer.register(data.get("index"))
         traj_ids = data.get(("collector", "traj_ids"), None)
         if traj_ids is not None:
             for i in range(1, self.num_workers):
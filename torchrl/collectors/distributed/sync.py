@@ -5,11 +5,16 @@
 
 r"""Generic distributed data-collector using torch.distributed backend."""
 
+import math
 import os
+import queue
 import socket
+import threading
+import time
+from collections import deque
 from copy import copy, deepcopy
 from datetime import timedelta
-from typing import OrderedDict
+from typing import Dict, OrderedDict, Tuple
 
 import torch.cuda
 from tensordict import TensorDict
@@ -41,6 +46,10 @@ except ModuleNotFoundError as err:
     _has_submitit = False
     SUBMITIT_ERR = err
 
+_STRAGGLER_POLICIES = ("rollover", "drop")
+# number of latency measurements kept per node
+_LATENCY_WINDOW = 1000
+
 
 def _distributed_init_collection_node(
     rank,
@@ -127,6 +136,19 @@ def _distributed_init_collection_node(
     return
 
 
+def _wait_for_batches(i, requests, received):
+    # gloo does not mark a reception as completed until it is waited for: each
+    # node has a thread that waits for its batches in the order they are
+    # requested, until None is received
+    while True:
+        tracker = requests.get()
+        if tracker is None:
+            return
+        for _tracker in tracker:
+            _tracker.wait()
+        received.put((i, time.time()))
+
+
 class DistributedSyncDataCollector(DataCollectorBase):
     """A distributed synchronous data collector with torch.distributed backend.
 
@@ -214,6 +236,31 @@ class DistributedSyncDataCollector(DataCollectorBase):
             https://github.com/facebookincubator/submitit
             Defaults to "submitit".
         tcp_port (int, optional): the TCP port to be used. Defaults to 10003.
+        quorum (float, optional): the fraction of nodes whose batch must have
+            been received before a batch is delivered. With ``quorum < 1``, a
+            slow node does not stall the collection: the batch delivered
+            contains the data of the nodes that were ready, stacked along the
+            first dimension, and may hence hold fewer than ``frames_per_batch``
+            frames. As all nodes send the same number of frames, the quorum
+            also sets the minimum number of frames per batch.
+            Defaults to ``1.0`` (wait for every node).
+        straggler_policy (str, optional): what to do with the batches of the
+            nodes that missed the quorum. ``"rollover"`` delivers them with the
+            next batch, ``"drop"`` discards them. Dropped frames are counted in
+            the ``dropped_frames`` attribute and count towards ``total_frames``.
+            Defaults to ``"rollover"``.
+
+    The time taken by each node to deliver its batches can be retrieved
+    through :meth:`~.node_latency_histograms`.
+
+    .. note::
+
+      Unlike the other distributed collectors, this collector does not version
+      the policy weights: the nodes receive the current weights of the policy
+      every ``update_interval`` batches and :meth:`~.update_policy_weights_`
+      is not supported. :attr:`~.policy_version` hence stays at ``0``, the
+      frames are not stamped with the trainer's version and there is no
+      ``max_policy_lag`` argument.
     """
 
     def __init__(
@@ -241,6 +288,8 @@ class DistributedSyncDataCollector(DataCollectorBase):
         update_interval=1,
         launcher="submitit",
         tcp_port=None,
+        quorum=1.0,
+        straggler_policy="rollover",
     ):
         exploration_type = _convert_exploration_type(
             exploration_mode=exploration_mode, exploration_type=exploration_type
@@ -261,6 +310,8 @@ class DistributedSyncDataCollector(DataCollectorBase):
         else:
             policy_weights = TensorDict({}, [])
         self.policy_weights = policy_weights
+        # the weights are not versioned, see the class docstring
+        self._policy_version = torch.zeros((), dtype=torch.int64)
         self.num_workers = len(create_env_fn)
         self.frames_per_batch = frames_per_batch
         self.storing_device = storing_device
@@ -273,6 +324,19 @@ class DistributedSyncDataCollector(DataCollectorBase):
                 f"Consider using a number of frames that is divisible by the number of workers."
             )
         self.max_weight_update_interval = max_weight_update_interval
+        if not 0 < quorum <= 1:
+            raise ValueError(f"quorum must be in (0, 1], got {quorum}.")
+        if straggler_policy not in _STRAGGLER_POLICIES:
+            raise ValueError(
+                f"straggler_policy must be one of {_STRAGGLER_POLICIES}, got {straggler_policy}."
+            )
+        self.quorum = quorum
+        self.straggler_policy = straggler_policy
+        self.dropped_frames = 0
+        self.num_late_batches = 0
+        self._node_latencies = [
+            deque(maxlen=_LATENCY_WINDOW) for _ in range(self.num_workers)
+        ]
         self.launcher = launcher
         self._batches_since_weight_update = [0 for _ in range(self.num_workers)]
         if tcp_port is None:
@@ -449,33 +513,101 @@ class DistributedSyncDataCollector(DataCollectorBase):
         self._init_master_dist(self.num_workers + 1, self.backend)
 
     def iterator(self):
-        yield from self._iterator_dist()
-
-    def _iterator_dist(self):
+        # the nodes whose batch has been received, with the reception time
+        received = queue.Queue()
+        requests = [queue.Queue() for _ in range(self.num_workers)]
+        for i in range(self.num_workers):
+            threading.Thread(
+                target=_wait_for_batches,
+                args=(i, requests[i], received),
+                daemon=True,
+            ).start()
+        try:
+            yield from self._iterator_dist(requests, received)
+        finally:
+            for _requests in requests:
+                _requests.put(None)
+
+    def _iterator_dist(self, requests, received):
 
         total_frames = 0
-        j = -1
-        while total_frames < self.total_frames:
-            j += 1
-            if j % self.update_interval == 0 and not self.policy_weights.is_empty():
-                for i in range(self.num_workers):
-                    rank = i + 1
-                    self.policy_weights.isend(rank)
-
-            trackers = []
-            for i in range(self.num_workers):
-                rank = i + 1
-                trackers.append(
-                    self._single_tds[i].irecv(src=rank, return_premature=True)
-                )
-            for tracker in trackers:
-                for _tracker in tracker:
-                    _tracker.wait()
+        num_workers = self.num_workers
+        min_ready = math.ceil(self.quorum * num_workers)
+        # the pending receptions, and when they have been requested
+        trackers = [None] * num_workers
+        requested = [None] * num_workers
+        # nodes whose batch has been received but not delivered yet
+        ready = set()
+        # nodes that have missed the quorum of the last batch
+        late = set()
+        node_batches = [0] * num_workers
+        node_frames = [0] * num_workers
+        # the nodes wait for the weights when they start their first batch and
+        # every update_interval batches
+        update_due = [True] * num_workers
+
+        def on_received(i, received_at):
+            trackers[i] = None
+            self._node_latencies[i].append(received_at - requested[i])
+            node_batches[i] += 1
+            frames = self._single_tds[i].numel()
+            node_frames[i] += frames
+            if (
+                node_batches[i] % self.update_interval == 0
+                and node_frames[i] < self.total_frames_per_collector
+            ):
+                update_due[i] = True
+            if i in late and self.straggler_policy == "drop":
+                late.discard(i)
+                self.dropped_frames += frames
+                return frames
+            late.discard(i)
+            ready.add(i)
+            return 0
 
-            data = self._tensordict_out.clone()
+        while total_frames < self.total_frames:
+            while True:
+                for i in range(num_workers):
+                    if (
+                        trackers[i] is None
+                        and i not in ready
+                        and node_frames[i] < self.total_frames_per_collector
+                    ):
+                        rank = i + 1
+                        if update_due[i] and not self.policy_weights.is_empty():
+                            self.policy_weights.isend(rank)
+                        update_due[i] = False
+                        trackers[i] = self._single_tds[i].irecv(
+                            src=rank, return_premature=True
+                        )
+                        requested[i] = time.time()
+                        requests[i].put(trackers[i])
+                while True:
+                    try:
+                        total_frames += on_received(*received.get_nowait())
+                    except queue.Empty:
+                        break
+                num_pending = sum(tracker is not None for tracker in trackers)
+                if len(ready) >= min(min_ready, len(ready) + num_pending):
+                    break
+                total_frames += on_received(*received.get())
+            if not ready:
+                # the batches that were left have all been dropped
+                break
+
+            for i in range(num_workers):
+                if trackers[i] is not None and i not in late:
+                    late.add(i)
+                    self.num_late_batches += 1
+            nodes = sorted(ready)
+            ready.clear()
+            if len(nodes) == num_workers:
+                data = self._tensordict_out.clone()
+            else:
+                data = self._tensordict_out[torch.tensor(nodes)]
             traj_ids = data.get(("collector", "traj_ids"), None)
             if traj_ids is not None:
-                for i in range(1, self.num_workers):
+                for i in range(1, len(nodes)):
                     traj_ids[i] += traj_ids[i - 1].max()
                 data.set_(("collector", "traj_ids"), traj_ids)
             total_frames += data.numel()
@@ -485,6 +617,32 @@ class DistributedSyncDataCollector(DataCollectorBase):
                 data = self.postproc(data)
             yield data
 
+    def node_latency_histograms(
+        self, bins: int = 10
+    ) -> Dict[int, Tuple[torch.Tensor, torch.Tensor]]:
+        """Returns the histograms of the time each node took to deliver a batch.
+
+        The latency of a batch is the time (in seconds) between the moment it
+        was requested from a node and the moment it was received. Only the
+        last 1000 measurements of each node are kept.
+
+        Args:
+            bins (int, optional): the number of bins of the histograms.
+                Defaults to 10.
+
+        Returns:
+            a dictionary mapping the rank of each node that has delivered data
+            to the ``(counts, bin_edges)`` tuple of its histogram.
+
+        """
+        histograms = {}
+        for i, latencies in enumerate(self._node_latencies):
+            if not latencies:
+                continue
+            latencies = torch.tensor(latencies, dtype=torch.float)
+            histograms[i + 1] = tuple(torch.histogram(latencies, bins=bins))
+        return histograms
+
     def update_policy_weights_(self, worker_rank=None) -> None:
         raise NotImplementedError
 
@@ -0,0 +1,255 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+r"""Policy weight transfer from the trainer to the collection nodes."""
+import math
+from typing import Optional, Sequence
+
+import torch
+from tensordict import TensorDict, TensorDictBase
+
+_BROADCAST_METHODS = ("p2p", "collective", "tree")
+_COMPRESSIONS = (None, "fp16", "bf16", "topk")
+
+
+class _WeightTransfer:
+    """Sends the policy weights from the trainer (rank 0) to the collection nodes.
+
+    Args:
+        broadcast_method (str, optional): how the weights are sent to the nodes
+            when they are all updated at once. ``"p2p"`` sends the weights to
+            each node in turn, ``"collective"`` uses
+            :func:`torch.distributed.broadcast` and ``"tree"`` forwards the
+            weights along a binomial tree, such that the trainer only sends
+            ``ceil(log2(num_nodes + 1))`` copies of the weights.
+            Defaults to ``"p2p"``.
+        compression (str, optional): ``"fp16"`` or ``"bf16"`` cast the floating
+            point weights before sending them. ``"topk"`` sends the
+            ``topk_ratio`` largest entries of the difference between the
+            current weights and those held by the nodes, the remainder being
+            carried over to the next updates. Non floating point tensors are
+            always sent uncompressed.
+            Defaults to ``None`` (no compression).
+        topk_ratio (float, optional): the ratio of entries sent with
+            ``compression="topk"``. Defaults to ``0.01``.
+
+    Every update carries a version number. A node that does not hold the
+    version a ``"topk"`` delta applies to (e.g. because it has been updated
+    alone in the meantime) skips the update and is sent the weights held by
+    the other nodes instead.
+    """
+
+    def __init__(
+        self,
+        broadcast_method: str = "p2p",
+        compression: Optional[str] = None,
+        topk_ratio: float = 0.01,
+    ):
+        if broadcast_method not in _BROADCAST_METHODS:
+            raise ValueError(
+                f"broadcast_method must be one of {_BROADCAST_METHODS}, got {broadcast_method}."
+            )
+        if compression not in _COMPRESSIONS:
+            raise ValueError(
+                f"compression must be one of {_COMPRESSIONS}, got {compression}."
+            )
+        if not 0 < topk_ratio <= 1:
+            raise ValueError(f"topk_ratio must be in (0, 1], got {topk_ratio}.")
+        self.broadcast_method = broadcast_method
+        self.compression = compression
+        self.topk_ratio = topk_ratio
+        self.version = 0
+        self._reference = None
+        self._reference_version = 0
+
+    @property
+    def _dtype(self) -> Optional[torch.dtype]:
+        if self.compression == "fp16":
+            return torch.float16
+        if self.compression == "bf16":
+            return torch.bfloat16
+        return None
+
+    def _cast(self, tensor: torch.Tensor) -> torch.Tensor:
+        dtype = self._dtype
+        if dtype is None or not tensor.is_floating_point():
+            return tensor
+        return tensor.to(dtype)
+
+    def _k(self, tensor: torch.Tensor) -> int:
+        return max(1, math.ceil(self.topk_ratio * tensor.numel()))
+
+    # trainer side
+    def init_reference(self, weights: TensorDictBase) -> None:
+        """Records the weights held by the nodes when they are created."""
+        if self.compression == "topk":
+            self._reference = weights.clone()
+
+    def full_payload(self, weights: TensorDictBase) -> TensorDictBase:
+        return TensorDict(
+            {
+                "version": torch.tensor(self.version),
+                "weights": weights.apply(self._cast),
+            },
+            [],
+        )
+
+    def reference_payload(self) -> TensorDictBase:
+        """The weights held by the nodes that have received all the deltas."""
+        return TensorDict(
+            {
+                "version": torch.tensor(self._reference_version),
+                "weights": self._reference.apply(self._cast),
+            },
+            [],
+        )
+
+    def delta_payload(self, weights: TensorDictBase) -> TensorDictBase:
+        """Builds a sparse update of the reference weights held by the nodes.
+
+        The reference is updated with the same sparse delta as the nodes, such
+        that the entries that are not sent are part of the next delta.
+        """
+        delta = {}
+        for key, value in weights.items(True, True):
+            if not value.is_floating_point():
+                # integer and boolean buffers (e.g. counters) are sent as is
+                self._reference.get(key).copy_(value)
+                delta[key] = TensorDict({"value": value}, [])
+                continue
+            reference = self._reference.get(key).view(-1)
+            diff = value.reshape(-1) - reference
+            indices = diff.abs().topk(self._k(diff)).indices
+            values = diff[indices]
+            reference[indices] += values
+            delta[key] = TensorDict({"indices": indices, "values": values}, [])
+        payload = TensorDict(
+            {
+                "version": torch.tensor(self.version),
+                "base_version": torch.tensor(self._reference_version),
+                "delta": TensorDict(delta, []),
+            },
+            [],
+        )
+        self._reference_version = self.version
+        return payload
+
+    def send(self, payload: TensorDictBase, ranks: Sequence[int], sync: bool) -> None:
+        """Sends a payload to the given ranks.
+
+        ``ranks`` must contain all the nodes for the ``"collective"`` and
+        ``"tree"`` methods.
+        """
+        if self.broadcast_method == "p2p" or len(ranks) == 1:
+            for rank in ranks:
+                if sync:
+                    payload.send(rank)
+                else:
+                    payload.isend(rank)
+        elif self.broadcast_method == "collective":
+            _collective_broadcast(payload)
+        else:
+            _tree_broadcast(payload, 0, len(ranks) + 1)
+
+    # node side
+    def receive(
+        self, weights: TensorDictBase, delta: bool, broadcast: bool, sync: bool
+    ) -> bool:
+        """Receives a payload from the trainer and applies it to ``weights``.
+
+        Returns ``False`` if the update was a delta that does not apply to
+        the weights held by the node, in which case the weights are unchanged.
+        """
+        payload = self._empty_payload(weights, delta)
+        if not broadcast or self.broadcast_method == "p2p":
+            if sync:
+                payload.recv(0)
+            else:
+                # without further arguments, irecv blocks until the payload
+                # has been received
+                payload.irecv(0)
+        elif self.broadcast_method == "collective":
+            _collective_broadcast(payload)
+        else:
+            _tree_broadcast(
+                payload,
+                torch.distributed.get_rank(),
+                torch.distributed.get_world_size(),
+            )
+        version = payload.get("version").item()
+        if not delta:
+            weights.update_(payload.get("weights"))
+            self.version = version
+            return True
+        if payload.get("base_version").item() != self.version:
+            return False
+        for key, value in weights.items(True, True):
+            update = payload.get(("delta", *_as_tuple(key)))
+            if not value.is_floating_point():
+                value.copy_(update.get("value"))
+                continue
+            value.view(-1)[update.get("indices")] += update.get("values")
+        self.version = version
+        return True
+
+    def _empty_payload(self, weights: TensorDictBase, delta: bool) -> TensorDictBase:
+        if not delta:
+            return TensorDict(
+                {
+                    "version": torch.zeros((), dtype=torch.int64),
+                    "weights": weights.apply(lambda x: torch.empty_like(self._cast(x))),
+                },
+                [],
+            )
+        delta = {}
+        for key, value in weights.items(True, True):
+            if not value.is_floating_point():
+                delta[key] = TensorDict({"value": torch.empty_like(value)}, [])
+                continue
+            k = self._k(value)
+            delta[key] = TensorDict(
+                {
+                    "indices": torch.zeros(k, dtype=torch.int64),
+                    "values": torch.zeros(k, dtype=value.dtype),
+                },
+                [],
+            )
+        return TensorDict(
+            {
+                "version": torch.zeros((), dtype=torch.int64),
+                "base_version": torch.zeros((), dtype=torch.int64),
+                "delta": TensorDict(delta, []),
+            },
+            [],
+        )
+
+
+def _as_tuple(key):
+    return key if isinstance(key, tuple) else (key,)
+
+
+def _collective_broadcast(payload: TensorDictBase) -> None:
+    for value in payload.values(True, True):
+        if value.dtype is torch.bfloat16:
+            # gloo does not support bfloat16 collectives: the bytes are sent as is
+            value = value.view(torch.float16)
+        torch.distributed.broadcast(value, src=0)
+
+
+def _tree_broadcast(payload: TensorDictBase, rank: int, world_size: int) -> None:
+    """Broadcasts a payload from rank 0 along a binomial tree.
+
+    At each round, the ranks that already hold the payload forward it to the
+    rank that is ``step`` positions away, doubling the number of ranks that
+    hold it.
+    """
+    step = 1
+    while step < world_size:
+        if rank < step:
+            if rank + step < world_size:
+                payload.send(rank + step)
+        elif rank < 2 * step:
+            payload.recv(rank - step)
+        step *= 2
@@ -21,61 +21,38 @@ def _get_reward(
 
     Supports multiple consecutive trajectories.
 
-    Assumes that the time dimension is the *last* dim of reward and done.
+    Assumes that the time dimension is the *last* dim of done and that
+    reward has the shape of done, possibly followed by other dimensions.
+    The memory and compute costs are linear in the size of the batch.
     """
-    filt = torch.tensor(
-        [gamma**i for i in range(max_steps + 1)],
-        device=reward.device,
-        dtype=reward.dtype,
-    ).view(1, 1, -1)
-    # make one done mask per trajectory
-    done_cumsum = done.cumsum(-1)
-    done_cumsum = torch.cat(
-        [torch.zeros_like(done_cumsum[..., :1]), done_cumsum[..., :-1]], -1
-    )
-    num_traj = done_cumsum.max().item() + 1
-    done_cumsum = done_cumsum.expand(num_traj, *done.shape)
-    traj_ids = done_cumsum == torch.arange(
-        num_traj, device=done.device, dtype=done_cumsum.dtype
-    ).view(num_traj, *[1 for _ in range(done_cumsum.ndim - 1)])
-    # an expanded reward tensor where each index along dim 0 is a different trajectory
+    T = done.shape[-1]
+    steps = torch.arange(T, device=done.device)
+    # the last step of the trajectory each step belongs to, i.e. the next
+    # done state or the end of the batch, found with a reverse cumulative min
+    last_step = torch.where(done, steps, T - 1)
+    last_step = last_step.flip(-1).cummin(-1).values.flip(-1)
+    # time_to_obs is the tensor of the time delta to the next obs
+    # 0 = take the next obs (ie do nothing)
+    # 1 = take the obs after the next
+    time_to_obs = (last_step - steps).clamp_max(max_steps)
+
     # Note: rewards could have a different shape than done (e.g. multi-agent with a single
     # done per group).
     # we assume that reward has the same leading dimension as done.
-    if reward.shape != traj_ids.shape[1:]:
-        # We'll expand the ids on the right first
-        traj_ids_expand = expand_right(traj_ids, (num_traj, *reward.shape))
-        reward_traj = traj_ids_expand * reward
+    steps_left = time_to_obs
+    if reward.shape != done.shape:
+        steps_left = expand_right(steps_left, reward.shape)
         # we must make sure that the last dimension of the reward is the time
-        reward_traj = reward_traj.transpose(-1, traj_ids.ndim - 1)
-    else:
-        # simpler use case: reward shape and traj_ids match
-        reward_traj = traj_ids * reward
-
-    reward_traj = torch.nn.functional.pad(reward_traj, [0, max_steps], value=0.0)
-    shape = reward_traj.shape[:-1]
-    if len(shape) > 1:
-        reward_traj = reward_traj.flatten(0, reward_traj.ndim - 2)
-    reward_traj = reward_traj.unsqueeze(-2)
-    summed_rewards = torch.conv1d(reward_traj, filt)
-    summed_rewards = summed_rewards.squeeze(-2)
-    if len(shape) > 1:
-        summed_rewards = summed_rewards.unflatten(0, shape)
-    # let's check that our summed rewards have the right size
-    if reward.shape != traj_ids.shape[1:]:
-        summed_rewards = summed_rewards.transpose(-1, traj_ids.ndim - 1)
-        summed_rewards = (summed_rewards * traj_ids_expand).sum(0)
-    else:
-        summed_rewards = (summed_rewards * traj_ids).sum(0)
-
-    # time_to_obs is the tensor of the time delta to the next obs
-    # 0 = take the next obs (ie do nothing)
-    # 1 = take the obs after the next
-    time_to_obs = (
-        traj_ids.flip(-1).cumsum(-1).clamp_max(max_steps + 1).flip(-1) * traj_ids
-    )
-    time_to_obs = time_to_obs.sum(0)
-    time_to_obs = time_to_obs - 1
+        reward = reward.transpose(-1, done.ndim - 1)
+        steps_left = steps_left.transpose(-1, done.ndim - 1)
+    summed_rewards = reward.clone()
+    for i in range(1, min(max_steps, T - 1) + 1):
+        # the reward i steps ahead counts if it belongs to the same trajectory
+        summed_rewards[..., :-i] += (gamma**i) * torch.where(
+            steps_left[..., :-i] >= i, reward[..., i:], 0.0
+        )
+    if reward.shape != done.shape:
+        summed_rewards = summed_rewards.transpose(-1, done.ndim - 1)
     return summed_rewards, time_to_obs
 
 
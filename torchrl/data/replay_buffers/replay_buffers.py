@@ -20,7 +20,7 @@ from tensordict.tensordict import (
 )
 from tensordict.utils import expand_as_right
 
-from torchrl._utils import accept_remote_rref_udf_invocation
+from torchrl._utils import accept_remote_rref_udf_invocation, telemetry
 
 from torchrl.data.replay_buffers.samplers import (
     PrioritizedSampler,
@@ -254,7 +254,7 @@ class ReplayBuffer:
         return index
 
     def _extend(self, data: Sequence) -> torch.Tensor:
-        with self._replay_lock:
+        with telemetry.timer("replay_buffer/extend"), self._replay_lock:
             index = self._writer.extend(data)
             self._sampler.extend(index)
         return index
@@ -287,27 +287,28 @@ class ReplayBuffer:
 
     @pin_memory_output
     def _sample(self, batch_size: int) -> Tuple[Any, dict]:
-        with self._replay_lock:
-            index, info = self._sampler.sample(self._storage, batch_size)
-            info["index"] = index
-            data = self._storage[index]
-        if not isinstance(index, INT_CLASSES):
-            data = self._collate_fn(data)
-        if self._transform is not None and len(self._transform):
-            is_td = True
-            if not is_tensor_collection(data):
-                data = TensorDict({"data": data}, [])
-                is_td = False
-            is_locked = data.is_locked
-            if is_locked:
-                data.unlock_()
-            data = self._transform(data)
-            if is_locked:
-                data.lock_()
-            if not is_td:
-                data = data["data"]
+        with telemetry.timer("replay_buffer/sample"):
+            with self._replay_lock:
+                index, info = self._sampler.sample(self._storage, batch_size)
+                info["index"] = index
+                data = self._storage[index]
+            if not isinstance(index, INT_CLASSES):
+                data = self._collate_fn(data)
+            if self._transform is not None and len(self._transform):
+                is_td = True
+                if not is_tensor_collection(data):
+                    data = TensorDict({"data": data}, [])
+                    is_td = False
+                is_locked = data.is_locked
+                if is_locked:
+                    data.unlock_()
+                data = self._transform(data)
+                if is_locked:
+                    data.lock_()
+                if not is_td:
+                    data = data["data"]
 
-        return data, info
+            return data, info
 
     def empty(self):
         """Empties the replay buffer and reset cursor to 0."""
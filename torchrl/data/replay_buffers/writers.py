@@ -55,11 +55,19 @@ class RoundRobinWriter(Writer):
         self._cursor = (self._cursor + 1) % self._storage.max_size
         return ret
 
-    def extend(self, data: Sequence) -> torch.Tensor:
+    def reserve(self, batch_size: int) -> np.ndarray:
+        """Moves the cursor past the next ``batch_size`` elements and returns their indices.
+
+        Nothing is written: this is used when the data is written in the
+        storage by another process.
+        """
         cur_size = self._cursor
-        batch_size = len(data)
         index = np.arange(cur_size, batch_size + cur_size) % self._storage.max_size
         self._cursor = (batch_size + cur_size) % self._storage.max_size
+        return index
+
+    def extend(self, data: Sequence) -> torch.Tensor:
+        index = self.reserve(len(data))
         self._storage[index] = data
         return index
 
@@ -84,10 +92,7 @@ class TensorDictRoundRobinWriter(RoundRobinWriter):
         return ret
 
     def extend(self, data: Sequence) -> torch.Tensor:
-        cur_size = self._cursor
-        batch_size = len(data)
-        index = np.arange(cur_size, batch_size + cur_size) % self._storage.max_size
-        self._cursor = (batch_size + cur_size) % self._storage.max_size
+        index = self.reserve(len(data))
         # storage must convert the data to the appropriate format if needed
         data["index"] = index
         self._storage[index] = data
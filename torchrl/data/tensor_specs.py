@@ -2489,6 +2489,8 @@ class CompositeSpec(TensorSpec):
     def __new__(cls, *args, **kwargs):
         cls._device = torch.device("cpu")
         cls._locked = False
+        cls._leaf_index = None
+        cls._structure_version = 0
         return super().__new__(cls)
 
     @property
@@ -2511,6 +2513,7 @@ class CompositeSpec(TensorSpec):
                         f"CompositeSpec.shape={self.shape}."
                     )
         self._shape = torch.Size(value)
+        self._structure_version += 1
 
     @property
     def ndim(self):
@@ -2531,6 +2534,7 @@ class CompositeSpec(TensorSpec):
                     f"CompositeSpec.shape={self.shape}."
                 )
         self._specs[name] = spec
+        self._structure_version += 1
 
     def __init__(self, *args, shape=None, device=None, **kwargs):
         if shape is None:
@@ -2710,6 +2714,7 @@ class CompositeSpec(TensorSpec):
             return
         elif isinstance(key, tuple):
             del self._specs[key[0]]
+            self._structure_version += 1
             return
         elif not isinstance(key, str):
             raise TypeError(
@@ -2719,6 +2724,7 @@ class CompositeSpec(TensorSpec):
         if key in {"shape", "device", "dtype", "space"}:
             raise AttributeError(f"CompositeSpec has no key {key}")
         del self._specs[key]
+        self._structure_version += 1
 
     def encode(
         self, vals: Dict[str, Any], *, ignore_device: bool = False
@@ -2762,7 +2768,22 @@ class CompositeSpec(TensorSpec):
             ):
                 self._specs[_key].type_check(value[_key], _key)
 
+    def _get_leaf_index(self) -> _CompositeSpecLeafIndex:
+        leaf_index = self._leaf_index
+        if leaf_index is None or not leaf_index.is_valid():
+            leaf_index = _CompositeSpecLeafIndex(self)
+            self._leaf_index = leaf_index
+        return leaf_index
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the leaf index is a cache and is rebuilt lazily
+        state.pop("_leaf_index", None)
+        return state
+
     def is_in(self, val: Union[dict, TensorDictBase]) -> bool:
+        if isinstance(val, TensorDictBase):
+            return self._get_leaf_index().is_in(val)
         for (key, item) in self._specs.items():
             if item is None:
                 continue
@@ -2771,27 +2792,12 @@ class CompositeSpec(TensorSpec):
         return True
 
     def project(self, val: TensorDictBase) -> TensorDictBase:
-        for key, item in self.items():
-            if item is None:
-                continue
-            _val = val.get(key)
-            if not self._specs[key].is_in(_val):
-                val.set(key, self._specs[key].project(_val))
-        return val
+        return self._get_leaf_index().project(val)
 
     def rand(self, shape=None) -> TensorDictBase:
         if shape is None:
             shape = torch.Size([])
-        _dict = {
-            key: self[key].rand(shape)
-            for key in self.keys(True)
-            if isinstance(key, str) and self[key] is not None
-        }
-        return TensorDict(
-            _dict,
-            batch_size=[*shape, *self.shape],
-            device=self._device,
-        )
+        return self._get_leaf_index().rand(torch.Size(shape))
 
     def keys(
         self,
@@ -2914,19 +2920,7 @@ class CompositeSpec(TensorSpec):
     def zero(self, shape=None) -> TensorDictBase:
         if shape is None:
             shape = torch.Size([])
-        try:
-            device = self.device
-        except RuntimeError:
-            device = self._device
-        return TensorDict(
-            {
-                key: self[key].zero(shape)
-                for key in self.keys(True)
-                if isinstance(key, str) and self[key] is not None
-            },
-            torch.Size([*shape, *self.shape]),
-            device=device,
-        )
+        return self._get_leaf_index().zero(torch.Size(shape))
 
     def __eq__(self, other):
         return (
@@ -3401,3 +3395,225 @@ class _CompositeSpecKeysView:
                 return True
         else:
             return False
+
+
+class _CompositeSpecLeafIndex:
+    """Flat view over the leaves of a :class:`CompositeSpec`.
+
+    The nested structure is walked once and the leaves that can be handled
+    jointly are grouped by dtype and device. :meth:`rand` then draws a single
+    tensor per group of floating-point bounded (or unbounded continuous) leaves,
+    and :meth:`is_in` / :meth:`project` compare the concatenated values of a
+    group of bounded leaves against their bounds with a single device
+    synchronization. Other leaves fall back on their own methods.
+
+    The index is invalidated whenever an entry of the composite spec (or of one
+    of its nested composite specs) is set or deleted, when a shape is reset, or
+    when the dtype, shape, device or space of a leaf is modified in-place.
+    """
+
+    def __init__(self, composite: CompositeSpec):
+        self._versions = []
+        self.leaves = []
+        self.tree = self._build_tree(composite, ())
+        self._leaf_states = [self._leaf_state(spec) for _, spec in self.leaves]
+        self._build_groups()
+
+    @staticmethod
+    def _leaf_state(spec):
+        # objects compared by identity, and values compared by equality
+        space = getattr(spec, "space", None)
+        refs = (space,)
+        values = (spec.dtype, spec.shape, spec.device)
+        if isinstance(space, ContinuousBox):
+            refs += (space._minimum, space._maximum)
+            values += (space._minimum._version, space._maximum._version, space.device)
+        return refs, values
+
+    def is_valid(self) -> bool:
+        for composite, version in self._versions:
+            if composite._structure_version != version:
+                return False
+        for (_, spec), (refs, values) in zip(self.leaves, self._leaf_states):
+            new_refs, new_values = self._leaf_state(spec)
+            if new_values != values or any(
+                ref is not new_ref for ref, new_ref in zip(refs, new_refs)
+            ):
+                return False
+        return True
+
+    def _build_tree(self, composite, prefix):
+        self._versions.append((composite, composite._structure_version))
+        children = []
+        for key, spec in composite._specs.items():
+            if spec is None:
+                continue
+            if type(spec) is CompositeSpec:
+                children.append((key, self._build_tree(spec, prefix + (key,))))
+            else:
+                children.append((key, len(self.leaves)))
+                self.leaves.append((prefix + (key,), spec))
+        return composite, children
+
+    @staticmethod
+    def _flat_bounds(spec):
+        minimum = spec.space.minimum.expand(spec.shape).reshape(-1)
+        maximum = spec.space.maximum.expand(spec.shape).reshape(-1)
+        return minimum, maximum
+
+    def _build_groups(self):
+        uniform = {}
+        normal = {}
+        bounded = {}
+        self._rand_singles = []
+        self._check_singles = []
+        for i, (_, spec) in enumerate(self.leaves):
+            spec_type = type(spec)
+            group_key = (spec.dtype, spec.device)
+            if spec_type.rand is BoundedTensorSpec.rand and spec.dtype in (
+                torch.float,
+                torch.double,
+                torch.half,
+            ):
+                uniform.setdefault(group_key, []).append(i)
+            elif spec_type.rand is UnboundedContinuousTensorSpec.rand:
+                normal.setdefault(group_key, []).append(i)
+            else:
+                self._rand_singles.append(i)
+
+            if (
+                spec_type.is_in is BoundedTensorSpec.is_in
+                and spec_type._project is BoundedTensorSpec._project
+            ):
+                bounded.setdefault(group_key, []).append(i)
+            elif (
+                spec_type.is_in
+                not in (
+                    UnboundedContinuousTensorSpec.is_in,
+                    UnboundedDiscreteTensorSpec.is_in,
+                )
+                or spec_type.project is not TensorSpec.project
+            ):
+                self._check_singles.append(i)
+
+        self._uniform_groups = []
+        for (dtype, device), idx in uniform.items():
+            minimum, maximum = zip(*(self._flat_bounds(self.leaves[i][1]) for i in idx))
+            minimum = torch.cat(minimum).to(dtype)
+            maximum = torch.cat(maximum).to(dtype)
+            self._uniform_groups.append(
+                (idx, dtype, device, minimum, maximum - minimum, maximum)
+            )
+        self._normal_groups = [
+            (idx, dtype, device) for (dtype, device), idx in normal.items()
+        ]
+        self._bounded_groups = []
+        for (dtype, device), idx in bounded.items():
+            minimum, maximum = zip(*(self._flat_bounds(self.leaves[i][1]) for i in idx))
+            self._bounded_groups.append(
+                (idx, device, torch.cat(minimum), torch.cat(maximum))
+            )
+
+    def _split(self, flat, idx, shape, out):
+        numels = [self.leaves[i][1].shape.numel() for i in idx]
+        for i, chunk in zip(idx, flat.split(numels, -1)):
+            out[i] = chunk.reshape(torch.Size([*shape, *self.leaves[i][1].shape]))
+
+    def rand(self, shape: torch.Size) -> TensorDictBase:
+        out = [None] * len(self.leaves)
+        for idx, dtype, device, minimum, interval, maximum in self._uniform_groups:
+            flat = torch.empty(
+                (*shape, minimum.numel()), dtype=dtype, device=device
+            ).uniform_()
+            flat = flat.mul_(interval).add_(minimum).clamp_(minimum, maximum)
+            self._split(flat, idx, shape, out)
+        for idx, dtype, device in self._normal_groups:
+            numel = sum(self.leaves[i][1].shape.numel() for i in idx)
+            flat = torch.randn((*shape, numel), dtype=dtype, device=device)
+            self._split(flat, idx, shape, out)
+        for i in self._rand_singles:
+            out[i] = self.leaves[i][1].rand(shape)
+        return self._assemble(self.tree, out, shape, strict_device=False)
+
+    def zero(self, shape: torch.Size) -> TensorDictBase:
+        out = [spec.zero(shape) for _, spec in self.leaves]
+        return self._assemble(self.tree, out, shape, strict_device=True)
+
+    def _assemble(self, node, out, shape, strict_device):
+        composite, children = node
+        if strict_device:
+            try:
+                device = composite.device
+            except RuntimeError:
+                device = composite._device
+        else:
+            device = composite._device
+        source = {}
+        for key, child in children:
+            if isinstance(child, int):
+                value = out[child]
+                if device is not None and value.device != device:
+                    value = value.to(device)
+            else:
+                value = self._assemble(child, out, shape, strict_device)
+            source[key] = value
+        return TensorDict(
+            source,
+            batch_size=torch.Size([*shape, *composite.shape]),
+            device=device,
+            _run_checks=False,
+        )
+
+    def _flat_values(self, val, idx, device):
+        """Returns the values of a group of leaves concatenated along the last dimension.
+
+        Returns ``None`` if the values cannot be concatenated (different
+        devices, dtypes or leading dimensions, or unexpected trailing shape).
+        """
+        flat = []
+        batch_shape = dtype = None
+        for i in idx:
+            key, spec = self.leaves[i]
+            value = val.get(key)
+            ndim = value.ndimension() - len(spec.shape)
+            if ndim < 0 or value.shape[ndim:] != spec.shape or value.device != device:
+                return None
+            if batch_shape is None:
+                batch_shape = value.shape[:ndim]
+                dtype = value.dtype
+            elif value.shape[:ndim] != batch_shape or value.dtype != dtype:
+                return None
+            flat.append(value.reshape(*batch_shape, -1))
+        return torch.cat(flat, -1)
+
+    def is_in(self, val: TensorDictBase) -> bool:
+        for idx, device, minimum, maximum in self._bounded_groups:
+            flat = self._flat_values(val, idx, device)
+            if flat is None:
+                if not all(
+                    self.leaves[i][1].is_in(val.get(self.leaves[i][0])) for i in idx
+                ):
+                    return False
+            elif not ((flat >= minimum) & (flat <= maximum)).all():
+                return False
+        for i in self._check_singles:
+            key, spec = self.leaves[i]
+            if not spec.is_in(val.get(key)):
+                return False
+        return True
+
+    def project(self, val: TensorDictBase) -> TensorDictBase:
+        for idx, device, minimum, maximum in self._bounded_groups:
+            flat = self._flat_values(val, idx, device)
+            if flat is not None and ((flat >= minimum) & (flat <= maximum)).all():
+                continue
+            self._project_leaves(val, idx)
+        self._project_leaves(val, self._check_singles)
+        return val
+
+    def _project_leaves(self, val, idx):
+        for i in idx:
+            key, spec = self.leaves[i]
+            _val = val.get(key)
+            if not spec.is_in(_val):
+                val.set(key, spec.project(_val))
@@ -15,6 +15,7 @@ from .transforms import (
     Compose,
     DiscreteActionProjection,
     DoubleToFloat,
+    encode_storage,
     ExcludeTransform,
     FiniteTensorDictCheck,
     FlattenObservation,
@@ -23,7 +23,7 @@ from torchrl.data.tensor_specs import (
     UnboundedContinuousTensorSpec,
 )
 from torchrl.data.utils import DEVICE_TYPING
-from torchrl.envs.utils import get_available_libraries, step_mdp
+from torchrl.envs.utils import _SpecChecks, get_available_libraries, step_mdp
 
 LIBRARIES = get_available_libraries()
 
@@ -165,9 +165,11 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
             and possibly others).
         batch_size (torch.Size): number of environments contained in the instance;
         device (torch.device): device where the env input and output are expected to live
-        run_type_checks (bool): if ``True``, the observation and reward dtypes
-            will be compared against their respective spec and an exception
-            will be raised if they don't match.
+        run_type_checks (bool or int): if ``True``, the observation, reward and
+            done dtypes, shapes and bounds will be compared against their
+            respective spec after each step and an exception will be raised if
+            they don't match. If an integer ``N`` is passed, the checks will
+            be run once every ``N`` steps.
             Defaults to False.
 
     .. note::
@@ -267,7 +269,7 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
         device: DEVICE_TYPING = "cpu",
         dtype: Optional[Union[torch.dtype, np.dtype]] = None,
         batch_size: Optional[torch.Size] = None,
-        run_type_checks: bool = False,
+        run_type_checks: Union[bool, int] = False,
     ):
         self.__dict__["_done_key"] = None
         self.__dict__["_reward_key"] = None
@@ -302,6 +304,10 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
         cls._device = None
         # cached in_keys to be excluded from update when calling step
         cls._cache_in_keys = None
+        # spec checks used when run_type_checks is on, with the output spec
+        # they were built from
+        cls._cache_spec_checks = None
+        cls._type_check_step = 0
 
         # We may assign _input_spec to the cls, but it must be assigned to the instance
         # we pull it off, and place it back where it belongs
@@ -344,12 +350,13 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
         raise RuntimeError("batch_locked is a read-only property")
 
     @property
-    def run_type_checks(self) -> bool:
+    def run_type_checks(self) -> Union[bool, int]:
         return self._run_type_checks
 
     @run_type_checks.setter
-    def run_type_checks(self, run_type_checks: bool) -> None:
+    def run_type_checks(self, run_type_checks: Union[bool, int]) -> None:
         self._run_type_checks = run_type_checks
+        self._type_check_step = 0
 
     @property
     def batch_size(self) -> torch.Size:
@@ -361,6 +368,7 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
     @batch_size.setter
     def batch_size(self, value: torch.Size) -> None:
         self._batch_size = torch.Size(value)
+        self.__dict__["_cache_spec_checks"] = None
         if (
             hasattr(self, "output_spec")
             and self.output_spec.shape[: len(value)] != value
@@ -582,6 +590,7 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
 
     @reward_spec.setter
     def reward_spec(self, value: TensorSpec) -> None:
+        self.__dict__["_cache_spec_checks"] = None
         try:
             self.output_spec.unlock_()
             device = self.output_spec.device
@@ -693,6 +702,7 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
 
     @done_spec.setter
     def done_spec(self, value: TensorSpec) -> None:
+        self.__dict__["_cache_spec_checks"] = None
         try:
             self.output_spec.unlock_()
             device = self.output_spec.device
@@ -749,6 +759,7 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
 
     @observation_spec.setter
     def observation_spec(self, value: TensorSpec) -> None:
+        self.__dict__["_cache_spec_checks"] = None
         try:
             self.output_spec.unlock_()
             device = self.output_spec.device
@@ -866,24 +877,11 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
             next_tensordict_out.set(self.done_key, done)
         tensordict_out.set("next", next_tensordict_out)
 
-        if self.run_type_checks:
-            for key in self._select_observation_keys(tensordict_out):
-                obs = tensordict_out.get(key)
-                self.observation_spec.type_check(obs, key)
-
-            if (
-                next_tensordict_out.get(self.reward_key).dtype
-                is not self.reward_spec.dtype
-            ):
-                raise TypeError(
-                    f"expected reward.dtype to be {self.reward_spec.dtype} "
-                    f"but got {tensordict_out.get(self.reward_key).dtype}"
-                )
-
-            if next_tensordict_out.get(self.done_key).dtype is not self.done_spec.dtype:
-                raise TypeError(
-                    f"expected done.dtype to be torch.bool but got {tensordict_out.get(self.done_key).dtype}"
-                )
+        run_type_checks = self.run_type_checks
+        if run_type_checks:
+            if not self._type_check_step % int(run_type_checks):
+                self._get_spec_checks()(next_tensordict_out)
+            self._type_check_step += 1
         # tensordict could already have a "next" key
         tensordict.update(tensordict_out)
 
@@ -898,6 +896,23 @@ class EnvBase(nn.Module, metaclass=abc.ABCMeta):
             )
         return self._cache_in_keys
 
+    def _get_spec_checks(self):
+        output_spec = self.output_spec
+        cache = self._cache_spec_checks
+        # The checks are rebuilt whenever the output spec is a new object, i.e.
+        # when a TransformedEnv erases its spec cache or does not cache its
+        # specs at all (cache_specs=False).
+        if cache is None or cache[0] is not output_spec:
+            # reward and done entries have been populated during the step
+            spec_checks = _SpecChecks(
+                output_spec["_observation_spec"],
+                output_spec["_reward_spec"],
+                output_spec["_done_spec"],
+            )
+            cache = (output_spec, spec_checks)
+            self.__dict__["_cache_spec_checks"] = cache
+        return cache[1]
+
     def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
         raise NotImplementedError("EnvBase.forward is not implemented")
 
@@ -6,7 +6,6 @@
 from __future__ import annotations
 
 import abc
-import itertools
 import warnings
 from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
@@ -15,10 +14,50 @@ import torch
 from tensordict import TensorDict
 from tensordict.tensordict import TensorDictBase
 
-from torchrl.data.tensor_specs import TensorSpec, UnboundedContinuousTensorSpec
+from torchrl.data.tensor_specs import (
+    _CHECK_SPEC_ENCODE,
+    CompositeSpec,
+    TensorSpec,
+    UnboundedContinuousTensorSpec,
+)
+from torchrl.data.utils import numpy_to_torch_dtype_dict
 from torchrl.envs.common import _EnvWrapper
 
 
+def _encode_array(spec: TensorSpec, value: Any) -> torch.Tensor:
+    """Encodes a value with a spec, without any copy when the value is a numpy array matching the spec."""
+    if (
+        not _CHECK_SPEC_ENCODE
+        and type(value) is np.ndarray
+        and value.flags.c_contiguous
+        and value.shape == spec.shape
+        and numpy_to_torch_dtype_dict.get(value.dtype) is spec.dtype
+    ):
+        return torch.from_numpy(value)
+    return spec.encode(value, ignore_device=True)
+
+
+class _SpecReaders:
+    """Specs used to read the outputs of a gym-like environment.
+
+    Querying the specs through the environment properties involves several
+    lookups in the output spec, which is significant for environments whose
+    step is cheap. The specs are gathered once and re-gathered whenever the
+    output spec (or one of its nested specs) is modified.
+    """
+
+    def __init__(self, env: GymLikeEnv):
+        observation_spec = env.observation_spec
+        self.observation_specs = dict(observation_spec.items(True))
+        self.observation_key = next(iter(observation_spec.keys(True, True)), None)
+        self.reward_spec = env.reward_spec
+        # fetched last, as the calls above may populate the output spec
+        self._leaf_index = env.output_spec._get_leaf_index()
+
+    def is_valid(self, output_spec: CompositeSpec) -> bool:
+        return output_spec._get_leaf_index() is self._leaf_index
+
+
 class BaseInfoDictReader(metaclass=abc.ABCMeta):
     """Base class for info-readers."""
 
@@ -87,7 +126,7 @@ class default_info_dict_reader(BaseInfoDictReader):
             )
         for key in self.keys:
             if key in info_dict:
-                tensordict[key] = info_dict[key]
+                tensordict.set(key, info_dict[key])
         return tensordict
 
     @property
@@ -120,8 +159,39 @@ class GymLikeEnv(_EnvWrapper):
     @classmethod
     def __new__(cls, *args, **kwargs):
         cls._info_dict_reader = None
+        cls._cache_spec_readers = None
         return super().__new__(cls, *args, _batch_locked=True, **kwargs)
 
+    def _get_spec_readers(self) -> _SpecReaders:
+        spec_readers = self._cache_spec_readers
+        if spec_readers is None or not spec_readers.is_valid(self.output_spec):
+            spec_readers = _SpecReaders(self)
+            self.__dict__["_cache_spec_readers"] = spec_readers
+        return spec_readers
+
+    def _make_tensordict(
+        self, source: Dict[str, Any], batch_size: torch.Size
+    ) -> TensorDictBase:
+        """Builds a tensordict out of the values read from the environment.
+
+        When all the values are tensors with the expected leading dimensions,
+        the tensordict is built without re-running the tensordict checks.
+        """
+        device = self.device
+        ndim = len(batch_size)
+        for key, value in source.items():
+            if (
+                type(key) is not str
+                or not isinstance(value, torch.Tensor)
+                or value.shape[:ndim] != batch_size
+            ):
+                return TensorDict(source, batch_size=batch_size, device=device)
+            if value.device != device:
+                source[key] = value.to(device)
+        return TensorDict(
+            source, batch_size=batch_size, device=device, _run_checks=False
+        )
+
     def read_action(self, action):
         """Reads the action obtained from the input TensorDict and transforms it in the format expected by the contained environment.
 
@@ -154,7 +224,8 @@ class GymLikeEnv(_EnvWrapper):
             step_reward (reward in the format provided by the inner env): reward of this particular step
 
         """
-        return total_reward + self.reward_spec.encode(step_reward, ignore_device=True)
+        reward_spec = self._get_spec_readers().reward_spec
+        return total_reward + _encode_array(reward_spec, step_reward)
 
     def read_obs(
         self, observations: Union[Dict[str, Any], torch.Tensor, np.ndarray]
@@ -173,14 +244,15 @@ class GymLikeEnv(_EnvWrapper):
                 # naming it 'state' will result in envs that have a different name for the state vector
                 # when queried with and without pixels
                 observations["observation"] = observations.pop("state")
+        spec_readers = self._get_spec_readers()
         if not isinstance(observations, (TensorDict, dict)):
-            (key,) = itertools.islice(self.observation_spec.keys(True, True), 1)
-            observations = {key: observations}
+            observations = {spec_readers.observation_key: observations}
+        observation_specs = spec_readers.observation_specs
         for key, val in observations.items():
-            observations[key] = self.observation_spec[key].encode(
-                val, ignore_device=True
-            )
-        # observations = self.observation_spec.encode(observations, ignore_device=True)
+            spec = observation_specs.get(key)
+            if spec is None:
+                spec = self.observation_spec[key]
+            observations[key] = _encode_array(spec, val)
         return observations
 
     def _step(self, tensordict: TensorDictBase) -> TensorDictBase:
@@ -211,7 +283,7 @@ class GymLikeEnv(_EnvWrapper):
                 )
 
             if _reward is None:
-                _reward = self.reward_spec.zero()
+                _reward = self._get_spec_readers().reward_spec.zero()
 
             reward = self.read_reward(reward, _reward)
 
@@ -232,16 +304,18 @@ class GymLikeEnv(_EnvWrapper):
         # done = self._to_tensor(done, dtype=torch.bool)
         obs_dict["reward"] = reward
         obs_dict["done"] = done
-        obs_dict = {("next", key): val for key, val in obs_dict.items()}
-
-        tensordict_out = TensorDict(
-            obs_dict, batch_size=tensordict.batch_size, device=self.device
-        )
+        batch_size = tensordict.batch_size
+        next_tensordict = self._make_tensordict(obs_dict, batch_size)
 
         if self.info_dict_reader is not None and info is not None:
-            self.info_dict_reader(info, tensordict_out.get("next"))
+            self.info_dict_reader(info, next_tensordict)
 
-        return tensordict_out
+        return TensorDict(
+            {"next": next_tensordict},
+            batch_size=batch_size,
+            device=self.device,
+            _run_checks=False,
+        )
 
     def _reset(
         self, tensordict: Optional[TensorDictBase] = None, **kwargs
@@ -254,11 +328,7 @@ class GymLikeEnv(_EnvWrapper):
         if len(other) == 1:
             info = other[0]
 
-        tensordict_out = TensorDict(
-            source=self.read_obs(obs),
-            batch_size=self.batch_size,
-            device=self.device,
-        )
+        tensordict_out = self._make_tensordict(self.read_obs(obs), self.batch_size)
         if self.info_dict_reader is not None and info is not None:
             self.info_dict_reader(info, tensordict_out)
         elif info is None and self.info_dict_reader is not None:
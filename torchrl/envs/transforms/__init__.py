@@ -43,5 +43,6 @@ from .transforms import (
     UnsqueezeTransform,
     VecNorm,
 )
+from .utils import encode_storage
 from .vc1 import VC1Transform
 from .vip import VIPRewardTransform, VIPTransform
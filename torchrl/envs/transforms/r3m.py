@@ -26,6 +26,7 @@ from torchrl.envs.transforms.transforms import (
     Transform,
     UnsqueezeTransform,
 )
+from torchrl.envs.transforms.utils import _EmbeddingCache
 
 try:
     from torchvision import models
@@ -55,7 +56,14 @@ class _R3MNet(Transform):
 
     inplace = False
 
-    def __init__(self, in_keys, out_keys, model_name, del_keys: bool = True):
+    def __init__(
+        self,
+        in_keys,
+        out_keys,
+        model_name,
+        del_keys: bool = True,
+        cache_size: int = 0,
+    ):
         if not _has_tv:
             raise ImportError(
                 "Tried to instantiate R3M without torchvision. Make sure you have "
@@ -82,6 +90,7 @@ class _R3MNet(Transform):
         super().__init__(in_keys=in_keys, out_keys=out_keys)
         self.convnet = convnet
         self.del_keys = del_keys
+        self._embedding_cache = _EmbeddingCache(cache_size) if cache_size else None
 
     def _call(self, tensordict):
         tensordict_view = tensordict.view(-1)
@@ -98,7 +107,10 @@ class _R3MNet(Transform):
         if obs.ndimension() > 4:
             shape = obs.shape[:-3]
             obs = obs.flatten(0, -4)
-        out = self.convnet(obs)
+        if self._embedding_cache is not None:
+            out = self._embedding_cache(self.convnet, obs)
+        else:
+            out = self.convnet(obs)
         if shape is not None:
             out = out.view(*shape, *out.shape[1:])
         return out
@@ -142,6 +154,8 @@ class _R3MNet(Transform):
         r3m_instance.convnet.load_state_dict(state_dict)
 
     def load_weights(self, dir_prefix=None, tv_weights=None):
+        if self._embedding_cache is not None:
+            self._embedding_cache.clear()
         if dir_prefix is not None and tv_weights is not None:
             raise RuntimeError(
                 "torchvision weights API does not allow for custom download path."
@@ -218,6 +232,10 @@ class R3MTransform(Compose):
         tensor_pixels_keys (list of str, optional): Optionally, one can keep the
             original images (as collected from the env) in the output tensordict.
             If no value is provided, this won't be collected.
+        cache_size (int, optional): if positive, the embeddings are stored in a
+            least-recently-used cache of this size, keyed by the content of
+            the (pre-processed) frames. Identical frames are then encoded only
+            once. Defaults to ``0`` (no caching).
     """
 
     @classmethod
@@ -237,6 +255,7 @@ class R3MTransform(Compose):
         download: Union[bool, WeightsEnum, str] = False,
         download_path: Optional[str] = None,
         tensor_pixels_keys: List[str] = None,
+        cache_size: int = 0,
     ):
         super().__init__()
         self.in_keys = in_keys if in_keys is not None else ["pixels"]
@@ -247,6 +266,7 @@ class R3MTransform(Compose):
         self.size = size
         self.stack_images = stack_images
         self.tensor_pixels_keys = tensor_pixels_keys
+        self.cache_size = cache_size
         self._init()
 
     def _init(self):
@@ -327,6 +347,7 @@ class R3MTransform(Compose):
                 out_keys=out_keys,
                 model_name=model_name,
                 del_keys=False,
+                cache_size=self.cache_size,
             )
             flatten = FlattenObservation(-2, -1, out_keys)
             transforms = [*transforms, cattensors, network, flatten]
@@ -337,6 +358,7 @@ class R3MTransform(Compose):
                 out_keys=out_keys,
                 model_name=model_name,
                 del_keys=True,
+                cache_size=self.cache_size,
             )
             transforms = [*transforms, network]
 
@@ -3,9 +3,14 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
+from collections import OrderedDict
+from typing import Callable, List, Optional
 
 import torch
 
+from torchrl.data.utils import DEVICE_TYPING
+
 
 def check_finite(tensor: torch.Tensor):
     """Raise an error if a tensor has non-finite elements."""
@@ -20,3 +25,109 @@ def _init_first(fun):
         return fun(self, *args, **kwargs)
 
     return new_fun
+
+
+class _EmbeddingCache:
+    """A least-recently-used cache of embeddings keyed by frame content.
+
+    Frozen encoders (R3M, VIP, VC1) map identical frames onto identical
+    embeddings. This cache hashes each frame of a batch and only runs the
+    encoder on the frames that have not been seen yet.
+
+    Args:
+        max_size (int): maximum number of embeddings kept in the cache. When
+            exceeded, the least recently used entries are discarded.
+
+    """
+
+    def __init__(self, max_size: int):
+        if max_size <= 0:
+            raise ValueError(f"max_size must be strictly positive, got {max_size}.")
+        self.max_size = max_size
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+
+    @staticmethod
+    def _hash_frames(obs: torch.Tensor) -> List[bytes]:
+        prefix = f"{obs.dtype}{tuple(obs.shape[1:])}".encode()
+        frames = obs.detach().cpu().contiguous().view(obs.shape[0], -1)
+        # reinterpret the bytes to support dtypes numpy does not know about
+        frames = frames.view(torch.uint8).numpy()
+        return [
+            hashlib.blake2b(prefix + frame.tobytes(), digest_size=16).digest()
+            for frame in frames
+        ]
+
+    def __call__(self, fn: Callable, obs: torch.Tensor) -> torch.Tensor:
+        """Computes ``fn(obs)`` over the first dimension of ``obs``, reusing cached embeddings."""
+        keys = self._hash_frames(obs)
+        cache = self._cache
+        missing = {}
+        for i, key in enumerate(keys):
+            if key in cache:
+                cache.move_to_end(key)
+            elif key not in missing:
+                missing[key] = i
+        if missing:
+            computed = fn(obs[list(missing.values())])
+            for key, embedding in zip(missing, computed):
+                cache[key] = embedding.detach().clone()
+        out = torch.stack([cache[key] for key in keys], 0).to(obs.device)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+        return out
+
+
+@torch.no_grad()
+def encode_storage(
+    transform: Callable,
+    storage: "Storage",  # noqa: F821
+    batch_size: int = 256,
+    scratch_dir: Optional[str] = None,
+    device: Optional[DEVICE_TYPING] = None,
+) -> "LazyMemmapStorage":  # noqa: F821
+    """Encodes the content of a replay buffer storage once and for all.
+
+    The transform (typically an :class:`~torchrl.envs.transforms.R3MTransform`,
+    :class:`~torchrl.envs.transforms.VIPTransform` or
+    :class:`~torchrl.envs.transforms.VC1Transform`) is applied to the stored
+    data in batches of ``batch_size`` elements and the result is written in a
+    new :class:`~torchrl.data.LazyMemmapStorage`. A replay buffer built on top
+    of this storage will sample the embeddings directly, without running the
+    encoder at each access.
+
+    Args:
+        transform (callable): the transform to apply to the stored tensordicts.
+        storage (Storage): the storage containing the raw data.
+        batch_size (int, optional): the number of elements to encode at once.
+            Defaults to ``256``.
+        scratch_dir (str or path, optional): the directory where the
+            memory-mapped tensors will be written.
+        device (torch.device, optional): the device of the output storage.
+            Defaults to ``"cpu"``.
+
+    Returns:
+        a :class:`~torchrl.data.LazyMemmapStorage` with the same ``max_size``
+        as the input storage and containing the encoded data.
+
+    Examples:
+        >>> rb = TensorDictReplayBuffer(storage=LazyMemmapStorage(1000))
+        >>> rb.extend(data)
+        >>> r3m = R3MTransform("resnet50", in_keys=["pixels"], download=True)
+        >>> encoded_rb = TensorDictReplayBuffer(
+        ...     storage=encode_storage(r3m, rb._storage),
+        ... )
+
+    """
+    from torchrl.data.replay_buffers.storages import LazyMemmapStorage
+
+    out = LazyMemmapStorage(storage.max_size, scratch_dir=scratch_dir, device=device)
+    for start in range(0, len(storage), batch_size):
+        idx = list(range(start, min(start + batch_size, len(storage))))
+        out.set(idx, transform(storage.get(idx)))
+    return out
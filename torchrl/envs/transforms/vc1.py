@@ -21,6 +21,7 @@ from torchrl.envs.transforms.transforms import (
     ToTensorImage,
     Transform,
 )
+from torchrl.envs.transforms.utils import _EmbeddingCache
 
 _has_vc = importlib.util.find_spec("vc_models") is not None
 
@@ -58,6 +59,10 @@ class VC1Transform(Transform):
             which provides a small, untrained model for testing.
         del_keys (bool, optional): If ``True`` (default), the input key will be
             discarded from the returned tensordict.
+        cache_size (int, optional): if positive, the embeddings are stored in a
+            least-recently-used cache of this size, keyed by the content of
+            the (pre-processed) frames. Identical frames are then encoded only
+            once. Defaults to ``0`` (no caching).
     """
 
     inplace = False
@@ -66,7 +71,14 @@ class VC1Transform(Transform):
         "VC1Transform.install_vc_models()."
     )
 
-    def __init__(self, in_keys, out_keys, model_name, del_keys: bool = True):
+    def __init__(
+        self,
+        in_keys,
+        out_keys,
+        model_name,
+        del_keys: bool = True,
+        cache_size: int = 0,
+    ):
         if model_name == "default":
             self.make_noload_model()
             model_name = "vc1_vitb_noload"
@@ -74,6 +86,7 @@ class VC1Transform(Transform):
         self.del_keys = del_keys
 
         super().__init__(in_keys=in_keys, out_keys=out_keys)
+        self._embedding_cache = _EmbeddingCache(cache_size) if cache_size else None
         self._init()
 
     def _init(self):
@@ -93,6 +106,8 @@ class VC1Transform(Transform):
             model_name
         )
         self.model = model
+        if self._embedding_cache is not None:
+            self._embedding_cache.clear()
         self.embd_size = embd_size
         self.model_transforms = self._map_tv_to_torchrl(model_transforms)
 
@@ -176,7 +191,10 @@ class VC1Transform(Transform):
         if obs.ndimension() > 4:
             shape = obs.shape[:-3]
             obs = obs.flatten(0, -4)
-        out = self.model(obs)
+        if self._embedding_cache is not None:
+            out = self._embedding_cache(self.model, obs)
+        else:
+            out = self.model(obs)
         if shape is not None:
             out = out.view(*shape, *out.shape[1:])
         return out
@@ -201,6 +219,11 @@ class VC1Transform(Transform):
 
         return observation_spec
 
+    def _load_from_state_dict(self, *args, **kwargs):
+        if self._embedding_cache is not None:
+            self._embedding_cache.clear()
+        return super()._load_from_state_dict(*args, **kwargs)
+
     def to(self, dest: Union[DEVICE_TYPING, torch.dtype]):
         if isinstance(dest, torch.dtype):
             self._dtype = dest
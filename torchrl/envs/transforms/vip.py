@@ -26,6 +26,7 @@ from torchrl.envs.transforms.transforms import (
     Transform,
     UnsqueezeTransform,
 )
+from torchrl.envs.transforms.utils import _EmbeddingCache
 
 try:
     from torchvision import models
@@ -53,7 +54,14 @@ class _VIPNet(Transform):
 
     inplace = False
 
-    def __init__(self, in_keys, out_keys, model_name="resnet50", del_keys: bool = True):
+    def __init__(
+        self,
+        in_keys,
+        out_keys,
+        model_name="resnet50",
+        del_keys: bool = True,
+        cache_size: int = 0,
+    ):
         if not _has_tv:
             raise ImportError(
                 "Tried to instantiate VIP without torchvision. Make sure you have "
@@ -71,6 +79,7 @@ class _VIPNet(Transform):
         super().__init__(in_keys=in_keys, out_keys=out_keys)
         self.convnet = convnet
         self.del_keys = del_keys
+        self._embedding_cache = _EmbeddingCache(cache_size) if cache_size else None
 
     def _call(self, tensordict):
         tensordict_view = tensordict.view(-1)
@@ -87,7 +96,10 @@ class _VIPNet(Transform):
         if obs.ndimension() > 4:
             shape = obs.shape[:-3]
             obs = obs.flatten(0, -4)
-        out = self.convnet(obs)
+        if self._embedding_cache is not None:
+            out = self._embedding_cache(self.convnet, obs)
+        else:
+            out = self.convnet(obs)
         if shape is not None:
             out = out.view(*shape, *out.shape[1:])
         return out
@@ -129,6 +141,8 @@ class _VIPNet(Transform):
         vip_instance.convnet.load_state_dict(state_dict)
 
     def load_weights(self, dir_prefix=None, tv_weights=None):
+        if self._embedding_cache is not None:
+            self._embedding_cache.clear()
         if dir_prefix is not None and tv_weights is not None:
             raise RuntimeError(
                 "torchvision weights API does not allow for custom download path."
@@ -193,6 +207,10 @@ class VIPTransform(Compose):
         tensor_pixels_keys (list of str, optional): Optionally, one can keep the
             original images (as collected from the env) in the output tensordict.
             If no value is provided, this won't be collected.
+        cache_size (int, optional): if positive, the embeddings are stored in a
+            least-recently-used cache of this size, keyed by the content of
+            the (pre-processed) frames. Identical frames are then encoded only
+            once. Defaults to ``0`` (no caching).
     """
 
     @classmethod
@@ -212,6 +230,7 @@ class VIPTransform(Compose):
         download: Union[bool, WeightsEnum, str] = False,
         download_path: Optional[str] = None,
         tensor_pixels_keys: List[str] = None,
+        cache_size: int = 0,
     ):
         super().__init__()
         self.in_keys = in_keys if in_keys is not None else ["pixels"]
@@ -222,6 +241,7 @@ class VIPTransform(Compose):
         self.size = size
         self.stack_images = stack_images
         self.tensor_pixels_keys = tensor_pixels_keys
+        self.cache_size = cache_size
         self._init()
 
     def _init(self):
@@ -301,6 +321,7 @@ class VIPTransform(Compose):
                 out_keys=out_keys,
                 model_name=model_name,
                 del_keys=False,
+                cache_size=self.cache_size,
             )
             flatten = FlattenObservation(-2, -1, out_keys)
             transforms = [*transforms, cattensors, network, flatten]
@@ -310,6 +331,7 @@ class VIPTransform(Compose):
                 out_keys=out_keys,
                 model_name=model_name,
                 del_keys=True,
+                cache_size=self.cache_size,
             )
             transforms = [*transforms, network]
 
@@ -33,7 +33,13 @@ __all__ = [
 ]
 
 
-from torchrl.data import CompositeSpec
+from torchrl.data.tensor_specs import (
+    _LazyStackedMixin,
+    BoundedTensorSpec,
+    CompositeSpec,
+    DiscreteTensorSpec,
+    MultiDiscreteTensorSpec,
+)
 
 
 def _convert_exploration_type(*, exploration_mode, exploration_type):
@@ -436,6 +442,80 @@ def check_env_specs(env, return_contiguous=True, check_dtype=True, seed=0):
     print("check_env_specs succeeded!")
 
 
+class _SpecChecks:
+    """A flat list of dtype, shape and bound checks.
+
+    The leaves of the provided composite specs are collected in a list of
+    ``(key, dtype, shape, low, high)`` tuples, such that checking the content
+    of a tensordict does not require traversing the nested specs. The entries
+    are still checked one at a time, but the bound checks of all the leaves are
+    gathered in a single boolean tensor, which is read only once.
+
+    Args:
+        *specs (CompositeSpec): the composite specs whose leaves must be
+            checked.
+
+    Examples:
+        >>> checks = _SpecChecks(env.observation_spec)
+        >>> checks(env.rand_step()["next"])
+
+    """
+
+    def __init__(self, *specs: CompositeSpec):
+        self.checks = []
+        for spec in specs:
+            if spec is not None:
+                self._collect(spec, ())
+
+    def _collect(self, spec, prefix):
+        for key, item in spec.items():
+            key = prefix + (key,)
+            if item is None or isinstance(item, _LazyStackedMixin):
+                # heterogeneous specs are not type-checked
+                continue
+            if isinstance(item, CompositeSpec):
+                self._collect(item, key)
+                continue
+            low = high = None
+            if item.dtype is torch.bool:
+                # booleans cannot be out of bounds
+                pass
+            elif isinstance(item, BoundedTensorSpec):
+                low, high = item.space.minimum, item.space.maximum
+            elif isinstance(item, MultiDiscreteTensorSpec):
+                low, high = torch.zeros_like(item.nvec), item.nvec - 1
+            elif isinstance(item, DiscreteTensorSpec):
+                low, high = 0, item.space.n - 1
+            if len(key) == 1:
+                key = key[0]
+            self.checks.append((key, item.dtype, item.shape, low, high))
+
+    def __call__(self, tensordict: TensorDictBase) -> None:
+        in_bounds = []
+        bounded_keys = []
+        for key, dtype, shape, low, high in self.checks:
+            value = tensordict.get(key, None)
+            if value is None:
+                continue
+            if value.dtype is not dtype:
+                raise TypeError(
+                    f"expected {key}.dtype to be {dtype} but got {value.dtype}"
+                )
+            if (
+                value.ndim < len(shape)
+                or value.shape[value.ndim - len(shape) :] != shape
+            ):
+                raise RuntimeError(
+                    f"expected {key}.shape to end with {shape} but got {value.shape}"
+                )
+            if low is not None:
+                in_bounds.append(((value >= low) & (value <= high)).all())
+                bounded_keys.append(key)
+        if in_bounds and not torch.stack(in_bounds).all():
+            keys = [key for key, ok in zip(bounded_keys, in_bounds) if not ok]
+            raise ValueError(f"The values of the entries {keys} are out of bounds.")
+
+
 def _selective_unsqueeze(tensor: torch.Tensor, batch_size: torch.Size, dim: int = -1):
     shape_len = len(tensor.shape)
 
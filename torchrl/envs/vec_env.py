@@ -21,9 +21,9 @@ import torch
 
 from tensordict import TensorDict, unravel_key
 from tensordict._tensordict import _unravel_key_to_tuple
-from tensordict.tensordict import LazyStackedTensorDict, TensorDictBase
+from tensordict.tensordict import LazyStackedTensorDict, NestedKey, TensorDictBase
 from torch import multiprocessing as mp
-from torchrl._utils import _check_for_faulty_process, VERBOSE
+from torchrl._utils import _check_for_faulty_process, telemetry, VERBOSE
 from torchrl.data.tensor_specs import (
     CompositeSpec,
     DiscreteTensorSpec,
@@ -133,6 +133,17 @@ class _BatchedEnv(EnvBase):
         allow_step_when_done (bool, optional): if ``True``, batched environments can
             execute steps after a done state is encountered.
             Defaults to ``False``.
+        frame_skip (int, optional): number of frames during which each sub-environment
+            repeats the action it received. The repetition is executed
+            where the sub-environment lives (i.e. within the worker process for
+            :class:`ParallelEnv`), such that a single call to :obj:`step()` is
+            communicated to the workers whatever the number of frames.
+            The rewards of the frames are summed, and the repetition is interrupted
+            as soon as a done state is encountered. Defaults to ``1``.
+        max_pool_keys (sequence of NestedKey, optional): observation keys that are
+            max-pooled over the last two frames when :obj:`frame_skip` is greater
+            than one, as it is customary with Atari games.
+            Defaults to ``None`` (no pooling).
 
     """
 
@@ -156,6 +167,8 @@ class _BatchedEnv(EnvBase):
         policy_proof: Optional[Callable] = None,
         device: Optional[DEVICE_TYPING] = None,
         allow_step_when_done: bool = False,
+        frame_skip: int = 1,
+        max_pool_keys: Optional[Sequence[NestedKey]] = None,
     ):
         if device is not None:
             raise ValueError(
@@ -199,6 +212,14 @@ class _BatchedEnv(EnvBase):
         self._share_memory = shared_memory
         self._memmap = memmap
         self.allow_step_when_done = allow_step_when_done
+        if frame_skip < 1:
+            raise ValueError("frame_skip should have a value greater or equal to one.")
+        self.frame_skip = frame_skip
+        self.max_pool_keys = (
+            [unravel_key(key) for key in max_pool_keys]
+            if max_pool_keys is not None
+            else []
+        )
         if self._share_memory and self._memmap:
             raise RuntimeError(
                 "memmap and shared memory are mutually exclusive features."
@@ -459,6 +480,19 @@ class _BatchedEnv(EnvBase):
     def _shutdown_workers(self) -> None:
         raise NotImplementedError
 
+    def gather_telemetry(self, reset: bool = True) -> None:
+        """Merges the telemetry recorded by the worker processes in the one of this process.
+
+        The workers also follow the current :class:`~torchrl._utils.telemetry`
+        toggle of this process from then on. Batched envs that do not start
+        any process have nothing to gather.
+
+        Args:
+            reset (bool, optional): if ``True``, the telemetry of the workers
+                is erased once gathered. Defaults to ``True``.
+        """
+        return
+
     def _set_seed(self, seed: Optional[int]):
         """This method is not used in batched envs."""
         pass
@@ -541,7 +575,13 @@ class SerialEnv(_BatchedEnv):
         for i in range(self.num_workers):
             # shared_tensordicts are locked, and we need to select the keys since we update in-place.
             # There may be unexpected keys, such as "_reset", that we should comfortably ignore here.
-            out_td = self._envs[i]._step(tensordict_in[i])
+            out_td = _step_with_frame_skip(
+                self._envs[i],
+                tensordict_in[i],
+                self.frame_skip,
+                self.env_input_keys,
+                self.max_pool_keys,
+            )
             out_td.update(tensordict_in[i].select(*self.env_input_keys))
             self.shared_tensordicts[i].update_(
                 out_td.select(*self.env_input_keys, *self.env_output_keys)
@@ -712,7 +752,10 @@ class ParallelEnv(_BatchedEnv):
                     self.env_input_keys,
                     self.device,
                     self.allow_step_when_done,
+                    self.frame_skip,
+                    self.max_pool_keys,
                 ),
+                kwargs={"telemetry_enabled": telemetry.is_enabled()},
             )
             w.daemon = True
             w.start()
@@ -756,8 +799,23 @@ class ParallelEnv(_BatchedEnv):
             if msg != "loaded":
                 raise RuntimeError(f"Expected 'loaded' but received {msg}")
 
+    def gather_telemetry(self, reset: bool = True) -> None:
+        if self.is_closed:
+            return
+        for channel in self.parent_channels:
+            channel.send(("telemetry", (telemetry.is_enabled(), reset)))
+        for channel in self.parent_channels:
+            msg, state_dict = channel.recv()
+            if msg != "telemetry":
+                raise RuntimeError(f"Expected 'telemetry' but received {msg}")
+            telemetry.merge(state_dict)
+
     @_check_start
     def _step(self, tensordict: TensorDictBase) -> TensorDictBase:
+        with telemetry.timer("parallel_env/step"):
+            return self._step_workers(tensordict)
+
+    def _step_workers(self, tensordict: TensorDictBase) -> TensorDictBase:
         self._assert_tensordict_shape(tensordict)
         if self._single_task:
             # this is faster than update_ but won't work for lazy stacks
@@ -785,14 +843,15 @@ class ParallelEnv(_BatchedEnv):
             self.parent_channels[i].send(("step", None))
 
         # keys = set()
-        for i in range(self.num_workers):
-            msg, data = self.parent_channels[i].recv()
-            if msg != "step_result":
-                raise RuntimeError(
-                    f"Expected 'step_result' but received {msg} from worker {i}"
-                )
-            if data is not None:
-                self.shared_tensordicts[i].update_(data)
+        with telemetry.timer("parallel_env/ipc_wait"):
+            for i in range(self.num_workers):
+                msg, data = self.parent_channels[i].recv()
+                if msg != "step_result":
+                    raise RuntimeError(
+                        f"Expected 'step_result' but received {msg} from worker {i}"
+                    )
+                if data is not None:
+                    self.shared_tensordicts[i].update_(data)
         # We must pass a clone of the tensordict, as the values of this tensordict
         # will be modified in-place at further steps
         if self._single_task:
@@ -808,6 +867,10 @@ class ParallelEnv(_BatchedEnv):
 
     @_check_start
     def _reset(self, tensordict: TensorDictBase, **kwargs) -> TensorDictBase:
+        with telemetry.timer("parallel_env/reset"):
+            return self._reset_workers(tensordict)
+
+    def _reset_workers(self, tensordict: TensorDictBase) -> TensorDictBase:
         cmd_out = "reset"
         if tensordict is not None and "_reset" in tensordict.keys():
             self._assert_tensordict_shape(tensordict)
@@ -848,14 +911,15 @@ class ParallelEnv(_BatchedEnv):
             out = (cmd_out, tensordict_)
             channel.send(out)
 
-        for i, channel in enumerate(self.parent_channels):
-            if not _reset[i].any():
-                continue
-            cmd_in, data = channel.recv()
-            if cmd_in != "reset_obs":
-                raise RuntimeError(f"received cmd {cmd_in} instead of reset_obs")
-            if data is not None:
-                self.shared_tensordicts[i].update_(data)
+        with telemetry.timer("parallel_env/ipc_wait"):
+            for i, channel in enumerate(self.parent_channels):
+                if not _reset[i].any():
+                    continue
+                cmd_in, data = channel.recv()
+                if cmd_in != "reset_obs":
+                    raise RuntimeError(f"received cmd {cmd_in} instead of reset_obs")
+                if data is not None:
+                    self.shared_tensordicts[i].update_(data)
         if self._single_task:
             # select + clone creates 2 tds, but we can create one only
             out = TensorDict({}, batch_size=self.shared_tensordict_parent.shape)
@@ -973,6 +1037,48 @@ def _recursively_strip_locks_from_state_dict(state_dict: OrderedDict) -> Ordered
     )
 
 
+def _step_with_frame_skip(
+    env: EnvBase,
+    tensordict: TensorDictBase,
+    frame_skip: int,
+    env_input_keys: Sequence[NestedKey],
+    max_pool_keys: Sequence[NestedKey],
+) -> TensorDictBase:
+    """Executes :obj:`env._step` ``frame_skip`` times with the same action.
+
+    The state entries (if any) are carried from one frame to the next, the
+    rewards are summed and the loop is interrupted as soon as a done state is
+    encountered. The entries in ``max_pool_keys`` are max-pooled over the last
+    two frames.
+    """
+    tensordict_out = env._step(tensordict)
+    if frame_skip == 1:
+        return tensordict_out
+    reward_key = env.reward_key
+    done_key = env.done_key
+    next_tensordict = tensordict_out.get("next")
+    reward = next_tensordict.get(reward_key)
+    previous_tensordict = None
+    for _ in range(frame_skip - 1):
+        if next_tensordict.get(done_key).any():
+            break
+        previous_tensordict = next_tensordict
+        tensordict = tensordict.clone(False).update(
+            next_tensordict.select(*env_input_keys, strict=False)
+        )
+        tensordict_out = env._step(tensordict)
+        next_tensordict = tensordict_out.get("next")
+        reward = reward + next_tensordict.get(reward_key)
+    next_tensordict.set(reward_key, reward)
+    if previous_tensordict is not None:
+        for key in max_pool_keys:
+            next_tensordict.set(
+                key,
+                torch.maximum(previous_tensordict.get(key), next_tensordict.get(key)),
+            )
+    return tensordict_out
+
+
 def _run_worker_pipe_shared_mem(
     idx: int,
     parent_pipe: connection.Connection,
@@ -983,10 +1089,16 @@ def _run_worker_pipe_shared_mem(
     env_input_keys: Dict[str, Any],
     device: DEVICE_TYPING = None,
     allow_step_when_done: bool = False,
+    frame_skip: int = 1,
+    max_pool_keys: Optional[Sequence[NestedKey]] = None,
     verbose: bool = False,
+    telemetry_enabled: bool = False,
 ) -> None:
+    telemetry.set_enabled(telemetry_enabled)
     if device is None:
         device = torch.device("cpu")
+    if max_pool_keys is None:
+        max_pool_keys = []
     if device.type == "cuda":
         event = torch.cuda.Event()
     else:
@@ -1046,7 +1158,8 @@ def _run_worker_pipe_shared_mem(
             if not initialized:
                 raise RuntimeError("call 'init' before resetting")
             local_tensordict = data
-            local_tensordict = env._reset(tensordict=local_tensordict)
+            with telemetry.timer("parallel_env/worker_reset"):
+                local_tensordict = env._reset(tensordict=local_tensordict)
 
             if "_reset" in local_tensordict.keys():
                 local_tensordict.del_("_reset")
@@ -1075,7 +1188,10 @@ def _run_worker_pipe_shared_mem(
                     )
             else:
                 local_tensordict = shared_tensordict.clone(recurse=False)
-            local_tensordict = env._step(local_tensordict)
+            with telemetry.timer("parallel_env/worker_step"):
+                local_tensordict = _step_with_frame_skip(
+                    env, local_tensordict, frame_skip, env_input_keys, max_pool_keys
+                )
             if pin_memory:
                 local_tensordict.pin_memory()
             msg = "step_result"
@@ -1109,6 +1225,14 @@ def _run_worker_pipe_shared_mem(
             msg = "state_dict"
             child_pipe.send((msg, state_dict))
 
+        elif cmd == "telemetry":
+            enabled, reset = data
+            telemetry.set_enabled(enabled)
+            state_dict = telemetry.state_dict()
+            if reset:
+                telemetry.reset()
+            child_pipe.send(("telemetry", state_dict))
+
         else:
             err_msg = f"{cmd} from env"
             try:
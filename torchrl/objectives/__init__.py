@@ -9,6 +9,7 @@ from .cql import CQLLoss
 from .ddpg import DDPGLoss
 from .dqn import DistributionalDQNLoss, DQNLoss
 from .dreamer import DreamerActorLoss, DreamerModelLoss, DreamerValueLoss
+from .ensemble import VmapLossEnsemble
 from .iql import IQLLoss
 from .ppo import ClipPPOLoss, KLPENPPOLoss, PPOLoss
 from .redq import REDQLoss
@@ -20,7 +20,13 @@ from torchrl.objectives.utils import (
     distance_loss,
     ValueEstimators,
 )
-from torchrl.objectives.value import GAE, TD0Estimator, TD1Estimator, TDLambdaEstimator
+from torchrl.objectives.value import (
+    GAE,
+    TD0Estimator,
+    TD1Estimator,
+    TDLambdaEstimator,
+    VTrace,
+)
 
 
 class A2CLoss(LossModule):
@@ -281,6 +287,8 @@ class A2CLoss(LossModule):
                 reward=self.tensor_keys.reward,
                 done=self.tensor_keys.done,
             )
+            if isinstance(self._value_estimator, VTrace):
+                self._value_estimator.set_keys(action=self.tensor_keys.action)
 
     def reset(self) -> None:
         pass
@@ -339,15 +347,24 @@ class A2CLoss(LossModule):
     def _cached_detach_critic_params(self):
         return self.critic_params.detach()
 
+    @property
+    @_cache_values
+    def _cached_detach_actor_params(self):
+        return self.actor_params.detach()
+
     @dispatch()
     def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
         tensordict = tensordict.clone(False)
         advantage = tensordict.get(self.tensor_keys.advantage, None)
         if advantage is None:
+            kwargs = {}
+            if isinstance(self.value_estimator, VTrace):
+                kwargs["actor_params"] = self._cached_detach_actor_params
             self.value_estimator(
                 tensordict,
                 params=self._cached_detach_critic_params,
                 target_params=self.target_critic_params,
+                **kwargs,
             )
             advantage = tensordict.get(self.tensor_keys.advantage)
         log_probs, dist = self._log_probs(tensordict)
@@ -378,6 +395,10 @@ class A2CLoss(LossModule):
             self._value_estimator = GAE(value_network=self.critic, **hp)
         elif value_type == ValueEstimators.TDLambda:
             self._value_estimator = TDLambdaEstimator(value_network=self.critic, **hp)
+        elif value_type == ValueEstimators.VTrace:
+            self._value_estimator = VTrace(
+                value_network=self.critic, actor_network=self.actor, **hp
+            )
         else:
             raise NotImplementedError(f"Unknown value type {value_type}")
 
@@ -388,4 +409,6 @@ class A2CLoss(LossModule):
             "reward": self.tensor_keys.reward,
             "done": self.tensor_keys.done,
         }
+        if value_type == ValueEstimators.VTrace:
+            tensor_keys["action"] = self.tensor_keys.action
         self._value_estimator.set_keys(**tensor_keys)
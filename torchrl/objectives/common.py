@@ -26,7 +26,7 @@ from torch.nn import Parameter
 from torchrl._utils import RL_WARNINGS
 from torchrl.envs.utils import ExplorationType, set_exploration_type
 from torchrl.modules.utils import Buffer
-from torchrl.objectives.utils import _cache_values, ValueEstimators
+from torchrl.objectives.utils import _cache_values, _compile_methods, ValueEstimators
 from torchrl.objectives.value import ValueEstimatorBase
 
 _has_functorch = False
@@ -96,6 +96,8 @@ class LossModule(TensorDictModuleBase):
 
     default_value_estimator: ValueEstimators = None
     SEP = "_sep_"
+    # the methods compiled by :meth:`compile_core`, which only take and return tensors
+    _compilable_methods: Tuple[str, ...] = ()
 
     @property
     def tensor_keys(self) -> _AcceptedKeys:
@@ -508,6 +510,39 @@ class LossModule(TensorDictModuleBase):
         # mainly used for PPO with KL target
         pass
 
+    def compile_core(self, **compile_kwargs) -> LossModule:
+        """Compiles the tensor-only core of the loss with :func:`torch.compile`.
+
+        Most of the per-update overhead of a loss module comes from Python:
+        tensordict construction, exploration type context managers, parameter
+        caching and shape checks. These cause graph breaks and are kept out of
+        the compiled code: the inputs are read from the tensordict and the
+        network calls are executed eagerly, and the computation of the losses
+        from the network outputs is compiled without graph breaks. Value
+        estimators are executed eagerly: their tensor-only computations are
+        too small to benefit from compilation, and the vectorized GAE has
+        data-dependent shapes.
+
+        Unlike :meth:`torch.nn.Module.compile`, which compiles the whole
+        ``forward`` call in-place, this method only compiles the methods listed
+        in the ``_compilable_methods`` class attribute and returns the module
+        itself.
+
+        Keyword Args:
+            compile_kwargs: keyword arguments passed to :func:`torch.compile`.
+
+        Returns:
+            the loss module.
+
+        Examples:
+            >>> loss_fn = ClipPPOLoss(actor, critic)
+            >>> loss_fn = loss_fn.compile_core()
+            >>> loss_vals = loss_fn(data)
+
+        """
+        _compile_methods(self, self._compilable_methods, **compile_kwargs)
+        return self
+
     def to(self, *args, **kwargs):
         # get the names of the parameters to map
         out = super().to(*args, **kwargs)
@@ -4,7 +4,7 @@
 # LICENSE file in the root directory of this source tree.
 import warnings
 from dataclasses import dataclass
-from typing import Union
+from typing import Tuple, Union
 
 import torch
 from tensordict import TensorDict, TensorDictBase
@@ -294,21 +294,11 @@ class DQNLoss(LossModule):
         action = tddevice.get(self.tensor_keys.action)
         pred_val = td_copy.get(self.tensor_keys.action_value)
 
-        if self.action_space == "categorical":
-            if action.shape != pred_val.shape:
-                # unsqueeze the action if it lacks on trailing singleton dim
-                action = action.unsqueeze(-1)
-            pred_val_index = torch.gather(pred_val, -1, index=action).squeeze(-1)
-        else:
-            action = action.to(torch.float)
-            pred_val_index = (pred_val * action).sum(-1)
-
         target_value = self.value_estimator.value_estimate(
             tddevice.clone(False), target_params=self.target_value_network_params
         ).squeeze(-1)
 
-        priority_tensor = (pred_val_index - target_value).pow(2)
-        priority_tensor = priority_tensor.detach().unsqueeze(-1)
+        loss, priority_tensor = self._loss(pred_val, action, target_value)
         if tddevice.device is not None:
             priority_tensor = priority_tensor.to(tddevice.device)
 
@@ -317,8 +307,24 @@ class DQNLoss(LossModule):
             priority_tensor,
             inplace=True,
         )
+        return TensorDict({"loss": loss}, [])
+
+    def _loss(
+        self, pred_val: torch.Tensor, action: torch.Tensor, target_value: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        if self.action_space == "categorical":
+            if action.shape != pred_val.shape:
+                # unsqueeze the action if it lacks on trailing singleton dim
+                action = action.unsqueeze(-1)
+            pred_val_index = torch.gather(pred_val, -1, index=action).squeeze(-1)
+        else:
+            action = action.to(torch.float)
+            pred_val_index = (pred_val * action).sum(-1)
+
+        priority_tensor = (pred_val_index - target_value).pow(2)
+        priority_tensor = priority_tensor.detach().unsqueeze(-1)
         loss = distance_loss(pred_val_index, target_value, self.loss_function)
-        return TensorDict({"loss": loss.mean()}, [])
+        return loss.mean(), priority_tensor
 
 
 class DistributionalDQNLoss(LossModule):
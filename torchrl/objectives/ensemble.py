@@ -0,0 +1,246 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, Sequence
+
+import torch
+from tensordict.tensordict import TensorDict, TensorDictBase
+from torch import nn
+
+from torchrl.objectives.common import LossModule
+
+try:
+    from torch import vmap
+except ImportError as err:
+    try:
+        from functorch import vmap
+    except ImportError:
+        raise ImportError(
+            "vmap couldn't be found. Make sure you have torch>1.13 installed."
+        ) from err
+
+try:
+    from torch.func import functional_call
+
+    # loss modules do not register tied parameters twice
+    functional_call = functools.partial(functional_call, tie_weights=False)
+except ImportError:
+    from torch.nn.utils.stateless import functional_call
+
+
+class VmapLossEnsemble(nn.Module):
+    """Trains an ensemble of loss modules in a single vmapped forward and backward pass.
+
+    The parameters and buffers of ``N`` loss modules with identical structures
+    (e.g., losses built with different seeds or hyperparameters) are stacked
+    along a new leading dimension, and the loss of each member is computed
+    on its own batch of data with a single call to :func:`torch.vmap`. For small
+    networks, this makes a much better use of the hardware than training the
+    members sequentially or in separate processes, and the optimizer can be
+    created with the stacked parameters of the ensemble.
+
+    Hyperparameters can differ across members as long as they are stored in
+    parameters or buffers, such as the discount factor of the value estimators.
+    Python attributes (e.g. the loss function type) are taken from the first
+    member.
+
+    The parameters and buffers of the members share their storage with the
+    stacked tensors of the ensemble: once the ensemble is optimized, each
+    member can be used as is (e.g., to get its policy). Target network updaters
+    such as :class:`~torchrl.objectives.SoftUpdate` can be created for each
+    member and will update the stacked target parameters in-place.
+
+    .. note::
+      The loss must be compatible with :func:`torch.vmap`, i.e. it should not
+      call ``.item()`` or use data-dependent control flow in its forward method.
+      Losses that modify their parameters in-place during the forward call,
+      such as :class:`~torchrl.objectives.SACLoss` which clamps ``log_alpha``,
+      are not supported.
+
+    Args:
+        loss_modules (sequence of LossModule): the members of the ensemble.
+
+    Keyword Args:
+        randomness (str, optional): the ``randomness`` argument of
+            :func:`torch.vmap`. Defaults to ``"different"``, ie. each member
+            draws its own random numbers (e.g., when sampling actions).
+
+    Examples:
+        >>> import torch
+        >>> from torch import nn
+        >>> from tensordict import TensorDict
+        >>> from torchrl.data import OneHotDiscreteTensorSpec
+        >>> from torchrl.modules import QValueActor
+        >>> from torchrl.objectives import DQNLoss, ValueEstimators, VmapLossEnsemble
+        >>> spec = OneHotDiscreteTensorSpec(4)
+        >>> losses = []
+        >>> for gamma in (0.9, 0.95, 0.99):
+        ...     loss = DQNLoss(QValueActor(nn.Linear(3, 4), spec=spec), action_space=spec)
+        ...     loss.make_value_estimator(ValueEstimators.TD0, gamma=gamma)
+        ...     losses.append(loss)
+        >>> ensemble = VmapLossEnsemble(losses)
+        >>> optim = torch.optim.Adam(ensemble.parameters())
+        >>> data = TensorDict({
+        ...     "observation": torch.randn(3, 10, 3),
+        ...     "action": spec.rand((3, 10)),
+        ...     ("next", "observation"): torch.randn(3, 10, 3),
+        ...     ("next", "reward"): torch.randn(3, 10, 1),
+        ...     ("next", "done"): torch.zeros(3, 10, 1, dtype=torch.bool),
+        ... }, [3, 10])
+        >>> loss_vals = ensemble(data)
+        >>> loss_vals["loss"].shape
+        torch.Size([3])
+        >>> loss_vals["loss"].sum().backward()
+        >>> optim.step()
+
+    """
+
+    def __init__(
+        self, loss_modules: Sequence[LossModule], *, randomness: str = "different"
+    ):
+        super().__init__()
+        loss_modules = list(loss_modules)
+        if not len(loss_modules):
+            raise ValueError("At least one loss module must be provided.")
+        for loss_module in loss_modules:
+            if loss_module.default_value_estimator is not None:
+                # the value estimator is created lazily, we need its buffers now
+                loss_module.value_estimator
+        self.randomness = randomness
+        # the members are not registered as sub-modules: their parameters are
+        # views on the stacked parameters of the ensemble
+        self._members = loss_modules
+        self._param_names = self._stack_tensors(
+            [dict(loss_module.named_parameters()) for loss_module in loss_modules],
+            is_param=True,
+        )
+        self._buffer_names = self._stack_tensors(
+            [dict(loss_module.named_buffers()) for loss_module in loss_modules],
+            is_param=False,
+        )
+        self._share_members_storage()
+
+    @property
+    def num_members(self) -> int:
+        return len(self._members)
+
+    @property
+    def members(self) -> Sequence[LossModule]:
+        """The loss modules of the ensemble."""
+        return list(self._members)
+
+    def _stack_tensors(
+        self, named_tensors: Sequence[Dict[str, torch.Tensor]], is_param: bool
+    ) -> Dict[str, str]:
+        names = list(named_tensors[0])
+        for member_tensors in named_tensors[1:]:
+            if list(member_tensors) != names:
+                raise ValueError(
+                    "The members of the ensemble must have the same parameters and buffers."
+                )
+        attr_names = {}
+        for name in names:
+            tensors = [member_tensors[name] for member_tensors in named_tensors]
+            shapes = {tensor.shape for tensor in tensors}
+            if len(shapes) > 1:
+                raise ValueError(
+                    f"The members of the ensemble have different shapes for {name}: {shapes}."
+                )
+            attr_name = name.replace(".", LossModule.SEP)
+            stacked = torch.stack([tensor.data for tensor in tensors])
+            if is_param:
+                stacked = nn.Parameter(stacked, requires_grad=tensors[0].requires_grad)
+                setattr(self, attr_name, stacked)
+            else:
+                self.register_buffer(attr_name, stacked)
+            attr_names[name] = attr_name
+        return attr_names
+
+    def _share_members_storage(self) -> None:
+        for names, getter in (
+            (self._param_names, LossModule.named_parameters),
+            (self._buffer_names, LossModule.named_buffers),
+        ):
+            for i, loss_module in enumerate(self._members):
+                member_tensors = dict(getter(loss_module))
+                for name, attr_name in names.items():
+                    member_tensors[name].data = getattr(self, attr_name).data[i]
+        for loss_module in self._members:
+            # expanded params (see LossModule.convert_to_functional) are views
+            # on the previous storage
+            for origin, target in loss_module._param_maps.items():
+                setattr(
+                    loss_module,
+                    target,
+                    getattr(loss_module, origin).data.expand_as(
+                        getattr(loss_module, target)
+                    ),
+                )
+            # cached params refer to the previous tensors
+            loss_module._cache = {}
+
+    def _apply(self, fn):
+        out = super()._apply(fn)
+        self._share_members_storage()
+        return out
+
+    def _member_forward(
+        self, tensors: Dict[str, torch.Tensor], tensordict: TensorDictBase
+    ) -> TensorDictBase:
+        loss_module = self._members[0]
+        # params are gathered and cached from the module attributes: the cache
+        # must not outlive the call. It is cleared rather than replaced, as a
+        # new cache signals that the tensors of the module have been swapped
+        loss_module._cache.clear()
+        tensors = dict(tensors)
+        for origin, target in loss_module._param_maps.items():
+            tensors[target] = (
+                tensors[origin].detach().expand_as(getattr(loss_module, target))
+            )
+        try:
+            return functional_call(loss_module, tensors, (tensordict,))
+        finally:
+            loss_module._cache.clear()
+
+    def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
+        """Computes the losses of all the members.
+
+        Args:
+            tensordict (TensorDictBase): the input data of the loss modules,
+                with a leading dimension of size ``num_members``: the loss of
+                the i-th member is computed on ``tensordict[i]``. Independent
+                per-member batches can be obtained by sampling
+                ``num_members * batch_size`` elements from a replay buffer and
+                reshaping the result to ``[num_members, batch_size]``.
+
+        Returns:
+            a tensordict of batch size ``[num_members]`` with the output of each
+            member.
+
+        """
+        if tensordict.batch_size[:1] != torch.Size([self.num_members]):
+            raise ValueError(
+                f"Expected a tensordict with a leading dimension of size {self.num_members}, "
+                f"got batch_size={tensordict.batch_size}."
+            )
+        tensors = {
+            name: getattr(self, attr_name)
+            for name, attr_name in self._param_names.items()
+        }
+        tensors.update(
+            {
+                name: getattr(self, attr_name)
+                for name, attr_name in self._buffer_names.items()
+            }
+        )
+        out = vmap(self._member_forward, (0, 0), randomness=self.randomness)(
+            tensors, tensordict
+        )
+        if not isinstance(out, TensorDictBase):
+            out = TensorDict(out, [self.num_members])
+        return out
@@ -2,7 +2,6 @@
 #
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
-import math
 import warnings
 from dataclasses import dataclass
 from typing import Tuple
@@ -22,7 +21,7 @@ from torchrl.objectives.utils import (
 )
 
 from .common import LossModule
-from .value import GAE, TD0Estimator, TD1Estimator, TDLambdaEstimator
+from .value import GAE, TD0Estimator, TD1Estimator, TDLambdaEstimator, VTrace
 
 
 class PPOLoss(LossModule):
@@ -343,11 +342,22 @@ class PPOLoss(LossModule):
                 reward=self.tensor_keys.reward,
                 done=self.tensor_keys.done,
             )
+            if isinstance(self._value_estimator, VTrace):
+                self._value_estimator.set_keys(
+                    action=self.tensor_keys.action,
+                    sample_log_prob=self.tensor_keys.sample_log_prob,
+                )
         self._set_in_keys()
 
     def reset(self) -> None:
         pass
 
+    def _normalize_advantage(self, advantage: torch.Tensor) -> torch.Tensor:
+        # the statistics are not synchronized with the host
+        loc = advantage.mean().detach()
+        scale = advantage.std().clamp_min(1e-6).detach()
+        return (advantage - loc) / scale
+
     def get_entropy_bonus(self, dist: d.Distribution) -> torch.Tensor:
         try:
             entropy = dist.entropy()
@@ -417,6 +427,17 @@ class PPOLoss(LossModule):
     def _cached_critic_params_detached(self):
         return self.critic_params.detach()
 
+    @property
+    @_cache_values
+    def _cached_actor_params_detached(self):
+        return self.actor_params.detach()
+
+    def _value_estimator_kwargs(self):
+        # V-Trace needs the current policy to compute the importance weights
+        if isinstance(self.value_estimator, VTrace):
+            return {"actor_params": self._cached_actor_params_detached}
+        return {}
+
     @dispatch
     def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
         tensordict = tensordict.clone(False)
@@ -426,12 +447,11 @@ class PPOLoss(LossModule):
                 tensordict,
                 params=self._cached_critic_params_detached,
                 target_params=self.target_critic_params,
+                **self._value_estimator_kwargs(),
             )
             advantage = tensordict.get(self.tensor_keys.advantage)
         if self.normalize_advantage and advantage.numel() > 1:
-            loc = advantage.mean().item()
-            scale = advantage.std().clamp_min(1e-6).item()
-            advantage = (advantage - loc) / scale
+            advantage = self._normalize_advantage(advantage)
 
         log_weight, dist = self._log_weight(tensordict)
         neg_loss = (log_weight.exp() * advantage).mean()
@@ -461,6 +481,10 @@ class PPOLoss(LossModule):
             self._value_estimator = GAE(value_network=self.critic, **hp)
         elif value_type == ValueEstimators.TDLambda:
             self._value_estimator = TDLambdaEstimator(value_network=self.critic, **hp)
+        elif value_type == ValueEstimators.VTrace:
+            self._value_estimator = VTrace(
+                value_network=self.critic, actor_network=self.actor, **hp
+            )
         else:
             raise NotImplementedError(f"Unknown value type {value_type}")
 
@@ -471,6 +495,9 @@ class PPOLoss(LossModule):
             "reward": self.tensor_keys.reward,
             "done": self.tensor_keys.done,
         }
+        if value_type == ValueEstimators.VTrace:
+            tensor_keys["action"] = self.tensor_keys.action
+            tensor_keys["sample_log_prob"] = self.tensor_keys.sample_log_prob
         self._value_estimator.set_keys(**tensor_keys)
 
 
@@ -560,6 +587,8 @@ class ClipPPOLoss(PPOLoss):
 
     """
 
+    _compilable_methods = ("_clip_objective",)
+
     def __init__(
         self,
         actor: ProbabilisticTensorDictSequential,
@@ -594,8 +623,8 @@ class ClipPPOLoss(PPOLoss):
     @property
     def _clip_bounds(self):
         return (
-            math.log1p(-self.clip_epsilon),
-            math.log1p(self.clip_epsilon),
+            torch.log1p(-self.clip_epsilon),
+            torch.log1p(self.clip_epsilon),
         )
 
     @property
@@ -623,14 +652,27 @@ class ClipPPOLoss(PPOLoss):
                 tensordict,
                 params=self._cached_critic_params_detached,
                 target_params=self.target_critic_params,
+                **self._value_estimator_kwargs(),
             )
             advantage = tensordict.get(self.tensor_keys.advantage)
-        if self.normalize_advantage and advantage.numel() > 1:
-            loc = advantage.mean().item()
-            scale = advantage.std().clamp_min(1e-6).item()
-            advantage = (advantage - loc) / scale
 
         log_weight, dist = self._log_weight(tensordict)
+        loss_objective, ess = self._clip_objective(log_weight, advantage)
+        td_out = TensorDict({"loss_objective": loss_objective}, [])
+
+        if self.entropy_bonus:
+            entropy = self.get_entropy_bonus(dist)
+            td_out.set("entropy", entropy.mean().detach())  # for logging
+            td_out.set("loss_entropy", -self.entropy_coef * entropy.mean())
+        if self.critic_coef:
+            loss_critic = self.loss_critic(tensordict)
+            td_out.set("loss_critic", loss_critic.mean())
+        td_out.set("ESS", ess)
+        return td_out
+
+    def _clip_objective(
+        self, log_weight: torch.Tensor, advantage: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
         # ESS for logging
         with torch.no_grad():
             # In theory, ESS should be computed on particles sampled from the same source. Here we sample according
@@ -640,6 +682,8 @@ class ClipPPOLoss(PPOLoss):
             ess = (2 * lw.logsumexp(0) - (2 * lw).logsumexp(0)).exp()
             batch = log_weight.shape[0]
 
+        if self.normalize_advantage and advantage.numel() > 1:
+            advantage = self._normalize_advantage(advantage)
         if not advantage.shape == log_weight.shape:
             raise RuntimeError(
                 f"advantage.shape and log_weight.shape do not match (got {advantage.shape} "
@@ -651,17 +695,7 @@ class ClipPPOLoss(PPOLoss):
         gain2 = log_weight_clip.exp() * advantage
 
         gain = torch.stack([gain1, gain2], -1).min(dim=-1)[0]
-        td_out = TensorDict({"loss_objective": -gain.mean()}, [])
-
-        if self.entropy_bonus:
-            entropy = self.get_entropy_bonus(dist)
-            td_out.set("entropy", entropy.mean().detach())  # for logging
-            td_out.set("loss_entropy", -self.entropy_coef * entropy.mean())
-        if self.critic_coef:
-            loss_critic = self.loss_critic(tensordict)
-            td_out.set("loss_critic", loss_critic.mean())
-        td_out.set("ESS", ess.mean() / batch)
-        return td_out
+        return -gain.mean(), ess.mean() / batch
 
 
 class KLPENPPOLoss(PPOLoss):
@@ -834,12 +868,11 @@ class KLPENPPOLoss(PPOLoss):
                 tensordict,
                 params=self._cached_critic_params_detached,
                 target_params=self.target_critic_params,
+                **self._value_estimator_kwargs(),
             )
             advantage = tensordict.get(self.tensor_keys.advantage)
         if self.normalize_advantage and advantage.numel() > 1:
-            loc = advantage.mean().item()
-            scale = advantage.std().clamp_min(1e-6).item()
-            advantage = (advantage - loc) / scale
+            advantage = self._normalize_advantage(advantage)
         log_weight, dist = self._log_weight(tensordict)
         neg_loss = log_weight.exp() * advantage
 
@@ -326,7 +326,7 @@ class REDQLoss(LossModule):
             warnings.warn(_GAMMA_LMBDA_DEPREC_WARNING, category=DeprecationWarning)
             self.gamma = gamma
 
-        self._vmap_qvalue_network00 = vmap(self.qvalue_network)
+        self._vmap_qvalue_networkN0 = vmap(self.qvalue_network, (None, 0))
         self._vmap_getdist = vmap(self.actor_network.get_dist_params)
 
     @property
@@ -404,16 +404,11 @@ class REDQLoss(LossModule):
     def _cached_detach_qvalue_network_params(self):
         return self.qvalue_network_params.detach()
 
-    def _qvalue_params_cat(self, selected_q_params):
-        qvalue_params = torch.cat(
-            [
-                self._cached_detach_qvalue_network_params,
-                selected_q_params,
-                self.qvalue_network_params,
-            ],
-            0,
+    def _qvalue(self, tensordict: TensorDictBase, params: TensorDictBase) -> Tensor:
+        tensordict = self._vmap_qvalue_networkN0(
+            tensordict.select(*self.qvalue_network.in_keys), params
         )
-        return qvalue_params
+        return tensordict.get(self.tensor_keys.state_action_value).squeeze(-1)
 
     @dispatch
     def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
@@ -466,47 +461,17 @@ class REDQLoss(LossModule):
                 tensordict_actor_dist.log_prob(tensordict_actor.get(sample_key)),
             )
 
-        # repeat tensordict_actor to match the qvalue size
-        _actor_loss_td = (
-            tensordict_actor[0]
-            .select(*self.qvalue_network.in_keys)
-            .expand(self.num_qvalue_nets, *tensordict_actor[0].batch_size)
+        # the inputs are shared across the stacked parameters of the ensemble
+        state_action_value_actor = self._qvalue(
+            tensordict_actor[0], self._cached_detach_qvalue_network_params
         )  # for actor loss
-        _qval_td = tensordict_select.select(*self.qvalue_network.in_keys).expand(
-            self.num_qvalue_nets,
-            *tensordict_select.select(*self.qvalue_network.in_keys).batch_size,
-        )  # for qvalue loss
-        _next_val_td = (
-            tensordict_actor[1]
-            .select(*self.qvalue_network.in_keys)
-            .expand(self.sub_sample_len, *tensordict_actor[1].batch_size)
+        next_state_action_value_qvalue = self._qvalue(
+            tensordict_actor[1], selected_q_params
         )  # for next value estimation
-        tensordict_qval = torch.cat(
-            [
-                _actor_loss_td,
-                _next_val_td,
-                _qval_td,
-            ],
-            0,
-        )
-
-        # cat params
-        tensordict_qval = self._vmap_qvalue_network00(
-            tensordict_qval,
-            self._qvalue_params_cat(selected_q_params),
-        )
+        state_action_value_qvalue = self._qvalue(
+            tensordict_select, self.qvalue_network_params
+        )  # for qvalue loss
 
-        state_action_value = tensordict_qval.get(
-            self.tensor_keys.state_action_value
-        ).squeeze(-1)
-        (
-            state_action_value_actor,
-            next_state_action_value_qvalue,
-            state_action_value_qvalue,
-        ) = state_action_value.split(
-            [self.num_qvalue_nets, self.sub_sample_len, self.num_qvalue_nets],
-            dim=0,
-        )
         sample_log_prob = tensordict_actor.get(
             self.tensor_keys.sample_log_prob
         ).squeeze(-1)
@@ -566,18 +566,24 @@ class SACLoss(LossModule):
         td_q = self._vmap_qnetworkN0(
             td_q, self._cached_detached_qvalue_params  # should we clone?
         )
-        min_q_logprob = (
-            td_q.get(self.tensor_keys.state_action_value).min(0)[0].squeeze(-1)
+        loss_actor = self._actor_objective(
+            log_prob, td_q.get(self.tensor_keys.state_action_value), self._alpha
         )
 
+        # write log_prob in tensordict for alpha loss
+        tensordict.set(self.tensor_keys.log_prob, log_prob.detach())
+        return loss_actor
+
+    def _actor_objective(
+        self, log_prob: Tensor, state_action_value: Tensor, alpha: Tensor
+    ) -> Tensor:
+        min_q_logprob = state_action_value.min(0)[0].squeeze(-1)
+
         if log_prob.shape != min_q_logprob.shape:
             raise RuntimeError(
                 f"Losses shape mismatch: {log_prob.shape} and {min_q_logprob.shape}"
             )
-
-        # write log_prob in tensordict for alpha loss
-        tensordict.set(self.tensor_keys.log_prob, log_prob.detach())
-        return self._alpha * log_prob - min_q_logprob
+        return alpha * log_prob - min_q_logprob
 
     @property
     @_cache_values
@@ -685,6 +691,11 @@ class SACLoss(LossModule):
         pred_val = tensordict_expand.get(self.tensor_keys.state_action_value).squeeze(
             -1
         )
+        return self._qvalue_objective(pred_val, target_value)
+
+    def _qvalue_objective(
+        self, pred_val: Tensor, target_value: Tensor
+    ) -> Tuple[Tensor, Tensor]:
         td_error = abs(pred_val - target_value)
         loss_qval = distance_loss(
             pred_val,
@@ -1018,7 +1029,7 @@ class DiscreteSACLoss(LossModule):
         )
 
         self._vmap_getdist = vmap(self.actor_network.get_dist_params)
-        self._vmap_qnetwork = vmap(self.qvalue_network)
+        self._vmap_qnetworkN0 = vmap(self.qvalue_network, (None, 0))
 
     @property
     def alpha(self):
@@ -1058,6 +1069,17 @@ class DiscreteSACLoss(LossModule):
     def in_keys(self, values):
         self._in_keys = values
 
+    @property
+    @_cache_values
+    def _cached_detached_qvalue_params(self):
+        return self.qvalue_network_params.detach()
+
+    def _qvalue(self, tensordict: TensorDictBase, params: TensorDictBase) -> Tensor:
+        tensordict = self._vmap_qnetworkN0(
+            tensordict.select(*self.qvalue_network.in_keys), params
+        )
+        return tensordict.get(self.tensor_keys.value).squeeze(-1)
+
     @dispatch
     def forward(self, tensordict: TensorDictBase) -> TensorDictBase:
         obs_keys = self.actor_network.in_keys
@@ -1097,54 +1119,15 @@ class DiscreteSACLoss(LossModule):
             logp_pi = torch.log(probs + z)
             logp_pi_pol = torch.sum(probs * logp_pi, dim=-1, keepdim=True)
 
-        # repeat tensordict_actor to match the qvalue size
-        _actor_loss_td = (
-            tensordict_actor[0]
-            .select(*self.qvalue_network.in_keys)
-            .expand(self.num_qvalue_nets, *tensordict_actor[0].batch_size)
+        state_action_value_actor = self._qvalue(
+            tensordict_actor[0], self._cached_detached_qvalue_params
         )  # for actor loss
-        _qval_td = tensordict_select.select(*self.qvalue_network.in_keys).expand(
-            self.num_qvalue_nets,
-            *tensordict_select.select(*self.qvalue_network.in_keys).batch_size,
-        )  # for qvalue loss
-        _next_val_td = (
-            tensordict_actor[1]
-            .select(*self.qvalue_network.in_keys)
-            .expand(self.num_qvalue_nets, *tensordict_actor[1].batch_size)
+        next_state_action_value_qvalue = self._qvalue(
+            tensordict_actor[1], self.target_qvalue_network_params
         )  # for next value estimation
-        tensordict_qval = torch.cat(
-            [
-                _actor_loss_td,
-                _next_val_td,
-                _qval_td,
-            ],
-            0,
-        )
-
-        # cat params
-        q_params_detach = self.qvalue_network_params.detach()
-        qvalue_params = torch.cat(
-            [
-                q_params_detach,
-                self.target_qvalue_network_params,
-                self.qvalue_network_params,
-            ],
-            0,
-        )
-        tensordict_qval = self._vmap_qnetwork(
-            tensordict_qval,
-            qvalue_params,
-        )
-
-        state_action_value = tensordict_qval.get(self.tensor_keys.value).squeeze(-1)
-        (
-            state_action_value_actor,
-            next_state_action_value_qvalue,
-            state_action_value_qvalue,
-        ) = state_action_value.split(
-            [self.num_qvalue_nets, self.num_qvalue_nets, self.num_qvalue_nets],
-            dim=0,
-        )
+        state_action_value_qvalue = self._qvalue(
+            tensordict_select, self.qvalue_network_params
+        )  # for qvalue loss
 
         loss_actor = -(
             (state_action_value_actor.min(0)[0] * probs[0]).sum(-1, keepdim=True)
@@ -6,7 +6,7 @@
 import functools
 import warnings
 from enum import Enum
-from typing import Iterable, Optional, Union
+from typing import Iterable, List, Optional, Sequence, Union
 
 import torch
 from tensordict.nn import TensorDictModule
@@ -39,6 +39,7 @@ class ValueEstimators(Enum):
     TD1 = "TD(1) (infinity-step return)"
     TDLambda = "TD(lambda)"
     GAE = "Generalized advantage estimate"
+    VTrace = "V-trace off-policy corrected estimate"
 
 
 def default_value_kwargs(value_type: ValueEstimators):
@@ -61,6 +62,8 @@ def default_value_kwargs(value_type: ValueEstimators):
         return {"gamma": 0.99, "lmbda": 0.95, "differentiable": True}
     elif value_type == ValueEstimators.TDLambda:
         return {"gamma": 0.99, "lmbda": 0.95, "differentiable": True}
+    elif value_type == ValueEstimators.VTrace:
+        return {"gamma": 0.99, "differentiable": True}
     else:
         raise NotImplementedError(f"Unknown value type {value_type}.")
 
@@ -129,6 +132,23 @@ def distance_loss(
     return value_loss
 
 
+def _foreach_copy_(targets: List[Tensor], sources: List[Tensor]) -> None:
+    if hasattr(torch, "_foreach_copy_"):
+        torch._foreach_copy_(targets, sources)
+    else:
+        for target, source in zip(targets, sources):
+            target.copy_(source)
+
+
+def _foreach_lerp_(targets: List[Tensor], sources: List[Tensor], weight: float) -> None:
+    # targets + weight * (sources - targets), without temporaries
+    if hasattr(torch, "_foreach_lerp_"):
+        torch._foreach_lerp_(targets, sources, weight)
+    else:
+        torch._foreach_mul_(targets, 1 - weight)
+        torch._foreach_add_(targets, sources, alpha=weight)
+
+
 class TargetNetUpdater:
     """An abstract class for target network update in Double DQN/DDPG.
 
@@ -233,13 +253,14 @@ class TargetNetUpdater:
             )
 
         self.initialized = True
-
-    def step(self) -> None:
-        if not self.initialized:
-            raise Exception(
-                f"{self.__class__.__name__} must be "
-                f"initialized (`{self.__class__.__name__}.init_()`) before calling step()"
-            )
+        self._init_tensor_lists()
+
+    def _init_tensor_lists(self) -> None:
+        # The tensors to update are gathered once in flat lists such that
+        # step() updates all the floating-point leaves with a single fused call.
+        self._fused_sources, self._fused_targets = [], []
+        self._unfused_sources, self._unfused_targets = [], []
+        self._copy_sources, self._copy_targets = [], []
         for key, source in self._sources.items(True, True):
             if not isinstance(key, tuple):
                 key = (key,)
@@ -249,14 +270,43 @@ class TargetNetUpdater:
             target = self._targets[key]
             if target.requires_grad:
                 raise RuntimeError("the target parameter is part of a graph.")
-            if target.is_leaf:
-                self._step(source, target)
+            if not target.is_leaf:
+                self._copy_sources.append(source)
+                self._copy_targets.append(target)
+            elif target.is_floating_point() and source.dtype == target.dtype:
+                self._fused_sources.append(source)
+                self._fused_targets.append(target)
             else:
-                target.copy_(source)
+                self._unfused_sources.append(source)
+                self._unfused_targets.append(target)
+        # the loss module replaces its cache whenever its tensors are cast to
+        # another device or dtype or swapped: the lists must then be rebuilt
+        self._loss_module_cache = self.loss_module.__dict__.get("_cache", None)
+
+    def step(self) -> None:
+        if not self.initialized:
+            raise Exception(
+                f"{self.__class__.__name__} must be "
+                f"initialized (`{self.__class__.__name__}.init_()`) before calling step()"
+            )
+        if self.loss_module.__dict__.get("_cache", None) is not self._loss_module_cache:
+            self._init_tensor_lists()
+        with torch.no_grad():
+            if self._fused_targets:
+                self._step_foreach(self._fused_sources, self._fused_targets)
+            for source, target in zip(self._unfused_sources, self._unfused_targets):
+                self._step(source, target)
+            if self._copy_targets:
+                _foreach_copy_(self._copy_targets, self._copy_sources)
 
     def _step(self, p_source: Tensor, p_target: Tensor) -> None:
         raise NotImplementedError
 
+    def _step_foreach(self, sources: List[Tensor], targets: List[Tensor]) -> None:
+        # subclasses can update all the tensors at once
+        for p_source, p_target in zip(sources, targets):
+            self._step(p_source, p_target)
+
     def __repr__(self) -> str:
         string = (
             f"{self.__class__.__name__}(sources={self._sources}, targets="
@@ -323,6 +373,9 @@ class SoftUpdate(TargetNetUpdater):
     def _step(self, p_source: Tensor, p_target: Tensor) -> None:
         p_target.data.copy_(p_target.data * self.eps + p_source.data * (1 - self.eps))
 
+    def _step_foreach(self, sources: List[Tensor], targets: List[Tensor]) -> None:
+        _foreach_lerp_(targets, sources, 1 - self.eps)
+
 
 class HardUpdate(TargetNetUpdater):
     """A hard-update class for target network update in Double DQN/DDPG (by contrast with soft updates).
@@ -352,6 +405,10 @@ class HardUpdate(TargetNetUpdater):
         if self.counter == self.value_network_update_interval:
             p_target.data.copy_(p_source.data)
 
+    def _step_foreach(self, sources: List[Tensor], targets: List[Tensor]) -> None:
+        if self.counter == self.value_network_update_interval:
+            _foreach_copy_(targets, sources)
+
     def step(self) -> None:
         super().step()
         if self.counter == self.value_network_update_interval:
@@ -475,3 +532,14 @@ def _cache_values(fun):
         return out
 
     return new_fun
+
+
+def _compile_methods(module: nn.Module, method_names: Sequence[str], **compile_kwargs):
+    """Replaces methods of a module instance by their compiled version."""
+    if not hasattr(torch, "compile"):
+        raise RuntimeError("torch.compile is only available with torch>=2.0.")
+    for name in method_names:
+        # the method is read from the class such that compiling twice does
+        # not wrap the compiled method
+        method = getattr(type(module), name).__get__(module)
+        setattr(module, name, torch.compile(method, **compile_kwargs))
@@ -32,6 +32,8 @@ from torchrl.objectives.value.functional import (
     vec_generalized_advantage_estimate,
     vec_td1_return_estimate,
     vec_td_lambda_return_estimate,
+    vec_vtrace_advantage_estimate,
+    vtrace_advantage_estimate,
 )
 
 try:
@@ -65,6 +67,81 @@ def _self_set_skip_existing(fun):
     return new_func
 
 
+def _chunked_value_net(
+    value_net: TensorDictModuleBase,
+    data: TensorDictBase,
+    params: Optional[TensorDictBase],
+    value_key: NestedKey,
+    max_batch: int,
+) -> torch.Tensor:
+    """Runs the value network over the flattened data with at most ``max_batch`` elements at a time.
+
+    The values are written in a preallocated tensor, such that the peak memory
+    is bounded by the activations of a single chunk.
+    """
+    flat_data = data.reshape(-1)
+    numel = flat_data.shape[0]
+    value = None
+    for start in range(0, numel, max_batch):
+        chunk = flat_data[start : start + max_batch]
+        if params is not None:
+            chunk_value = value_net(chunk, params).get(value_key)
+        else:
+            chunk_value = value_net(chunk).get(value_key)
+        if value is None:
+            value = torch.empty(
+                numel,
+                *chunk_value.shape[1:],
+                dtype=chunk_value.dtype,
+                device=chunk_value.device,
+            )
+        value[start : start + max_batch] = chunk_value
+    return value.unflatten(0, data.shape)
+
+
+def _call_value_nets_chunked(
+    value_net: TensorDictModuleBase,
+    data: TensorDictBase,
+    params: TensorDictBase,
+    next_params: TensorDictBase,
+    single_call: bool,
+    value_key: NestedKey,
+    max_batch: int,
+):
+    in_keys = value_net.in_keys
+    data_in = data.select(*in_keys, value_key, strict=False)
+    next_data_in = data.get("next").select(*in_keys, value_key, strict=False)
+    if single_call:
+        # next_params should be None or be identical to params
+        if next_params is not None and next_params is not params:
+            raise ValueError(
+                "the value at t and t+1 cannot be retrieved in a single call without recurring to vmap when both params and next params are passed."
+            )
+        next_params = params
+    elif (params is not None) ^ (next_params is not None):
+        raise ValueError("params and next_params must be either both provided or not.")
+    value = _chunked_value_net(value_net, data_in, params, value_key, max_batch)
+    ndim = None
+    if single_call:
+        for i, name in enumerate(data.names):
+            if name == "time":
+                ndim = i + 1
+                break
+    if ndim is not None:
+        # only the last next value is not a value at t
+        idx0 = (slice(None),) * (ndim - 1) + (slice(-1, None),)
+        idx_ = (slice(None),) * (ndim - 1) + (slice(1, None),)
+        last_value = _chunked_value_net(
+            value_net, next_data_in[idx0], next_params, value_key, max_batch
+        )
+        value_ = torch.cat([value[idx_], last_value], ndim - 1)
+    else:
+        value_ = _chunked_value_net(
+            value_net, next_data_in, next_params, value_key, max_batch
+        )
+    return value, value_
+
+
 def _call_value_nets(
     value_net: TensorDictModuleBase,
     data: TensorDictBase,
@@ -73,9 +150,20 @@ def _call_value_nets(
     single_call: bool,
     value_key: NestedKey,
     detach_next: bool,
+    max_batch: Optional[int] = None,
 ):
     in_keys = value_net.in_keys
-    if single_call:
+    if max_batch is not None:
+        value, value_ = _call_value_nets_chunked(
+            value_net,
+            data,
+            params,
+            next_params,
+            single_call,
+            value_key,
+            max_batch,
+        )
+    elif single_call:
         for i, name in enumerate(data.names):
             if name == "time":
                 ndim = i + 1
@@ -227,6 +315,7 @@ class ValueEstimatorBase(TensorDictModuleBase):
         shifted: bool = False,
         differentiable: bool = False,
         skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
         advantage_key: NestedKey = None,
         value_target_key: NestedKey = None,
         value_key: NestedKey = None,
@@ -235,6 +324,7 @@ class ValueEstimatorBase(TensorDictModuleBase):
         self._tensor_keys = None
         self.differentiable = differentiable
         self.skip_existing = skip_existing
+        self.max_batch = max_batch
         self.value_network = value_network
         self.dep_keys = {}
         self.shifted = shifted
@@ -391,6 +481,12 @@ class TD0Estimator(ValueEstimatorBase):
             estimation, for instance) and (2) when the parameters used at time
             ``t`` and ``t+1`` are identical (which is not the case when target
             parameters are to be used). Defaults to ``False``.
+        max_batch (int, optional): if provided, the value network is evaluated
+            over chunks of at most ``max_batch`` elements of the flattened
+            batch, and the values are written in preallocated tensors. This
+            bounds the peak memory of the value network activations for large
+            batches (e.g. pixel-based environments). Defaults to ``None``, ie.
+            the whole batch is evaluated at once.
         average_rewards (bool, optional): if ``True``, rewards will be standardized
             before the TD is computed.
         differentiable (bool, optional): if ``True``, gradients are propagated through
@@ -426,6 +522,7 @@ class TD0Estimator(ValueEstimatorBase):
         value_target_key: NestedKey = None,
         value_key: NestedKey = None,
         skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
     ):
         super().__init__(
             value_network=value_network,
@@ -435,6 +532,7 @@ class TD0Estimator(ValueEstimatorBase):
             value_target_key=value_target_key,
             value_key=value_key,
             skip_existing=skip_existing,
+            max_batch=max_batch,
         )
         try:
             device = next(value_network.parameters()).device
@@ -529,6 +627,7 @@ class TD0Estimator(ValueEstimatorBase):
                     single_call=self.shifted,
                     value_key=self.tensor_keys.value,
                     detach_next=True,
+                    max_batch=self.max_batch,
                 )
         else:
             value = tensordict.get(self.tensor_keys.value)
@@ -602,6 +701,12 @@ class TD1Estimator(ValueEstimatorBase):
             estimation, for instance) and (2) when the parameters used at time
             ``t`` and ``t+1`` are identical (which is not the case when target
             parameters are to be used). Defaults to ``False``.
+        max_batch (int, optional): if provided, the value network is evaluated
+            over chunks of at most ``max_batch`` elements of the flattened
+            batch, and the values are written in preallocated tensors. This
+            bounds the peak memory of the value network activations for large
+            batches (e.g. pixel-based environments). Defaults to ``None``, ie.
+            the whole batch is evaluated at once.
 
     """
 
@@ -613,6 +718,7 @@ class TD1Estimator(ValueEstimatorBase):
         average_rewards: bool = False,
         differentiable: bool = False,
         skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
         advantage_key: NestedKey = None,
         value_target_key: NestedKey = None,
         value_key: NestedKey = None,
@@ -626,6 +732,7 @@ class TD1Estimator(ValueEstimatorBase):
             value_key=value_key,
             shifted=shifted,
             skip_existing=skip_existing,
+            max_batch=max_batch,
         )
         try:
             device = next(value_network.parameters()).device
@@ -720,6 +827,7 @@ class TD1Estimator(ValueEstimatorBase):
                     single_call=self.shifted,
                     value_key=self.tensor_keys.value,
                     detach_next=True,
+                    max_batch=self.max_batch,
                 )
         else:
             value = tensordict.get(self.tensor_keys.value)
@@ -797,6 +905,12 @@ class TDLambdaEstimator(ValueEstimatorBase):
             estimation, for instance) and (2) when the parameters used at time
             ``t`` and ``t+1`` are identical (which is not the case when target
             parameters are to be used). Defaults to ``False``.
+        max_batch (int, optional): if provided, the value network is evaluated
+            over chunks of at most ``max_batch`` elements of the flattened
+            batch, and the values are written in preallocated tensors. This
+            bounds the peak memory of the value network activations for large
+            batches (e.g. pixel-based environments). Defaults to ``None``, ie.
+            the whole batch is evaluated at once.
 
     """
 
@@ -810,6 +924,7 @@ class TDLambdaEstimator(ValueEstimatorBase):
         differentiable: bool = False,
         vectorized: bool = True,
         skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
         advantage_key: NestedKey = None,
         value_target_key: NestedKey = None,
         value_key: NestedKey = None,
@@ -823,6 +938,7 @@ class TDLambdaEstimator(ValueEstimatorBase):
             value_key=value_key,
             skip_existing=skip_existing,
             shifted=shifted,
+            max_batch=max_batch,
         )
         try:
             device = next(value_network.parameters()).device
@@ -920,6 +1036,7 @@ class TDLambdaEstimator(ValueEstimatorBase):
                     single_call=self.shifted,
                     value_key=self.tensor_keys.value,
                     detach_next=True,
+                    max_batch=self.max_batch,
                 )
         else:
             value = tensordict.get(self.tensor_keys.value)
@@ -1007,6 +1124,12 @@ class GAE(ValueEstimatorBase):
             estimation, for instance) and (2) when the parameters used at time
             ``t`` and ``t+1`` are identical (which is not the case when target
             parameters are to be used). Defaults to ``False``.
+        max_batch (int, optional): if provided, the value network is evaluated
+            over chunks of at most ``max_batch`` elements of the flattened
+            batch, and the values are written in preallocated tensors. This
+            bounds the peak memory of the value network activations for large
+            batches (e.g. pixel-based environments). Defaults to ``None``, ie.
+            the whole batch is evaluated at once.
 
     GAE will return an :obj:`"advantage"` entry containing the advange value. It will also
     return a :obj:`"value_target"` entry with the return value that is to be used
@@ -1032,6 +1155,7 @@ class GAE(ValueEstimatorBase):
         differentiable: bool = False,
         vectorized: bool = True,
         skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
         advantage_key: NestedKey = None,
         value_target_key: NestedKey = None,
         value_key: NestedKey = None,
@@ -1045,6 +1169,7 @@ class GAE(ValueEstimatorBase):
             value_target_key=value_target_key,
             value_key=value_key,
             skip_existing=skip_existing,
+            max_batch=max_batch,
         )
         try:
             device = next(value_network.parameters()).device
@@ -1148,6 +1273,7 @@ class GAE(ValueEstimatorBase):
                     single_call=self.shifted,
                     value_key=self.tensor_keys.value,
                     detach_next=True,
+                    max_batch=self.max_batch,
                 )
         else:
             value = tensordict.get(self.tensor_keys.value)
@@ -1225,6 +1351,7 @@ class GAE(ValueEstimatorBase):
                     single_call=self.shifted,
                     value_key=self.tensor_keys.value,
                     detach_next=True,
+                    max_batch=self.max_batch,
                 )
         else:
             value = tensordict.get(self.tensor_keys.value)
@@ -1236,6 +1363,324 @@ class GAE(ValueEstimatorBase):
         return value_target
 
 
+class VTrace(ValueEstimatorBase):
+    r"""A class wrapper around the V-Trace estimate functional.
+
+    Refer to "IMPALA: Scalable Distributed Deep-RL with Importance Weighted Actor-Learner Architectures"
+    https://arxiv.org/abs/1802.01561 for more context.
+
+    V-Trace corrects the value targets and advantages of trajectories
+    collected with a behaviour policy :math:`\mu` (e.g. a stale copy of the
+    policy in an asynchronous collector) to estimate the values of the
+    policy :math:`\pi` being trained. The recursion is interrupted at the end
+    of each trajectory: done states are not bootstrapped, truncated states are
+    bootstrapped with the value of the next state.
+
+    Args:
+        gamma (scalar): exponential mean discount.
+        value_network (TensorDictModule): value operator used to retrieve the value estimates.
+        actor_network (TensorDictModule, optional): the policy :math:`\pi`,
+            used to compute the log-probability of the actions with its
+            ``get_dist`` method. If not provided, the log-probability is read
+            from the ``"log_prob"`` entry of the input tensordict.
+        rho_thresh (float, optional): the :math:`\bar{\rho}` clipping
+            threshold of the importance weights. Defaults to ``1.0``.
+        c_thresh (float, optional): the :math:`\bar{c}` clipping threshold
+            of the trace coefficients. Defaults to ``1.0``.
+        differentiable (bool, optional): if ``True``, gradients are propagated through
+            the computation of the value function. Default is ``False``.
+
+            .. note::
+              The proper way to make the function call non-differentiable is to
+              decorate it in a `torch.no_grad()` context manager/decorator or
+              pass detached parameters for functional modules.
+
+        vectorized (bool, optional): whether to use the vectorized version of the
+            v-trace recursion. Default is `True`.
+        skip_existing (bool, optional): if ``True``, the value network will skip
+            modules which outputs are already present in the tensordict.
+            Defaults to ``None``, ie. the value of :func:`tensordict.nn.skip_existing()`
+            is not affected.
+        shifted (bool, optional): if ``True``, the value and next value are
+            estimated with a single call to the value network. This is faster
+            but is only valid whenever (1) the ``"next"`` value is shifted by
+            only one time step (which is not the case with multi-step value
+            estimation, for instance) and (2) when the parameters used at time
+            ``t`` and ``t+1`` are identical (which is not the case when target
+            parameters are to be used). Defaults to ``False``.
+        max_batch (int, optional): if provided, the value network is evaluated
+            over chunks of at most ``max_batch`` elements of the flattened
+            batch, and the values are written in preallocated tensors. This
+            bounds the peak memory of the value network activations for large
+            batches (e.g. pixel-based environments). Defaults to ``None``, ie.
+            the whole batch is evaluated at once.
+
+    VTrace will return an :obj:`"advantage"` entry containing the importance
+    weighted advantage to be used in the policy gradient, and a
+    :obj:`"value_target"` entry with the v-trace target of the value network.
+
+    The log-probability of the actions under the behaviour policy is read from
+    the ``"sample_log_prob"`` entry of the input tensordict, as written by the
+    collectors.
+
+    """
+
+    @dataclass
+    class _AcceptedKeys:
+        """Maintains default values for all configurable tensordict keys.
+
+        This class defines which tensordict keys can be set using '.set_keys(key_name=key_value)' and their
+        default values.
+
+        Attributes:
+            advantage (NestedKey): The input tensordict key where the advantage is written to.
+                Will be used for the underlying value estimator. Defaults to ``"advantage"``.
+            value_target (NestedKey): The input tensordict key where the target state value is written to.
+                Will be used for the underlying value estimator Defaults to ``"value_target"``.
+            value_key (NestedKey): The input tensordict key where the state value is expected.
+                Will be used for the underlying value estimator. Defaults to ``"state_value"``.
+            reward_key (NestedKey): The input tensordict key where the reward is written to.
+                Defaults to ``"reward"``.
+            done_key (NestedKey): The key in the input TensorDict that indicates
+                whether a trajectory is done.  Defaults to ``"done"``.
+            truncated (NestedKey): The key in the input TensorDict that indicates
+                whether a trajectory was truncated.  Defaults to ``"truncated"``.
+            steps_to_next_obs_key (NestedKey): The key in the input tensordict
+                that indicates the number of steps to the next observation.
+                Defaults to ``"steps_to_next_obs"``.
+            action (NestedKey): The input tensordict key where the action is
+                expected. Defaults to ``"action"``.
+            sample_log_prob (NestedKey): The input tensordict key where the
+                log-probability of the action under the behaviour policy is
+                expected. Defaults to ``"sample_log_prob"``.
+            log_prob (NestedKey): The input tensordict key where the
+                log-probability of the action under the trained policy is
+                expected if no actor network is provided. Defaults to ``"log_prob"``.
+        """
+
+        advantage: NestedKey = "advantage"
+        value_target: NestedKey = "value_target"
+        value: NestedKey = "state_value"
+        reward: NestedKey = "reward"
+        done: NestedKey = "done"
+        truncated: NestedKey = "truncated"
+        steps_to_next_obs: NestedKey = "steps_to_next_obs"
+        action: NestedKey = "action"
+        sample_log_prob: NestedKey = "sample_log_prob"
+        log_prob: NestedKey = "log_prob"
+
+    default_keys = _AcceptedKeys()
+
+    def __init__(
+        self,
+        *,
+        gamma: Union[float, torch.Tensor],
+        value_network: TensorDictModule,
+        actor_network: Optional[TensorDictModule] = None,
+        rho_thresh: float = 1.0,
+        c_thresh: float = 1.0,
+        differentiable: bool = False,
+        vectorized: bool = True,
+        skip_existing: Optional[bool] = None,
+        max_batch: Optional[int] = None,
+        shifted: bool = False,
+    ):
+        super().__init__(
+            shifted=shifted,
+            value_network=value_network,
+            differentiable=differentiable,
+            skip_existing=skip_existing,
+            max_batch=max_batch,
+        )
+        if rho_thresh < c_thresh:
+            raise ValueError(
+                f"rho_thresh must be greater or equal to c_thresh, got rho_thresh={rho_thresh} and c_thresh={c_thresh}."
+            )
+        try:
+            device = next(value_network.parameters()).device
+        except (AttributeError, StopIteration):
+            device = torch.device("cpu")
+        self.register_buffer("gamma", torch.tensor(gamma, device=device))
+        self.actor_network = actor_network
+        self.rho_thresh = rho_thresh
+        self.c_thresh = c_thresh
+        self.vectorized = vectorized
+
+    @property
+    def in_keys(self):
+        in_keys = super().in_keys + [
+            self.tensor_keys.action,
+            self.tensor_keys.sample_log_prob,
+        ]
+        if self.actor_network is not None:
+            in_keys += self.actor_network.in_keys
+        else:
+            in_keys.append(self.tensor_keys.log_prob)
+        return in_keys
+
+    def _log_probs(self, tensordict, actor_params, shape):
+        log_mu = tensordict.get(self.tensor_keys.sample_log_prob)
+        if self.actor_network is None:
+            log_pi = tensordict.get(self.tensor_keys.log_prob)
+        else:
+            action = tensordict.get(self.tensor_keys.action)
+            actor_td = tensordict.select(*self.actor_network.in_keys)
+            # the importance weights are not differentiated
+            with hold_out_net(self.actor_network), torch.no_grad():
+                if actor_params is not None:
+                    dist = self.actor_network.get_dist(actor_td, params=actor_params)
+                else:
+                    dist = self.actor_network.get_dist(actor_td)
+                log_pi = dist.log_prob(action)
+
+        def _reshape(log_prob):
+            if log_prob.shape != shape and log_prob.shape == shape[:-1]:
+                log_prob = log_prob.unsqueeze(-1)
+            return log_prob.expand(shape)
+
+        return _reshape(log_pi.detach()), _reshape(log_mu.detach())
+
+    def _values(self, tensordict, params, target_params):
+        if self.value_network is not None:
+            if params is not None:
+                params = params.detach()
+                if target_params is None:
+                    target_params = params.clone(False)
+            with hold_out_net(self.value_network):
+                # we may still need to pass gradient, but we don't want to assign grads to
+                # value net params
+                value, next_value = _call_value_nets(
+                    value_net=self.value_network,
+                    data=tensordict,
+                    params=params,
+                    next_params=target_params,
+                    single_call=self.shifted,
+                    value_key=self.tensor_keys.value,
+                    detach_next=True,
+                    max_batch=self.max_batch,
+                )
+        else:
+            value = tensordict.get(self.tensor_keys.value)
+            next_value = tensordict.get(("next", self.tensor_keys.value))
+        return value, next_value
+
+    def _vtrace(self, tensordict, params, target_params, actor_params):
+        if tensordict.batch_dims < 1:
+            raise RuntimeError(
+                "Expected input tensordict to have at least one dimensions, got "
+                f"tensordict.batch_size = {tensordict.batch_size}"
+            )
+        reward = tensordict.get(("next", self.tensor_keys.reward))
+        gamma = self.gamma.to(reward.device)
+        steps_to_next_obs = tensordict.get(self.tensor_keys.steps_to_next_obs, None)
+        if steps_to_next_obs is not None:
+            gamma = gamma ** steps_to_next_obs.view_as(reward)
+
+        value, next_value = self._values(tensordict, params, target_params)
+        log_pi, log_mu = self._log_probs(tensordict, actor_params, reward.shape)
+        done = tensordict.get(("next", self.tensor_keys.done))
+        truncated = tensordict.get(("next", self.tensor_keys.truncated), None)
+        if truncated is not None:
+            truncated = truncated.view_as(done)
+
+        if self.vectorized:
+            fun = vec_vtrace_advantage_estimate
+        else:
+            fun = vtrace_advantage_estimate
+        return fun(
+            gamma,
+            log_pi,
+            log_mu,
+            value,
+            next_value,
+            reward,
+            done,
+            truncated,
+            rho_thresh=self.rho_thresh,
+            c_thresh=self.c_thresh,
+            time_dim=tensordict.ndim - 1,
+        )
+
+    @_self_set_skip_existing
+    @_self_set_grad_enabled
+    @dispatch
+    def forward(
+        self,
+        tensordict: TensorDictBase,
+        *unused_args,
+        params: Optional[TensorDictBase] = None,
+        target_params: Optional[TensorDictBase] = None,
+        actor_params: Optional[TensorDictBase] = None,
+    ) -> TensorDictBase:
+        """Computes the V-Trace advantage and value target given the data in tensordict.
+
+        If a functional module is provided, a nested TensorDict containing the parameters
+        (and if relevant the target parameters) can be passed to the module.
+
+        Args:
+            tensordict (TensorDictBase): A TensorDict containing the data
+                (an observation key, "action", "sample_log_prob", ("next", "reward"),
+                ("next", "done") and "next" tensordict state as returned by the environment)
+                necessary to compute the value estimates and the V-Trace targets.
+                The data passed to this module should be structured as :obj:`[*B, T, F]` where :obj:`B` are
+                the batch size, :obj:`T` the time dimension and :obj:`F` the feature dimension(s).
+            params (TensorDictBase, optional): A nested TensorDict containing the params
+                to be passed to the functional value network module.
+            target_params (TensorDictBase, optional): A nested TensorDict containing the
+                target params to be passed to the functional value network module.
+            actor_params (TensorDictBase, optional): A nested TensorDict containing the
+                params to be passed to the functional actor network module.
+
+        Returns:
+            An updated TensorDict with an advantage and a value_target keys as defined in the constructor.
+
+        Examples:
+            >>> from tensordict import TensorDict
+            >>> value_net = TensorDictModule(
+            ...     nn.Linear(3, 1), in_keys=["obs"], out_keys=["state_value"]
+            ... )
+            >>> module = VTrace(
+            ...     gamma=0.98,
+            ...     value_network=value_net,
+            ...     differentiable=False,
+            ... )
+            >>> obs, next_obs = torch.randn(2, 1, 10, 3)
+            >>> reward = torch.randn(1, 10, 1)
+            >>> done = torch.zeros(1, 10, 1, dtype=torch.bool)
+            >>> log_prob, sample_log_prob = torch.randn(2, 1, 10, 1)
+            >>> tensordict = TensorDict({
+            ...     "obs": obs,
+            ...     "log_prob": log_prob,
+            ...     "sample_log_prob": sample_log_prob,
+            ...     "next": {"obs": next_obs, "done": done, "reward": reward},
+            ... }, [1, 10])
+            >>> _ = module(tensordict)
+            >>> assert "advantage" in tensordict.keys()
+
+        """
+        adv, value_target = self._vtrace(
+            tensordict, params, target_params, actor_params
+        )
+        tensordict.set(self.tensor_keys.advantage, adv)
+        tensordict.set(self.tensor_keys.value_target, value_target)
+        return tensordict
+
+    def value_estimate(
+        self,
+        tensordict,
+        params: Optional[TensorDictBase] = None,
+        target_params: Optional[TensorDictBase] = None,
+        actor_params: Optional[TensorDictBase] = None,
+        **kwargs,
+    ):
+        if self.is_stateless and params is None:
+            raise RuntimeError(
+                "Expected params to be passed to advantage module but got none."
+            )
+        _, value_target = self._vtrace(tensordict, params, target_params, actor_params)
+        return value_target
+
+
 def _deprecate_class(cls, new_cls):
     @wraps(cls.__init__)
     def new_init(self, *args, **kwargs):
@@ -24,6 +24,8 @@ __all__ = [
     "vec_td_lambda_return_estimate",
     "td_lambda_advantage_estimate",
     "vec_td_lambda_advantage_estimate",
+    "vtrace_advantage_estimate",
+    "vec_vtrace_advantage_estimate",
 ]
 
 from torchrl.objectives.value.utils import (
@@ -1052,6 +1054,224 @@ def vec_td_lambda_advantage_estimate(
     )
 
 
+########################################################################
+# V-Trace
+# -------
+
+
+def _vtrace_coefficients(
+    log_pi: torch.Tensor,
+    log_mu: torch.Tensor,
+    rho_thresh: float,
+    c_thresh: float,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    log_rho = log_pi - log_mu
+    rho = log_rho.clamp_max(math.log(rho_thresh)).exp()
+    c = log_rho.clamp_max(math.log(c_thresh)).exp()
+    return rho, c
+
+
+def _vtrace_segments(
+    done: torch.Tensor, truncated: Optional[torch.Tensor]
+) -> torch.Tensor:
+    # a step is followed by the next step of the batch if it is neither
+    # done, truncated nor the last step of the batch
+    continues = ~done
+    if truncated is not None:
+        continues = continues & ~truncated
+    continues = continues.clone()
+    continues[..., -1, :] = False
+    return continues
+
+
+def _vtrace_policy_advantage(
+    gamma: Union[float, torch.Tensor],
+    rho: torch.Tensor,
+    state_value: torch.Tensor,
+    next_state_value: torch.Tensor,
+    reward: torch.Tensor,
+    done: torch.Tensor,
+    continues: torch.Tensor,
+    value_target: torch.Tensor,
+) -> torch.Tensor:
+    # the v-trace target of the next step is only used if the next step of
+    # the batch belongs to the same trajectory, otherwise we bootstrap from
+    # the value of the next state.
+    next_value_target = torch.cat(
+        [value_target[..., 1:, :], next_state_value[..., -1:, :]], -2
+    )
+    next_value_target = torch.where(continues, next_value_target, next_state_value)
+    not_done = (~done).to(state_value.dtype)
+    return rho * (reward + gamma * not_done * next_value_target - state_value)
+
+
+@_transpose_time
+def vtrace_advantage_estimate(
+    gamma: Union[float, torch.Tensor],
+    log_pi: torch.Tensor,
+    log_mu: torch.Tensor,
+    state_value: torch.Tensor,
+    next_state_value: torch.Tensor,
+    reward: torch.Tensor,
+    done: torch.Tensor,
+    truncated: Optional[torch.Tensor] = None,
+    rho_thresh: float = 1.0,
+    c_thresh: float = 1.0,
+    time_dim: int = -2,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    r"""V-Trace advantage estimate of a trajectory.
+
+    Refer to "IMPALA: Scalable Distributed Deep-RL with Importance Weighted Actor-Learner Architectures"
+    https://arxiv.org/abs/1802.01561 for more context.
+
+    Args:
+        gamma (scalar): exponential mean discount.
+        log_pi (Tensor): log-probability of the actions under the policy being trained.
+        log_mu (Tensor): log-probability of the actions under the behaviour policy.
+        state_value (Tensor): value function result with old_state input.
+        next_state_value (Tensor): value function result with new_state input.
+        reward (Tensor): reward of taking actions in the environment.
+        done (Tensor): boolean flag for end of episode.
+        truncated (Tensor, optional): boolean flag for episodes that were
+            interrupted without reaching a terminal state. The v-trace
+            recursion stops at truncated steps but, unlike done steps, the
+            value of the next state is used to bootstrap.
+        rho_thresh (float): the :math:`\bar{\rho}` clipping threshold of the
+            importance weights used in the temporal differences. Defaults to 1.
+        c_thresh (float): the :math:`\bar{c}` clipping threshold of the
+            importance weights used in the recursion. Defaults to 1.
+        time_dim (int): dimension where the time is unrolled. Defaults to -2.
+
+    All tensors (log-probabilities, values, reward and done) must have shape
+    ``[*Batch x TimeSteps x *F]``, with ``*F`` feature dimensions.
+
+    Returns:
+        the policy-gradient advantage :math:`\rho_s (r_s + \gamma v_{s+1} - V(x_s))`
+        and the v-trace value target :math:`v_s`.
+
+    """
+    if not (
+        next_state_value.shape
+        == state_value.shape
+        == reward.shape
+        == done.shape
+        == log_pi.shape
+        == log_mu.shape
+    ):
+        raise RuntimeError(SHAPE_ERR)
+    rho, c = _vtrace_coefficients(log_pi, log_mu, rho_thresh, c_thresh)
+    continues = _vtrace_segments(done, truncated)
+    not_done = (~done).to(state_value.dtype)
+    delta = rho * (reward + gamma * not_done * next_state_value - state_value)
+    discount = gamma * c * continues.to(state_value.dtype)
+
+    time_steps = state_value.shape[-2]
+    correction = torch.empty_like(delta)
+    prev_correction = 0
+    for t in reversed(range(time_steps)):
+        prev_correction = correction[..., t, :] = delta[..., t, :] + (
+            prev_correction * discount[..., t, :]
+        )
+    value_target = state_value + correction
+    advantage = _vtrace_policy_advantage(
+        gamma,
+        rho,
+        state_value,
+        next_state_value,
+        reward,
+        done,
+        continues,
+        value_target,
+    )
+    return advantage, value_target
+
+
+@_transpose_time
+def vec_vtrace_advantage_estimate(
+    gamma: Union[float, torch.Tensor],
+    log_pi: torch.Tensor,
+    log_mu: torch.Tensor,
+    state_value: torch.Tensor,
+    next_state_value: torch.Tensor,
+    reward: torch.Tensor,
+    done: torch.Tensor,
+    truncated: Optional[torch.Tensor] = None,
+    rho_thresh: float = 1.0,
+    c_thresh: float = 1.0,
+    time_dim: int = -2,
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    r"""Vectorized V-Trace advantage estimate of a trajectory.
+
+    Refer to "IMPALA: Scalable Distributed Deep-RL with Importance Weighted Actor-Learner Architectures"
+    https://arxiv.org/abs/1802.01561 for more context.
+
+    The backward recursion over time is replaced by a convolution with the
+    cumulative product of the per-step discounts, which requires a
+    ``[Batch x TimeSteps x TimeSteps]`` decay tensor.
+
+    Args:
+        gamma (scalar): exponential mean discount.
+        log_pi (Tensor): log-probability of the actions under the policy being trained.
+        log_mu (Tensor): log-probability of the actions under the behaviour policy.
+        state_value (Tensor): value function result with old_state input.
+        next_state_value (Tensor): value function result with new_state input.
+        reward (Tensor): reward of taking actions in the environment.
+        done (Tensor): boolean flag for end of episode.
+        truncated (Tensor, optional): boolean flag for episodes that were
+            interrupted without reaching a terminal state. The v-trace
+            recursion stops at truncated steps but, unlike done steps, the
+            value of the next state is used to bootstrap.
+        rho_thresh (float): the :math:`\bar{\rho}` clipping threshold of the
+            importance weights used in the temporal differences. Defaults to 1.
+        c_thresh (float): the :math:`\bar{c}` clipping threshold of the
+            importance weights used in the recursion. Defaults to 1.
+        time_dim (int): dimension where the time is unrolled. Defaults to -2.
+
+    All tensors (log-probabilities, values, reward and done) must have shape
+    ``[*Batch x TimeSteps x *F]``, with ``*F`` feature dimensions.
+
+    Returns:
+        the policy-gradient advantage :math:`\rho_s (r_s + \gamma v_{s+1} - V(x_s))`
+        and the v-trace value target :math:`v_s`.
+
+    """
+    if not (
+        next_state_value.shape
+        == state_value.shape
+        == reward.shape
+        == done.shape
+        == log_pi.shape
+        == log_mu.shape
+    ):
+        raise RuntimeError(SHAPE_ERR)
+    rho, c = _vtrace_coefficients(log_pi, log_mu, rho_thresh, c_thresh)
+    continues = _vtrace_segments(done, truncated)
+    not_done = (~done).to(state_value.dtype)
+    delta = rho * (reward + gamma * not_done * next_state_value - state_value)
+    discount = gamma * c * continues.to(state_value.dtype)
+
+    *batch_size, time_steps, lastdim = delta.shape
+    # discounts[..., t, j] = prod_{k < j} discount[..., t + k]
+    discounts = _make_gammas_tensor(discount, time_steps, True)
+    discounts = discounts.cumprod(-2)
+    delta = delta.transpose(-2, -1).reshape(-1, 1, time_steps)
+    correction = _custom_conv1d(delta, discounts)
+    correction = correction.view(*batch_size, lastdim, time_steps).transpose(-2, -1)
+
+    value_target = state_value + correction
+    advantage = _vtrace_policy_advantage(
+        gamma,
+        rho,
+        state_value,
+        next_state_value,
+        reward,
+        done,
+        continues,
+        value_target,
+    )
+    return advantage, value_target
+
+
 ########################################################################
 # Reward to go
 # ------------
@@ -9,6 +9,7 @@ from .trainers import (
     CountFramesLog,
     LogReward,
     mask_batch,
+    MinibatchIterator,
     OptimizerHook,
     Recorder,
     ReplayBufferTrainer,
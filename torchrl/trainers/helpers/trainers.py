@@ -75,6 +75,16 @@ class TrainerConfig:
     # Decay of the reward moving averaging
     sub_traj_len: int = -1
     # length of the trajectories that sub-samples must have in online settings.
+    pipeline: bool = False
+    # if True, data collection and replay buffer writes run in a background thread while the optimization steps are executed.
+    max_lag: int = 1
+    # maximum number of collected batches waiting for the optimization loop when pipeline=True.
+    autocast_dtype: str = ""
+    # dtype of the autocast used to compute the losses ("bfloat16" or "float16"). Gradients are scaled with float16 on cuda. Default="" (no autocast).
+    grad_accumulation_steps: int = 1
+    # number of micro-batches of size batch_size over which the gradients are accumulated before the optimizer is stepped.
+    fused_clip: bool = False
+    # if True, gradients are clipped with multi-tensor kernels and without device synchronization.
 
 
 def make_trainer(
@@ -160,6 +170,10 @@ def make_trainer(
         **optimizer_kwargs,
     )
     device = next(loss_module.parameters()).device
+    autocast_dtype = getattr(torch, cfg.autocast_dtype) if cfg.autocast_dtype else None
+    grad_scaler = None
+    if autocast_dtype is torch.float16 and device.type == "cuda":
+        grad_scaler = torch.cuda.amp.GradScaler()
     if cfg.lr_scheduler == "cosine":
         optim_scheduler = CosineAnnealingLR(
             optimizer,
@@ -198,6 +212,12 @@ def make_trainer(
         optim_steps_per_batch=cfg.optim_steps_per_batch,
         clip_grad_norm=cfg.clip_grad_norm,
         clip_norm=cfg.clip_norm,
+        pipeline=cfg.pipeline,
+        max_lag=cfg.max_lag,
+        autocast_dtype=autocast_dtype,
+        grad_accumulation_steps=cfg.grad_accumulation_steps,
+        grad_scaler=grad_scaler,
+        fused_clip=cfg.fused_clip,
     )
 
     if torch.cuda.device_count() > 0:
@@ -6,21 +6,39 @@
 from __future__ import annotations
 
 import abc
+import contextlib
 import pathlib
+import threading
 import warnings
 from collections import defaultdict, OrderedDict
 from copy import deepcopy
+from queue import Empty, Full, Queue
 from textwrap import indent
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 import numpy as np
 import torch.nn
 from tensordict.nn import TensorDictModule
 from tensordict.tensordict import pad, TensorDictBase
-from tensordict.utils import expand_right
 from torch import nn, optim
 
-from torchrl._utils import _CKPT_BACKEND, KeyDependentDefaultDict, VERBOSE
+from torchrl._utils import (
+    _CKPT_BACKEND,
+    KeyDependentDefaultDict,
+    telemetry,
+    VERBOSE,
+)
 from torchrl.collectors.collectors import DataCollectorBase
 from torchrl.collectors.utils import split_trajectories
 from torchrl.data import TensorDictPrioritizedReplayBuffer, TensorDictReplayBuffer
@@ -56,6 +74,8 @@ LOGGER_METHODS = {
 
 TYPE_DESCR = {float: "4.4f", int: ""}
 REWARD_KEY = ("next", "reward")
+# how often (in seconds) the pipeline worker checks whether it must stop
+_PIPELINE_TIMEOUT = 0.1
 
 
 class TrainerHookBase:
@@ -128,6 +148,47 @@ class Trainer:
             in frame count. Default is 10000.
         save_trainer_file (path, optional): path where to save the trainer.
             Default is None (no saving)
+        pipeline (bool, optional): if ``True``, the data is collected and
+            processed by the ``"batch_process"`` hooks (e.g., written in the
+            replay buffer by :meth:`ReplayBufferTrainer.extend`) in a
+            background thread while the optimization steps are executed.
+            Other hooks are executed in the main thread as usual.
+            Default is ``False``.
+        max_lag (int, optional): when ``pipeline=True``, the maximum number of
+            processed batches queued for the optimization loop. The collection
+            is paused once the queue is full, with one more processed batch held
+            by the background thread: at most ``max_lag + 1`` batches are
+            collected ahead of the batch being optimized. This bounds the lag
+            between the collected frames and the optimization steps (and,
+            on-policy, the staleness of the data).
+            Default is 1.
+        autocast_dtype (torch.dtype, optional): if provided, the losses are
+            computed under :class:`torch.autocast` with this dtype (e.g.
+            ``torch.bfloat16``), on the device type of the loss module
+            parameters. Default is ``None`` (no autocast).
+        grad_accumulation_steps (int, optional): the number of micro-batches
+            (obtained with the ``"process_optim_batch"`` hooks, e.g.
+            :meth:`ReplayBufferTrainer.sample` or :class:`BatchSubSampler`)
+            over which the gradients are accumulated at each optimization
+            step. Default is 1.
+        grad_scaler (torch.cuda.amp.GradScaler, optional): a gradient scaler
+            for float16 autocast, see :class:`OptimizerHook`. Default is ``None``.
+        fused_clip (bool, optional): if ``True``, the gradients are clipped
+            without device synchronization, see :class:`OptimizerHook`.
+            Default is ``False``.
+
+    .. note::
+      With ``pipeline=True``, the policy weights can be updated by the
+      optimizer while a batch is being collected. Hooks registered at
+      ``"batch_process"`` must be thread-safe with respect to the other
+      hooks: TorchRL replay buffers are.
+
+    .. note::
+      ``grad_accumulation_steps``, ``grad_scaler`` and ``fused_clip`` are
+      passed to the :class:`OptimizerHook` created with the ``optimizer``.
+      When optimizer hooks are registered manually, they must be created
+      with the same ``grad_accumulation_steps`` as the trainer.
+
     """
 
     @classmethod
@@ -158,6 +219,12 @@ class Trainer:
         save_trainer_interval: int = 10000,
         log_interval: int = 10000,
         save_trainer_file: Optional[Union[str, pathlib.Path]] = None,
+        pipeline: bool = False,
+        max_lag: int = 1,
+        autocast_dtype: Optional[torch.dtype] = None,
+        grad_accumulation_steps: int = 1,
+        grad_scaler: Optional["torch.cuda.amp.GradScaler"] = None,
+        fused_clip: bool = False,
     ) -> None:
 
         # objects
@@ -187,6 +254,17 @@ class Trainer:
         self.progress_bar = progress_bar and _has_tqdm
         self.save_trainer_interval = save_trainer_interval
         self.save_trainer_file = save_trainer_file
+        if max_lag < 1:
+            raise ValueError(f"max_lag must be a positive integer, got {max_lag}.")
+        self.pipeline = pipeline
+        self.max_lag = max_lag
+        if grad_accumulation_steps < 1:
+            raise ValueError(
+                "grad_accumulation_steps must be a positive integer, "
+                f"got {grad_accumulation_steps}."
+            )
+        self.autocast_dtype = autocast_dtype
+        self.grad_accumulation_steps = grad_accumulation_steps
 
         self._log_dict = defaultdict(lambda: [])
 
@@ -203,7 +281,12 @@ class Trainer:
         self._modules = {}
 
         if self.optimizer is not None:
-            optimizer_hook = OptimizerHook(self.optimizer)
+            optimizer_hook = OptimizerHook(
+                self.optimizer,
+                grad_accumulation_steps=grad_accumulation_steps,
+                grad_scaler=grad_scaler,
+                fused_clip=fused_clip,
+            )
             optimizer_hook.register(self)
 
     def register_module(self, module_name: str, module: Any) -> None:
@@ -436,34 +519,86 @@ class Trainer:
             self._pbar = tqdm(total=self.total_frames)
             self._pbar_str = {}
 
-        for batch in self.collector:
-            batch = self._process_batch_hook(batch)
-            current_frames = (
-                batch.get(("collector", "mask"), torch.tensor(batch.numel()))
-                .sum()
-                .item()
-                * self.frame_skip
-            )
-            self.collected_frames += current_frames
-            self._pre_steps_log_hook(batch)
+        batches = self._pipelined_batches() if self.pipeline else self._batches()
+        try:
+            for batch in batches:
+                current_frames = (
+                    batch.get(("collector", "mask"), torch.tensor(batch.numel()))
+                    .sum()
+                    .item()
+                    * self.frame_skip
+                )
+                self.collected_frames += current_frames
+                self._pre_steps_log_hook(batch)
 
-            if self.collected_frames > self.collector.init_random_frames:
-                self.optim_steps(batch)
-            self._post_steps_hook()
+                if self.collected_frames > self.collector.init_random_frames:
+                    self.optim_steps(batch)
+                self._post_steps_hook()
 
-            self._post_steps_log_hook(batch)
+                self._post_steps_log_hook(batch)
 
-            if self.progress_bar:
-                self._pbar.update(current_frames)
-                self._pbar_description()
+                if self.progress_bar:
+                    self._pbar.update(current_frames)
+                    self._pbar_description()
 
-            if self.collected_frames >= self.total_frames:
-                self.save_trainer(force_save=True)
-                break
-            self.save_trainer()
+                if self.collected_frames >= self.total_frames:
+                    self.save_trainer(force_save=True)
+                    break
+                self.save_trainer()
+        finally:
+            batches.close()
 
         self.collector.shutdown()
 
+    def _batches(self):
+        for batch in self.collector:
+            yield self._process_batch_hook(batch)
+
+    def _pipelined_batches(self):
+        queue = Queue(maxsize=self.max_lag)
+        stop = threading.Event()
+        worker = threading.Thread(
+            target=self._pipeline_worker, args=(queue, stop), daemon=True
+        )
+        worker.start()
+        try:
+            while True:
+                try:
+                    batch = queue.get(timeout=_PIPELINE_TIMEOUT)
+                except Empty:
+                    if not worker.is_alive():
+                        raise RuntimeError("The pipeline worker stopped unexpectedly.")
+                    continue
+                if batch is None:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop.set()
+            worker.join()
+
+    def _pipeline_worker(self, queue: Queue, stop: threading.Event) -> None:
+        def put(item):
+            # the optimization loop may stop consuming at any time
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=_PIPELINE_TIMEOUT)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        try:
+            for batch in self.collector:
+                batch = self._process_batch_hook(batch)
+                if not put(batch):
+                    return
+        except Exception as err:
+            put(err)
+            return
+        put(None)
+
     def __del__(self):
         self.collector.shutdown()
 
@@ -472,6 +607,16 @@ class Trainer:
             print("shutting down collector")
         self.collector.shutdown()
 
+    def _autocast(self):
+        if self.autocast_dtype is None:
+            return contextlib.nullcontext()
+        device_type = "cpu"
+        if isinstance(self.loss_module, nn.Module):
+            param = next(self.loss_module.parameters(), None)
+            if param is not None:
+                device_type = param.device.type
+        return torch.autocast(device_type, dtype=self.autocast_dtype)
+
     def optim_steps(self, batch: TensorDictBase) -> None:
         average_losses = None
 
@@ -480,12 +625,24 @@ class Trainer:
         for j in range(self.optim_steps_per_batch):
             self._optim_count += 1
 
-            sub_batch = self._process_optim_batch_hook(batch)
-            losses_td = self.loss_module(sub_batch)
-            self._post_loss_hook(sub_batch)
-
-            losses_detached = self._optimizer_hook(losses_td)
-            self._post_optim_hook()
+            with telemetry.timer("trainer/optim_step"):
+                losses_detached = None
+                for k in range(self.grad_accumulation_steps):
+                    sub_batch = self._process_optim_batch_hook(batch)
+                    with telemetry.timer("trainer/loss"), self._autocast():
+                        losses_td = self.loss_module(sub_batch)
+                    self._post_loss_hook(sub_batch)
+
+                    with telemetry.timer("trainer/optimizer"):
+                        micro_losses = self._optimizer_hook(losses_td)
+                    if losses_detached is not None:
+                        # the losses are averaged over the micro-batches, the
+                        # other entries (e.g. grad norms) are those of the last
+                        for key, item in losses_detached.items():
+                            val = micro_losses.get(key)
+                            micro_losses.set(key, item * k / (k + 1) + val / (k + 1))
+                    losses_detached = micro_losses
+                self._post_optim_hook()
             self._post_optim_log(sub_batch)
 
             if average_losses is None:
@@ -494,7 +651,7 @@ class Trainer:
                 for key, item in losses_detached.items():
                     val = average_losses.get(key)
                     average_losses.set(key, val * j / (j + 1) + item / (j + 1))
-            del sub_batch, losses_td, losses_detached
+            del sub_batch, losses_td, losses_detached, micro_losses
 
         if self.optim_steps_per_batch > 0:
             self._log(
@@ -725,6 +882,22 @@ class OptimizerHook(TrainerHookBase):
             If omitted, the optimizer is applied to all components with the
             names starting with `loss_`.
 
+    Keyword Args:
+        grad_accumulation_steps (int, optional): the number of calls over which
+            the gradients are accumulated before the optimizer is stepped.
+            The losses are divided by this number, such that ``N`` micro-batches
+            of size ``B`` give the same update as a batch of size ``N * B``.
+            The ``"grad_norm_<index>"`` entry is only written when the
+            optimizer is stepped. Defaults to 1.
+        grad_scaler (torch.cuda.amp.GradScaler, optional): a gradient scaler
+            used when the losses are computed with a float16 autocast. The
+            gradients are unscaled before they are clipped. bfloat16 does not
+            require gradient scaling. Defaults to ``None``.
+        fused_clip (bool, optional): if ``True``, the gradient norm is computed
+            and the gradients are clipped with multi-tensor kernels, and the
+            norm is kept on device: clipping and stepping the optimizer do
+            not require any device synchronization. Defaults to ``False``.
+
     Examples:
         >>> optimizer_hook = OptimizerHook(optimizer, ["loss_actor"])
         >>> trainer.register_op("optimizer", optimizer_hook)
@@ -735,23 +908,44 @@ class OptimizerHook(TrainerHookBase):
         self,
         optimizer: optim.Optimizer,
         loss_components: Optional[Sequence[str]] = None,
+        *,
+        grad_accumulation_steps: int = 1,
+        grad_scaler: Optional["torch.cuda.amp.GradScaler"] = None,
+        fused_clip: bool = False,
     ):
         if loss_components is not None and not loss_components:
             raise ValueError(
                 "loss_components list cannot be empty. "
                 "Set to None to act on all components of the loss."
             )
+        if grad_accumulation_steps < 1:
+            raise ValueError(
+                "grad_accumulation_steps must be a positive integer, "
+                f"got {grad_accumulation_steps}."
+            )
 
         self.optimizer = optimizer
         self.loss_components = loss_components
         if self.loss_components is not None:
             self.loss_components = set(self.loss_components)
-
-    def _grad_clip(self, clip_grad_norm: bool, clip_norm: float) -> float:
+        self.grad_accumulation_steps = grad_accumulation_steps
+        self.grad_scaler = grad_scaler
+        self.fused_clip = fused_clip
+        self._micro_step = 0
+
+    def _grad_clip(
+        self, clip_grad_norm: bool, clip_norm: float
+    ) -> Union[float, torch.Tensor]:
         params = []
         for param_group in self.optimizer.param_groups:
             params += param_group["params"]
 
+        if self.grad_scaler is not None:
+            self.grad_scaler.unscale_(self.optimizer)
+
+        if self.fused_clip:
+            return self._fused_grad_clip(params, clip_grad_norm, clip_norm)
+
         if clip_grad_norm and clip_norm is not None:
             gn = nn.utils.clip_grad_norm_(params, clip_norm)
         else:
@@ -761,6 +955,28 @@ class OptimizerHook(TrainerHookBase):
 
         return float(gn)
 
+    @staticmethod
+    def _fused_grad_clip(
+        params: List[torch.Tensor], clip_grad_norm: bool, clip_norm: float
+    ) -> torch.Tensor:
+        grads = [p.grad for p in params if p.grad is not None]
+        if not grads:
+            return torch.zeros(())
+        gn = torch.linalg.vector_norm(
+            torch.stack(
+                [norm.to(grads[0].device) for norm in torch._foreach_norm(grads)]
+            )
+        )
+        if clip_norm is not None:
+            if clip_grad_norm:
+                # multiplying by a clamped coefficient avoids a data-dependent branch
+                clip_coef = (clip_norm / (gn + 1e-6)).clamp_max(1.0)
+                for grad in grads:
+                    grad.mul_(clip_coef.to(grad.device))
+            else:
+                nn.utils.clip_grad_value_(params, clip_norm)
+        return gn.detach()
+
     def __call__(
         self,
         losses_td: TensorDictBase,
@@ -774,21 +990,37 @@ class OptimizerHook(TrainerHookBase):
             else [item for key, item in losses_td.items() if key.startswith("loss")]
         )
         loss = sum(loss_components)
+        if self.grad_accumulation_steps > 1:
+            loss = loss / self.grad_accumulation_steps
+        if self.grad_scaler is not None:
+            loss = self.grad_scaler.scale(loss)
         loss.backward()
 
+        self._micro_step += 1
+        if self._micro_step < self.grad_accumulation_steps:
+            return losses_td
+        self._micro_step = 0
+
         grad_norm = self._grad_clip(clip_grad_norm, clip_norm)
-        losses_td[f"grad_norm_{index}"] = torch.tensor(grad_norm)
+        losses_td[f"grad_norm_{index}"] = torch.as_tensor(grad_norm)
 
-        self.optimizer.step()
+        if self.grad_scaler is not None:
+            self.grad_scaler.step(self.optimizer)
+            self.grad_scaler.update()
+        else:
+            self.optimizer.step()
         self.optimizer.zero_grad()
 
         return losses_td
 
     def state_dict(self) -> Dict[str, Any]:
+        if self.grad_scaler is not None:
+            return {"grad_scaler": self.grad_scaler.state_dict()}
         return {}
 
     def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
-        pass
+        if self.grad_scaler is not None and "grad_scaler" in state_dict:
+            self.grad_scaler.load_state_dict(state_dict["grad_scaler"])
 
     def register(self, trainer, name="optimizer") -> None:
         trainer.register_op("optimizer", self)
@@ -1029,6 +1261,22 @@ class BatchSubSampler(TrainerHookBase):
         self.batch_size = batch_size
         self.sub_traj_len = sub_traj_len
         self.min_sub_traj_len = min_sub_traj_len
+        self._mask = None
+        self._mask_version = None
+
+    def _trajectory_lengths(self, batch: TensorDictBase) -> Optional[torch.Tensor]:
+        mask = batch.get(("collector", "mask"), None)
+        if mask is None:
+            return None
+        # the lengths only change when a new batch is collected, not at every
+        # optimization step. The mask is kept such that its identity is not reused,
+        # and its version counter catches in-place updates.
+        if mask is not self._mask or mask._version != self._mask_version:
+            self._mask = mask
+            self._mask_version = mask._version
+            self._traj_len = mask.sum(-1)
+            self._min_traj_len = int(self._traj_len.min())
+        return self._traj_len
 
     def __call__(self, batch: TensorDictBase) -> TensorDictBase:
         """Sub-sampled part of a batch randomly.
@@ -1043,22 +1291,19 @@ class BatchSubSampler(TrainerHookBase):
         if batch.ndimension() == 1:
             return batch[torch.randperm(batch.shape[0])[: self.batch_size]]
 
-        sub_traj_len = self.sub_traj_len if self.sub_traj_len > 0 else batch.shape[1]
-        if ("collector", "mask") in batch.keys(True):
+        num_traj, max_traj_len, *other_dims = batch.batch_size
+        sub_traj_len = self.sub_traj_len if self.sub_traj_len > 0 else max_traj_len
+        traj_len = self._trajectory_lengths(batch)
+        if traj_len is not None:
             # if a valid mask is present, it's important to sample only
             # valid steps
-            traj_len = batch.get(("collector", "mask")).sum(-1)
             sub_traj_len = max(
-                self.min_sub_traj_len,
-                min(sub_traj_len, traj_len.min().int().item()),
+                self.min_sub_traj_len, min(sub_traj_len, self._min_traj_len)
             )
         else:
-            traj_len = (
-                torch.ones(batch.shape[0], device=batch.device, dtype=torch.bool)
-                * batch.shape[1]
+            traj_len = torch.full(
+                (num_traj,), max_traj_len, device=batch.device, dtype=torch.long
             )
-        len_mask = traj_len >= sub_traj_len
-        valid_trajectories = torch.arange(batch.shape[0], device=batch.device)[len_mask]
 
         batch_size = self.batch_size // sub_traj_len
         if batch_size == 0:
@@ -1067,38 +1312,31 @@ class BatchSubSampler(TrainerHookBase):
                 "BatchSubSampler must be equal to the total number of elements "
                 "that will result in a batch provided to the loss function."
             )
-        traj_idx = valid_trajectories[
-            torch.randint(
-                valid_trajectories.numel(), (batch_size,), device=batch.device
-            )
-        ]
+        # sampling the valid trajectories with multinomial avoids a sync
+        len_mask = traj_len >= sub_traj_len
+        traj_idx = torch.multinomial(len_mask.float(), batch_size, replacement=True)
 
-        if sub_traj_len < batch.shape[1]:
+        if sub_traj_len < max_traj_len:
             _traj_len = traj_len[traj_idx]
             seq_idx = (
                 torch.rand_like(_traj_len, dtype=torch.float)
                 * (_traj_len - sub_traj_len)
-            ).int()
-            seq_idx = seq_idx.unsqueeze(-1).expand(-1, sub_traj_len)
-        elif sub_traj_len == batch.shape[1]:
-            seq_idx = torch.zeros(
-                batch_size, sub_traj_len, device=batch.device, dtype=torch.long
-            )
+            ).long()
+        elif sub_traj_len == max_traj_len:
+            seq_idx = torch.zeros(batch_size, device=batch.device, dtype=torch.long)
         else:
             raise ValueError(
                 f"sub_traj_len={sub_traj_len} is not allowed. Accepted values "
-                f"are in the range [1, {batch.shape[1]}]."
+                f"are in the range [1, {max_traj_len}]."
             )
 
-        seq_idx = seq_idx + torch.arange(sub_traj_len, device=seq_idx.device)
-        td = batch[traj_idx].clone()
-        td = td.apply(
-            lambda t: t.gather(
-                dim=1,
-                index=expand_right(seq_idx, (batch_size, sub_traj_len, *t.shape[2:])),
-            ),
-            batch_size=(batch_size, sub_traj_len),
+        # the sub-trajectories are gathered with a single indexing op on the
+        # flattened batch, which copies the selected steps
+        idx = (traj_idx * max_traj_len + seq_idx).unsqueeze(-1) + torch.arange(
+            sub_traj_len, device=seq_idx.device
         )
+        td = batch.reshape(-1, *other_dims)[idx.reshape(-1)]
+        td = td.reshape(batch_size, sub_traj_len, *other_dims)
         if ("collector", "mask") in batch.keys(True) and not td.get(
             ("collector", "mask")
         ).all():
@@ -1119,6 +1357,169 @@ class BatchSubSampler(TrainerHookBase):
         trainer.register_module(name, self)
 
 
+class MinibatchIterator(TrainerHookBase):
+    """Iterates over minibatches of a collected batch without replacement.
+
+    This class is the counterpart of :class:`BatchSubSampler` for multi-epoch
+    training over a batch of data just collected from the environment (e.g.
+    with PPO): each element (or sub-trajectory) of the batch is sampled once
+    per epoch, as with a :class:`~torchrl.data.replay_buffers.SamplerWithoutReplacement`,
+    but without writing the batch to a replay buffer.
+
+    The permutation of the batch is computed once per epoch. Each minibatch is
+    gathered (and thus copied) with a single indexing operation on the
+    flattened batch, or sliced from it if ``shuffle=False`` and the steps are
+    not masked.
+
+    Args:
+        batch_size (int): the number of elements of a minibatch.
+            Sub-trajectory minibatches have a shape ``[batch_size // sub_traj_len, sub_traj_len]``.
+        sub_traj_len (int, optional): if positive, the trajectories of a batch
+            of shape ``[B, T, ...]`` are split in non-overlapping sub-trajectories
+            of this length, starting at a random offset drawn at every epoch.
+            Otherwise, the minibatches are made of single steps. Default is 0.
+        shuffle (bool, optional): if ``False``, the elements are read in
+            order. Default is ``True``.
+        drop_last (bool, optional): if ``True``, the last incomplete minibatch
+            of an epoch is dropped. Default is ``False``.
+
+    If the batch contains a ``("collector", "mask")`` entry, only valid steps
+    are sampled.
+
+    When registered as a ``"process_optim_batch"`` hook, each call returns the
+    next minibatch of the current epoch, and a new epoch starts when all the
+    minibatches have been returned or when a new batch is passed.
+
+    Examples:
+        >>> minibatches = MinibatchIterator(batch_size=64)
+        >>> for minibatch in minibatches.iterate(batch, num_epochs=10):
+        ...     loss = loss_module(minibatch)
+        >>> # or, in a trainer
+        >>> minibatches.register(trainer)
+
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        sub_traj_len: int = 0,
+        shuffle: bool = True,
+        drop_last: bool = False,
+    ) -> None:
+        if batch_size < max(sub_traj_len, 1):
+            raise ValueError(
+                f"batch_size must be at least {max(sub_traj_len, 1)}, got {batch_size}."
+            )
+        self.batch_size = batch_size
+        self.sub_traj_len = sub_traj_len
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self._batch = None
+        self._minibatches = iter(())
+
+    def _flatten(self, batch: TensorDictBase) -> TensorDictBase:
+        if batch.ndimension() == 1:
+            return batch
+        return batch.reshape(-1, *batch.batch_size[2:])
+
+    def _epoch_indices(self, batch: TensorDictBase) -> Optional[torch.Tensor]:
+        # returns the flat indices of the elements of the epoch, one row per
+        # sub-trajectory, or None if all the steps are used in order
+        mask = batch.get(("collector", "mask"), None)
+        if self.sub_traj_len > 0:
+            if batch.ndimension() < 2:
+                raise RuntimeError(
+                    "Sub-trajectories can only be sampled from batches with a "
+                    f"time dimension, got batch_size={batch.batch_size}."
+                )
+            num_traj, max_traj_len = batch.batch_size[:2]
+            if self.sub_traj_len > max_traj_len:
+                raise ValueError(
+                    f"sub_traj_len={self.sub_traj_len} is greater than the "
+                    f"trajectory length {max_traj_len}."
+                )
+            num_chunks = max_traj_len // self.sub_traj_len
+            max_offset = max_traj_len - num_chunks * self.sub_traj_len
+            offset = (
+                int(torch.randint(max_offset + 1, ()))
+                if self.shuffle and max_offset
+                else 0
+            )
+            starts = (
+                torch.arange(num_traj, device=batch.device).unsqueeze(-1) * max_traj_len
+                + offset
+                + torch.arange(num_chunks, device=batch.device) * self.sub_traj_len
+            )
+            if mask is not None:
+                chunk_mask = mask[:, offset : offset + num_chunks * self.sub_traj_len]
+                chunk_mask = chunk_mask.reshape(num_traj, num_chunks, -1).all(-1)
+                starts = starts[chunk_mask]
+            return starts.reshape(-1, 1) + torch.arange(
+                self.sub_traj_len, device=batch.device
+            )
+        if mask is not None:
+            return mask.reshape(-1).nonzero().squeeze(-1)
+        if self.shuffle:
+            return torch.arange(batch.numel(), device=batch.device)
+        return None
+
+    def _epoch(self, batch: TensorDictBase):
+        flat_batch = self._flatten(batch)
+        indices = self._epoch_indices(batch)
+        num_elements = flat_batch.shape[0] if indices is None else indices.shape[0]
+        minibatch_size = self.batch_size // max(self.sub_traj_len, 1)
+        if self.shuffle:
+            indices = indices[torch.randperm(num_elements, device=indices.device)]
+        for start in range(0, num_elements, minibatch_size):
+            stop = min(start + minibatch_size, num_elements)
+            if self.drop_last and stop - start < minibatch_size:
+                return
+            if indices is None:
+                yield flat_batch[start:stop]
+            elif self.sub_traj_len > 0:
+                minibatch = flat_batch[indices[start:stop].reshape(-1)]
+                yield minibatch.reshape(
+                    stop - start, self.sub_traj_len, *flat_batch.batch_size[1:]
+                )
+            else:
+                yield flat_batch[indices[start:stop]]
+
+    def iterate(
+        self, batch: TensorDictBase, num_epochs: int = 1
+    ) -> Iterator[TensorDictBase]:
+        """Yields the minibatches of ``num_epochs`` epochs over a batch."""
+        for _ in range(num_epochs):
+            yield from self._epoch(batch)
+
+    def __call__(self, batch: TensorDictBase) -> TensorDictBase:
+        if batch is not self._batch:
+            self._batch = batch
+            self._minibatches = self._epoch(batch)
+        minibatch = next(self._minibatches, None)
+        if minibatch is None:
+            self._minibatches = self._epoch(batch)
+            minibatch = next(self._minibatches, None)
+            if minibatch is None:
+                raise RuntimeError(
+                    "The batch does not contain enough valid elements to build "
+                    "a minibatch."
+                )
+        return minibatch
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {}
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        pass
+
+    def register(self, trainer: Trainer, name: str = "minibatch_iterator"):
+        trainer.register_op(
+            "process_optim_batch",
+            self,
+        )
+        trainer.register_module(name, self)
+
+
 class Recorder(TrainerHookBase):
     """Recorder hook for :class:`~torchrl.trainers.Trainer`.
 